@@ -0,0 +1,311 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+import httpx
+
+try:
+    from .BlueAntAPI_DataExport import BlueAntAPI
+    from .BlueAntAPI_ExportFilter import ExportFilter
+    from .BlueAntData_Archive import ExportArchive
+    from .BlueAntData_Enrichment import resolved_path_for, write_resolved
+    from .BlueAntData_JSON import loads
+    from .BlueAntData_SimilarityIndex import SimilarityIndex, index_path_for
+    from .BlueAntData_RecordFile import records_path_for, write_records
+    from .BlueAntData_SQLStore import store_path_for, write_store
+except ImportError:
+    from BlueAntAPI_DataExport import BlueAntAPI
+    from BlueAntAPI_ExportFilter import ExportFilter
+    from BlueAntData_Archive import ExportArchive
+    from BlueAntData_Enrichment import resolved_path_for, write_resolved
+    from BlueAntData_JSON import loads
+    from BlueAntData_SimilarityIndex import SimilarityIndex, index_path_for
+    from BlueAntData_RecordFile import records_path_for, write_records
+    from BlueAntData_SQLStore import store_path_for, write_store
+
+try:
+    import h2  # noqa: F401  (aktiviert HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class AsyncRateLimiter:
+    """Token-Bucket für asyncio: höchstens `rate` Requests pro Sekunde"""
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(int(rate or 1), 1)
+        self.tokens = float(self.burst)
+        self.last = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncBlueAntAPI:
+    """
+    Asynchrones Gegenstück zu `BlueAntAPI`.
+
+    Alle Requests laufen über einen gemeinsamen httpx.AsyncClient (Connection-
+    Pooling, HTTP/2 sofern der Server es per ALPN anbietet). Die Parallelität
+    wird über ein Semaphore begrenzt, optional zusätzlich über ein Rate-Limit.
+    429/503-Antworten werden mit Backoff wiederholt (Retry-After wird beachtet).
+
+        async with AsyncBlueAntAPI(api_key, max_concurrency=50, rate_limit=40) as api:
+            projects = await api.export_all_projects()
+    """
+
+    CONTEXT_TYPES = BlueAntAPI.CONTEXT_TYPES
+    RETRY_STATUS = (429, 502, 503, 504)
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 max_concurrency: int = 20, rate_limit: Optional[float] = None,
+                 timeout: float = 10, max_retries: int = 3, http2: bool = True):
+        self.base_url = (base_url or BlueAntAPI.DEFAULT_BASE_URL).rstrip("/")
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        }
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = AsyncRateLimiter(rate_limit)
+        self._client: Optional[httpx.AsyncClient] = None
+
+        self.request_count = 0
+        self.retry_count = 0
+        self.error_count = 0
+
+    # =========================
+    # Client-Lebenszyklus
+    # =========================
+    async def __aenter__(self) -> "AsyncBlueAntAPI":
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=self.timeout,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    # =========================
+    # Basis GET
+    # =========================
+    async def _get(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Dict]:
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._rate_limiter.acquire()
+                self.request_count += 1
+                try:
+                    r = await self._client.get(endpoint, params=params)
+                except httpx.HTTPError as e:
+                    if attempt < self.max_retries:
+                        self.retry_count += 1
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+                        continue
+                    self.error_count += 1
+                    print(f"❌ Request Error: {endpoint} {e!r}")
+                    return None
+
+                if r.status_code in self.RETRY_STATUS and attempt < self.max_retries:
+                    self.retry_count += 1
+                    await asyncio.sleep(self._retry_delay(r.headers.get("Retry-After"), attempt))
+                    continue
+
+                if r.is_error:
+                    self.error_count += 1
+                    print(f"❌ {r.status_code} {endpoint} {r.text[:200]}")
+                    return None
+
+                try:
+                    return loads(r.content)
+                except ValueError as e:
+                    # z. B. HTML-Seite eines Proxys mit Status 200
+                    self.error_count += 1
+                    print(f"❌ Ungültiges JSON: {endpoint} {e}")
+                    return None
+        return None
+
+    @staticmethod
+    def _retry_delay(retry_after: Optional[str], attempt: int) -> float:
+        """Wartezeit aus Retry-After (Sekunden); HTTP-Datum oder fehlend: exponentieller Backoff"""
+        try:
+            return max(0.0, float(retry_after))
+        except (TypeError, ValueError):
+            return 0.5 * 2 ** attempt
+
+    # =========================
+    # PROJECTS
+    # =========================
+    async def get_projects(self, params: Dict[str, Any] = None):
+        res = await self._get("/projects", params=params)
+        return res.get("projects") if res else None
+
+    async def get_project(self, project_id: int, params: Dict[str, Any] = None):
+        return await self._get(f"/projects/{project_id}", params=params)
+
+    async def get_project_kpis(self, project_id: int):
+        return await self._get(f"/projects/{project_id}/kpis")
+
+    async def get_project_planningentries(self, project_id: int):
+        """Holt alle Planning Entries mit Details"""
+        return await self._get(f"/projects/{project_id}/planningentries")
+
+    # =========================
+    # MASTERDATA
+    # =========================
+    async def get_project_statuses(self):
+        """Holt alle Projekt-Status"""
+        return await self._get("/masterdata/projects/statuses")
+
+    async def get_customfield_contexttypes(self):
+        """Holt alle Custom Field Context Types"""
+        return await self._get("/masterdata/customfield/contexttypes")
+
+    async def get_customfield_definitions(self, context_type: str):
+        """Holt Custom Field Definitionen für einen Context Type"""
+        return await self._get(f"/masterdata/customfield/definitions/{context_type}")
+
+    # =========================
+    # FULL EXPORT
+    # =========================
+    async def export_project(self, project_id: int,
+                             export_filter: Optional[ExportFilter] = None) -> Dict[str, Any]:
+        """Projekt, KPIs und Planning Entries eines Projekts parallel"""
+        export_filter = export_filter or ExportFilter()
+        async with asyncio.TaskGroup() as tg:
+            project = tg.create_task(self.get_project(project_id, export_filter.detail_params()))
+            kpis = tg.create_task(self.get_project_kpis(project_id))
+            planningentries = tg.create_task(self.get_project_planningentries(project_id))
+
+        return {
+            "project": export_filter.project_fields(project.result()),
+            "kpis": kpis.result(),
+            "planningentries": planningentries.result(),
+        }
+
+    async def export_all_projects(self, export_filter: Optional[ExportFilter] = None) -> Dict[int, Dict[str, Any]]:
+        """Exportiert alle Projektdaten (parallel, begrenzt durch Semaphore/Rate-Limit)"""
+        export_filter = export_filter or ExportFilter()
+        projects = await self.get_projects(export_filter.query_params() or None)
+        if not projects:
+            print("❌ Keine Projekte gefunden")
+            return {}
+
+        print(f"✅ {len(projects)} Projekte gefunden")
+
+        if not export_filter.is_empty:
+            projects = export_filter.select(projects)
+            print(f"🔎 {len(projects)} Projekte nach Filter")
+
+        # Feste Anzahl Worker statt eines Tasks pro Projekt: der Speicherbedarf
+        # hängt nur von der Parallelität ab, nicht von der Portfoliogröße
+        project_ids = [project["id"] for project in projects]
+        pending = iter(project_ids)
+        export = {}
+
+        async def worker():
+            for project_id in pending:
+                export[project_id] = await self.export_project(project_id, export_filter)
+
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(min(self.max_concurrency, len(project_ids))):
+                tg.create_task(worker())
+
+        return {project_id: export[project_id] for project_id in project_ids}
+
+    async def export_all_masterdata(self) -> Dict[str, Any]:
+        """Exportiert alle Masterdata (parallel)"""
+        export = {}
+
+        async with asyncio.TaskGroup() as tg:
+            statuses = tg.create_task(self.get_project_statuses())
+            context_types = tg.create_task(self.get_customfield_contexttypes())
+            definitions = {
+                ctx_type: tg.create_task(self.get_customfield_definitions(ctx_type))
+                for ctx_type in self.CONTEXT_TYPES
+            }
+
+        if statuses.result():
+            export["project_statuses"] = statuses.result()
+        if context_types.result():
+            export["customfield_contexttypes"] = context_types.result()
+
+        loaded = {ctx: task.result() for ctx, task in definitions.items() if task.result()}
+        if loaded:
+            export["customfield_definitions"] = loaded
+
+        return export
+
+    def combine_data(self, projects_data: Dict, masterdata: Dict) -> List[Dict[str, Any]]:
+        """Kombiniert Project- und Masterdata über IDs (wie BlueAntAPI)"""
+        return BlueAntAPI(api_key="", base_url=self.base_url).combine_data(projects_data, masterdata)
+
+
+async def main(api_key: str, base_url: Optional[str] = None):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    print("\n" + "=" * 60)
+    print("🚀 BLUE ANT DATEN EXPORT (ASYNC)")
+    print("=" * 60)
+
+    export_filter = ExportFilter.from_env()
+    start = time.perf_counter()
+    async with AsyncBlueAntAPI(api_key, base_url=base_url,
+                               max_concurrency=int(os.environ.get("BLUEANT_CONCURRENCY", 20)),
+                               rate_limit=float(os.environ.get("BLUEANT_RATE_LIMIT", 0)) or None) as api:
+        projects_data, masterdata = await asyncio.gather(
+            api.export_all_projects(export_filter), api.export_all_masterdata()
+        )
+        combined_data = api.combine_data(projects_data, masterdata)
+
+    print(f"⏱️ {api.request_count} Requests in {time.perf_counter() - start:.1f}s "
+          f"({api.retry_count} Wiederholungen, {api.error_count} Fehler)")
+
+    archive = ExportArchive.from_env()
+    archive.write(timestamp, "projects", projects_data)
+    archive.write(timestamp, "masterdata", masterdata)
+    combined_file = archive.write(timestamp, "combined", combined_data)
+    write_store(combined_data, store_path_for(combined_file), masterdata)
+    write_records(combined_data, records_path_for(combined_file))
+    write_resolved(combined_data, masterdata, resolved_path_for(combined_file))
+
+    similarity_index = SimilarityIndex.load_or_create(index_path_for(combined_file))
+    print(f"🧭 Ähnlichkeitsindex: {similarity_index.update(combined_data, remove_missing=export_filter.is_empty)}")
+    similarity_index.save(index_path_for(combined_file))
+    archive.commit(timestamp)
+
+
+if __name__ == "__main__":
+    # API_KEY wie in backend/.env
+    api_key = os.environ.get("API_KEY")
+    if not api_key:
+        print("❌ API_KEY nicht gesetzt (siehe backend/.env)")
+        raise SystemExit(1)
+    asyncio.run(main(api_key, os.environ.get("BLUEANT_BASE_URL")))
@@ -0,0 +1,143 @@
+"""
+Export-Filter für den Blue Ant Export.
+
+Filtert die Projektliste (GET /projects) nach Status, Abteilung, Zeitraum und
+letzter Änderung, bevor die teuren Einzelabrufe (Projekt, KPIs, Planning
+Entries) starten. Status, Abteilung, Änderungsdatum und Feldauswahl werden als
+Query-Parameter an die API übergeben; da nicht jede Blue Ant Instanz alle
+Parameter auswertet, wird das Ergebnis zusätzlich clientseitig gefiltert.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Any, Optional, Iterable, FrozenSet, Tuple, Union
+
+
+DateLike = Union[date, str, None]
+
+
+def _day(value: DateLike) -> Optional[str]:
+    """ISO-Datum (YYYY-MM-DD) aus date oder API-Zeitstempel"""
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+def _ids(values: Optional[Iterable]) -> FrozenSet[int]:
+    return frozenset(int(v) for v in values) if values else frozenset()
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    """
+    Auswahl der zu exportierenden Projekte.
+
+    status_ids / department_ids: nur diese IDs (leer = alle)
+    date_from / date_to: Projektlaufzeit muss den Zeitraum überschneiden
+    changed_since: nur Projekte mit lastChanged ab diesem Datum
+    fields: Feldauswahl für die Projektdetails (None = alle Felder)
+    """
+    status_ids: FrozenSet[int] = field(default_factory=frozenset)
+    department_ids: FrozenSet[int] = field(default_factory=frozenset)
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    changed_since: Optional[str] = None
+    fields: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def create(cls, status_ids: Optional[Iterable] = None, department_ids: Optional[Iterable] = None,
+               date_from: DateLike = None, date_to: DateLike = None,
+               changed_since: DateLike = None, fields: Optional[Iterable[str]] = None) -> "ExportFilter":
+        return cls(
+            status_ids=_ids(status_ids),
+            department_ids=_ids(department_ids),
+            date_from=_day(date_from),
+            date_to=_day(date_to),
+            changed_since=_day(changed_since),
+            fields=tuple(dict.fromkeys(["id", *fields])) if fields else None,
+        )
+
+    @classmethod
+    def from_env(cls) -> "ExportFilter":
+        """Filter aus Umgebungsvariablen (kommagetrennte Listen, Datumswerte als YYYY-MM-DD)"""
+        def values(name):
+            raw = os.environ.get(name, "")
+            return [v.strip() for v in raw.split(",") if v.strip()]
+
+        return cls.create(
+            status_ids=values("BLUEANT_STATUS_IDS"),
+            department_ids=values("BLUEANT_DEPARTMENT_IDS"),
+            date_from=os.environ.get("BLUEANT_DATE_FROM"),
+            date_to=os.environ.get("BLUEANT_DATE_TO"),
+            changed_since=os.environ.get("BLUEANT_CHANGED_SINCE"),
+            fields=values("BLUEANT_FIELDS"),
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.status_ids or self.department_ids or self.date_from
+                    or self.date_to or self.changed_since or self.fields)
+
+    # =========================
+    # Serverseitig
+    # =========================
+    def query_params(self) -> Dict[str, Any]:
+        """Query-Parameter für GET /projects"""
+        params = {}
+        if self.status_ids:
+            params["statusIds"] = sorted(self.status_ids)
+        if self.department_ids:
+            params["departmentIds"] = sorted(self.department_ids)
+        if self.changed_since:
+            params["changedSince"] = self.changed_since
+        return params
+
+    def detail_params(self) -> Optional[Dict[str, Any]]:
+        """Query-Parameter für GET /projects/{id} (Feldauswahl)"""
+        if not self.fields:
+            return None
+        return {"fields": ",".join(self.fields)}
+
+    # =========================
+    # Clientseitig
+    # =========================
+    def matches(self, project: Dict[str, Any]) -> bool:
+        """Prüft einen Eintrag der Projektliste; fehlende Felder schließen nicht aus"""
+        if self.status_ids:
+            status_id = project.get("statusId", project.get("statusID"))
+            if status_id is not None and int(status_id) not in self.status_ids:
+                return False
+
+        if self.department_ids:
+            department_id = project.get("departmentId")
+            if department_id is not None and int(department_id) not in self.department_ids:
+                return False
+
+        if self.date_from:
+            end = _day(project.get("end"))
+            if end and end < self.date_from:
+                return False
+
+        if self.date_to:
+            start = _day(project.get("start"))
+            if start and start > self.date_to:
+                return False
+
+        if self.changed_since:
+            changed = _day(project.get("lastChanged"))
+            if changed and changed < self.changed_since:
+                return False
+
+        return True
+
+    def select(self, projects: Iterable[Dict[str, Any]]) -> list:
+        return [p for p in projects if self.matches(p)]
+
+    def project_fields(self, response: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Reduziert die Projekt-Antwort auf die gewählten Felder"""
+        if not self.fields or not response or not isinstance(response.get("project"), dict):
+            return response
+        project = response["project"]
+        return {**response, "project": {k: project[k] for k in self.fields if k in project}}
@@ -0,0 +1,235 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+try:
+    from .BlueAntData_TenantGenerator import SyntheticTenant
+except ImportError:
+    from BlueAntData_TenantGenerator import SyntheticTenant
+
+
+API_PREFIX = "/rest/v1"
+
+
+class RateLimiter:
+    """Token-Bucket: `rate` Requests pro Sekunde, Bursts bis `burst`"""
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or (int(rate) if rate else 0) or 1
+        self.tokens = float(self.burst)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class MockBlueAntServer:
+    """
+    Lokaler Blue Ant REST-Server für Lasttests.
+
+    Implementiert die Endpunkte, die `BlueAntAPI` nutzt, auf Basis eines
+    `SyntheticTenant`. Latenz, Rate-Limit und Fehlerquote sind konfigurierbar.
+    """
+
+    def __init__(self, tenant: SyntheticTenant, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, latency_jitter: float = 0.0,
+                 rate_limit: Optional[float] = None, burst: Optional[int] = None,
+                 error_rate: float = 0.0, api_key: Optional[str] = None, seed: int = 0):
+        self.tenant = tenant
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limiter = RateLimiter(rate_limit, burst)
+        self.error_rate = error_rate
+        self.api_key = api_key
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+        self.request_count = 0
+        self.throttled_count = 0
+        self.error_count = 0
+        self._count_lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    # =========================
+    # Start / Stop
+    # =========================
+    def start(self) -> "MockBlueAntServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # =========================
+    # Routing
+    # =========================
+    def _envelope(self, **payload) -> Dict[str, Any]:
+        return {"status": {"name": "OK", "code": 200},
+                "timestamp": int(time.time() * 1000), **payload}
+
+    @staticmethod
+    def _query_ids(query: Dict[str, list], name: str) -> set:
+        """IDs aus wiederholten oder kommagetrennten Query-Parametern"""
+        return {int(v) for raw in query.get(name, []) for v in raw.split(",") if v.strip()}
+
+    def _filter_projects(self, query: Dict[str, list]) -> list:
+        """
+        Serverseitige Filter auf GET /projects: statusIds, departmentIds, changedSince.
+        Ein Laufzeit-Zeitraum wird bewusst nicht unterstützt (Client filtert selbst).
+        """
+        projects = self.tenant.project_summaries()
+        status_ids = self._query_ids(query, "statusIds")
+        department_ids = self._query_ids(query, "departmentIds")
+        changed_since = query.get("changedSince", [None])[0]
+
+        if status_ids:
+            projects = [p for p in projects if p["statusId"] in status_ids]
+        if department_ids:
+            projects = [p for p in projects if p["departmentId"] in department_ids]
+        if changed_since:
+            projects = [p for p in projects if p["lastChanged"][:10] >= changed_since[:10]]
+        return projects
+
+    def handle(self, path: str, headers) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        """Liefert (Statuscode, JSON-Body, zusätzliche Header) für einen GET-Request"""
+        with self._count_lock:
+            self.request_count += 1
+
+        if self.api_key and headers.get("Authorization") != f"Bearer {self.api_key}":
+            return 401, {"status": {"name": "Unauthorized", "code": 401}}, {}
+
+        if not self.rate_limiter.allow():
+            with self._count_lock:
+                self.throttled_count += 1
+            return 429, {"status": {"name": "Too Many Requests", "code": 429}}, {"Retry-After": "1"}
+
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            with self._count_lock:
+                self.error_count += 1
+            return 503, {"status": {"name": "Service Unavailable", "code": 503}}, {}
+
+        url = urlparse(path)
+        path, query = url.path, parse_qs(url.query)
+        if not path.startswith(API_PREFIX):
+            return 404, {"status": {"name": "Not Found", "code": 404}}, {}
+        path = path[len(API_PREFIX):].rstrip("/")
+
+        masterdata = self.tenant.masterdata
+
+        if path == "/projects":
+            return 200, self._envelope(projects=self._filter_projects(query)), {}
+
+        match = re.fullmatch(r"/projects/(\d+)(/kpis|/planningentries)?", path)
+        if match:
+            project_id = int(match.group(1))
+            if not self.tenant.has_project(project_id):
+                return 404, {"status": {"name": "Not Found", "code": 404}}, {}
+            if match.group(2) == "/kpis":
+                return 200, self._envelope(kpis=self.tenant.kpis(project_id)), {}
+            if match.group(2) == "/planningentries":
+                return 200, self._envelope(planningEntries=self.tenant.planningentries(project_id)), {}
+            project = self.tenant.project(project_id)
+            if "fields" in query:
+                fields = {"id", *query["fields"][0].split(",")}
+                project = {k: v for k, v in project.items() if k in fields}
+            return 200, self._envelope(project=project), {}
+
+        if path == "/masterdata/projects/statuses":
+            return 200, masterdata.get("project_statuses", self._envelope(projectStatus=[])), {}
+
+        if path == "/masterdata/customfield/contexttypes":
+            return 200, masterdata.get("customfield_contexttypes", self._envelope(contextTypes=[])), {}
+
+        match = re.fullmatch(r"/masterdata/customfield/definitions/(\w+)", path)
+        if match:
+            definitions = masterdata.get("customfield_definitions", {}).get(match.group(1))
+            return 200, definitions or self._envelope(customFields=[]), {}
+
+        return 404, {"status": {"name": "Not Found", "code": 404}}, {}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, body, extra_headers = server.handle(self.path, self.headers)
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in extra_headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler Blue Ant Mock-Server")
+    parser.add_argument("--projects", type=int, default=100, help="Anzahl synthetischer Projekte")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Grundlatenz in Sekunden")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Zufällige Zusatzlatenz in Sekunden")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests pro Sekunde")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil fehlerhafter Antworten (0-1)")
+    args = parser.parse_args()
+
+    tenant = SyntheticTenant(n_projects=args.projects, seed=args.seed)
+    mock = MockBlueAntServer(
+        tenant, port=args.port, latency=args.latency, latency_jitter=args.jitter,
+        rate_limit=args.rate_limit, error_rate=args.error_rate
+    )
+
+    print(f"🧪 Mock-Server mit {args.projects} Projekten: {mock.base_url}")
+    try:
+        mock.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Mock-Server beendet")
@@ -0,0 +1,246 @@
+"""
+Export mehrerer Blue Ant Instanzen (Mandanten) in einem Lauf.
+
+Die Mandanten stehen in einer Konfigurationsdatei (YAML oder JSON) mit
+eigener URL, eigenem API-Key und eigenem Rate-Limit. Jeder Mandant wird in
+einem eigenen Prozess mit dem asynchronen Exporter (AsyncBlueAntAPI)
+exportiert; Rate-Limit und Parallelität gelten je Mandant. Schlägt ein
+Mandant fehl, laufen die anderen weiter. Am Ende entsteht je Mandant die
+übliche Exportdatei plus SQL-Store und eine zusammengeführte Datei, in der
+jeder Datensatz das Feld "tenant" trägt (Projekt-IDs sind nur je Mandant
+eindeutig).
+
+    tenants:
+      - name: nord
+        base_url: https://nord.blueant.cloud/rest/v1
+        api_key_env: BLUEANT_KEY_NORD     # oder api_key
+        rate_limit: 10                    # Requests pro Sekunde
+        max_concurrency: 10
+        filter: {status_ids: [10, 11]}    # optional, wie ExportFilter.create
+
+    python BlueAntAPI_MultiTenant.py tenants.yaml
+    python BlueAntAPI_MultiTenant.py --mock 3      # lokale Mock-Server
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    from .BlueAntAPI_AsyncExport import AsyncBlueAntAPI
+    from .BlueAntAPI_DataExport import save_json
+    from .BlueAntAPI_ExportFilter import ExportFilter
+    from .BlueAntData_Enrichment import resolved_path_for, write_resolved
+    from .BlueAntData_JSON import load_file
+    from .BlueAntData_RecordFile import records_path_for, write_records
+    from .BlueAntData_SQLStore import store_path_for, write_store
+except ImportError:
+    from BlueAntAPI_AsyncExport import AsyncBlueAntAPI
+    from BlueAntAPI_DataExport import save_json
+    from BlueAntAPI_ExportFilter import ExportFilter
+    from BlueAntData_Enrichment import resolved_path_for, write_resolved
+    from BlueAntData_JSON import load_file
+    from BlueAntData_RecordFile import records_path_for, write_records
+    from BlueAntData_SQLStore import store_path_for, write_store
+
+
+@dataclass(frozen=True)
+class TenantConfig:
+    """Zugang und Limits einer Blue Ant Instanz"""
+    name: str
+    base_url: str
+    api_key: str
+    rate_limit: Optional[float] = None
+    max_concurrency: int = 20
+    filter: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "TenantConfig":
+        api_key = raw.get("api_key")
+        if api_key is None and raw.get("api_key_env"):
+            api_key = os.environ.get(raw["api_key_env"])
+        if not raw.get("name") or not raw.get("base_url") or api_key is None:
+            raise ValueError(f"Mandant unvollständig (name, base_url, api_key/api_key_env): {raw}")
+        return cls(
+            name=str(raw["name"]),
+            base_url=raw["base_url"],
+            api_key=api_key,
+            rate_limit=raw.get("rate_limit"),
+            max_concurrency=int(raw.get("max_concurrency", 20)),
+            filter=dict(raw.get("filter") or {}),
+        )
+
+
+def load_tenants(path: str) -> List[TenantConfig]:
+    """Mandanten aus einer YAML- oder JSON-Datei (Liste oder {"tenants": [...]})"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ImportError("PyYAML ist nicht installiert (pip install pyyaml)")
+            raw = yaml.safe_load(f)
+        else:
+            raw = json.load(f)
+
+    entries = raw.get("tenants", []) if isinstance(raw, dict) else raw
+    tenants = [TenantConfig.from_dict(entry) for entry in entries]
+    names = [t.name for t in tenants]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Doppelte Mandantennamen: {names}")
+    return tenants
+
+
+# =========================
+# Export je Mandant (im Worker-Prozess)
+# =========================
+async def _export(tenant: TenantConfig, export_filter: ExportFilter):
+    async with AsyncBlueAntAPI(tenant.api_key, base_url=tenant.base_url,
+                               max_concurrency=tenant.max_concurrency,
+                               rate_limit=tenant.rate_limit) as api:
+        projects_data, masterdata = await asyncio.gather(
+            api.export_all_projects(export_filter), api.export_all_masterdata()
+        )
+        return api, projects_data, masterdata, api.combine_data(projects_data, masterdata)
+
+
+def export_tenant(tenant: TenantConfig, out_dir: str, timestamp: str) -> Dict[str, Any]:
+    """Exportiert einen Mandanten und schreibt dessen Dateien; Fehler landen im Ergebnis"""
+    result = {"tenant": tenant.name, "ok": False, "projects": 0, "requests": 0,
+              "errors": 0, "seconds": 0.0, "combined_file": None, "error": None}
+    start = time.perf_counter()
+    log = io.StringIO()
+
+    try:
+        export_filter = ExportFilter.create(**tenant.filter) if tenant.filter else ExportFilter.from_env()
+        with contextlib.redirect_stdout(log):
+            api, projects_data, masterdata, combined = asyncio.run(_export(tenant, export_filter))
+
+        result["requests"] = api.request_count
+        result["errors"] = api.error_count
+        if not masterdata or (not projects_data and api.error_count):
+            raise RuntimeError(f"Keine Daten von {tenant.base_url} "
+                               f"({api.error_count} fehlgeschlagene Requests)")
+
+        prefix = os.path.join(out_dir, f"blueant_%s_{tenant.name}_{timestamp}.json")
+        with contextlib.redirect_stdout(log):
+            save_json(masterdata, prefix % "masterdata")
+            save_json(combined, prefix % "combined")
+            write_store(combined, store_path_for(prefix % "combined"), masterdata)
+            write_records(combined, records_path_for(prefix % "combined"))
+            write_resolved(combined, masterdata, resolved_path_for(prefix % "combined"))
+
+        result.update(ok=True, projects=len(combined), combined_file=prefix % "combined")
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["seconds"] = round(time.perf_counter() - start, 1)
+    result["log"] = log.getvalue()[-2000:]
+    return result
+
+
+# =========================
+# Orchestrierung
+# =========================
+def merge_tenants(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Kombinierte Daten aller erfolgreichen Mandanten, je Datensatz mit "tenant" markiert"""
+    merged = []
+    for result in results:
+        if not result["ok"]:
+            continue
+        merged.extend(dict(entry, tenant=result["tenant"]) for entry in load_file(result["combined_file"]))
+    return merged
+
+
+def export_tenants(tenants: List[TenantConfig], out_dir: str = ".",
+                   workers: Optional[int] = None) -> Dict[str, Any]:
+    """Exportiert alle Mandanten parallel (ein Prozess je Mandant, höchstens `workers`)"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(out_dir, exist_ok=True)
+    order = {t.name: i for i, t in enumerate(tenants)}
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max(1, min(workers or len(tenants), len(tenants)))) as pool:
+        futures = {pool.submit(export_tenant, t, out_dir, timestamp): t for t in tenants}
+        for future in as_completed(futures):
+            tenant = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # z. B. abgestürzter Worker-Prozess
+                result = {"tenant": tenant.name, "ok": False, "projects": 0, "requests": 0,
+                          "errors": 0, "seconds": 0.0, "combined_file": None,
+                          "error": f"{type(e).__name__}: {e}"}
+            status = "✅" if result["ok"] else "❌"
+            print(f"{status} {result['tenant']}: {result['projects']} Projekte, "
+                  f"{result['requests']} Requests, {result['errors']} Fehler, {result['seconds']}s"
+                  + (f" – {result['error']}" if result["error"] else ""))
+            if not result["ok"] and result.get("log"):
+                for line in result["log"].strip().splitlines()[-3:]:
+                    print(f"   {line}")
+            results.append(result)
+
+    results.sort(key=lambda r: order[r["tenant"]])
+    merged = merge_tenants(results)
+    merged_file = os.path.join(out_dir, f"blueant_combined_tenants_{timestamp}.json")
+    save_json(merged, merged_file)
+
+    return {"results": results, "merged_file": merged_file, "projects": len(merged)}
+
+
+def _mock_tenants(count: int, stack: contextlib.ExitStack) -> List[TenantConfig]:
+    """Startet `count` lokale Mock-Server (der letzte mit Fehlerquote, ab drei Mandanten)"""
+    try:
+        from .BlueAntAPI_MockServer import MockBlueAntServer
+        from .BlueAntData_TenantGenerator import SyntheticTenant
+    except ImportError:
+        from BlueAntAPI_MockServer import MockBlueAntServer
+        from BlueAntData_TenantGenerator import SyntheticTenant
+
+    tenants = []
+    for i in range(count):
+        flaky = count >= 3 and i == count - 1
+        server = stack.enter_context(MockBlueAntServer(
+            SyntheticTenant(n_projects=20 * (i + 1), seed=i + 1),
+            latency=0.005, rate_limit=50, error_rate=1.0 if flaky else 0.0
+        ))
+        tenants.append(TenantConfig(name=f"mock{i + 1}", base_url=server.base_url,
+                                    api_key="mock", rate_limit=40, max_concurrency=8))
+    return tenants
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blue Ant Export über mehrere Mandanten")
+    parser.add_argument("config", nargs="?", help="Mandanten-Konfiguration (YAML oder JSON)")
+    parser.add_argument("--out", default=".", help="Zielverzeichnis")
+    parser.add_argument("--workers", type=int, default=None, help="Parallele Prozesse (Default: je Mandant einer)")
+    parser.add_argument("--mock", type=int, default=0, help="Statt Konfiguration N lokale Mock-Server starten")
+    args = parser.parse_args()
+
+    if not args.config and not args.mock:
+        parser.error("Konfigurationsdatei oder --mock N angeben")
+
+    print("\n" + "=" * 60)
+    print("🚀 BLUE ANT MULTI-MANDANTEN EXPORT")
+    print("=" * 60)
+
+    with contextlib.ExitStack() as stack:
+        tenants = _mock_tenants(args.mock, stack) if args.mock else load_tenants(args.config)
+        print(f"🏢 {len(tenants)} Mandanten: {', '.join(t.name for t in tenants)}\n")
+        summary = export_tenants(tenants, args.out, args.workers)
+
+    failed = [r["tenant"] for r in summary["results"] if not r["ok"]]
+    print("\n" + "=" * 60)
+    print(f"✨ {len(tenants) - len(failed)}/{len(tenants)} Mandanten exportiert"
+          + (f" (fehlgeschlagen: {', '.join(failed)})" if failed else ""))
+    print(f"📁 Zusammengeführt: {summary['merged_file']} ({summary['projects']} Projekte)")
+    print("=" * 60)
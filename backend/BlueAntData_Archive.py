@@ -0,0 +1,414 @@
+"""
+Komprimiertes Exportarchiv mit Manifest und Aufbewahrungsregeln.
+
+Statt unkomprimierter blueant_*_<zeitstempel>.json im Arbeitsverzeichnis
+legt der Exporter jeden Export als Snapshot im Archiv ab:
+
+    archive/
+      manifest.json                   neuester Snapshot + alle Snapshots
+      blueant_similarity.npz          Ähnlichkeitsindex (wird fortgeschrieben)
+      snapshots/<zeitstempel>/        die letzten `keep` Snapshots vollständig
+        blueant_combined_<ts>.json.zst      (.json.gz ohne zstandard)
+        blueant_masterdata_<ts>.json.zst
+        blueant_projects_<ts>.json.zst
+        .sqlite / .records / .resolved des Exporters
+      history/                        ältere Snapshots, dedupliziert
+        objects.pack                  komprimierte Blöcke neuer Datensätze
+        index.json                    Datensatz -> (Block, Position), Liste je Snapshot
+
+Ältere Snapshots werden in den History-Store verdichtet: ein Projekt-
+datensatz, der sich zwischen Exporten nicht ändert, liegt dort nur einmal.
+Je Verdichtung werden die neuen Datensätze gemeinsam als ein Block
+komprimiert (einzeln komprimiert wäre die Redundanz zwischen Projekten
+verloren). Projekt-Rohexport und abgeleitete Dateien entfallen. Über
+`keep_history` hinaus fallen Snapshots ganz heraus (das Pack wird dann neu
+geschrieben).
+
+Ein Snapshot erscheint erst im Manifest, wenn alle Dateien geschrieben sind
+(`commit`). Den neuesten findet `latest_snapshot()` über den Manifest-
+Eintrag, ohne Verzeichnis-Listing.
+
+    python BlueAntData_Archive.py import blueant_combined_*.json
+    python BlueAntData_Archive.py list
+    python BlueAntData_Archive.py prune --keep 3
+"""
+import argparse
+import glob
+import hashlib
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from .BlueAntData_JSON import compress, decompress, dumps, load_file, loads
+except ImportError:
+    from BlueAntData_JSON import compress, decompress, dumps, load_file, loads
+
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+DEFAULT_CODEC = "zstd" if zstandard is not None else "gzip"
+# Vollständig aufbewahrte Snapshots
+DEFAULT_KEEP = 5
+# Untergrenze für `keep`: der Änderungsfeed braucht den Vorgänger als vollständigen Snapshot
+MIN_KEEP = 2
+# Snapshots im History-Store, danach werden sie gelöscht
+DEFAULT_KEEP_HISTORY = 100
+
+MANIFEST = "manifest.json"
+SNAPSHOT_DIR = "snapshots"
+HISTORY_DIR = "history"
+KINDS = ("combined", "masterdata", "projects")
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+FULL = "full"
+HISTORY = "history"
+
+
+def archive_root(root: Optional[str] = None) -> str:
+    """Archivverzeichnis: Argument, sonst BLUEANT_ARCHIVE_DIR, sonst backend/archive"""
+    return root or os.environ.get("BLUEANT_ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR
+
+
+def archive_root_for(path: str) -> Optional[str]:
+    """Archivverzeichnis, falls `path` in einem Snapshot-Verzeichnis liegt (<root>/snapshots/<name>/)"""
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(path)))
+    return os.path.dirname(parent) if os.path.basename(parent) == SNAPSHOT_DIR else None
+
+
+def _read_manifest(root: str) -> Dict[str, Any]:
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return {"format": 1, "latest": None, "snapshots": {}}
+    return load_file(path)
+
+
+def latest_snapshot(root: Optional[str] = None) -> Optional[str]:
+    """Kombinierte Datei des neuesten Snapshots (nur das Manifest wird gelesen)"""
+    root = archive_root(root)
+    manifest = _read_manifest(root)
+    entry = manifest["snapshots"].get(manifest.get("latest"))
+    if entry is None or entry["state"] != FULL:
+        return None
+    return os.path.join(root, entry["files"]["combined"])
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _object_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class ExportArchive:
+    """
+    Snapshots eines Exportverzeichnisses (siehe Modulbeschreibung).
+
+        archive = ExportArchive()
+        archive.write(timestamp, "projects", projects_data)
+        archive.write(timestamp, "masterdata", masterdata)
+        path = archive.write(timestamp, "combined", combined_data)
+        archive.commit(timestamp)    # Manifest + Aufbewahrung
+    """
+
+    def __init__(self, root: Optional[str] = None, codec: Optional[str] = None,
+                 keep: int = DEFAULT_KEEP, keep_history: int = DEFAULT_KEEP_HISTORY):
+        self.root = archive_root(root)
+        self.codec = codec or DEFAULT_CODEC
+        if self.codec not in SUFFIXES:
+            raise ValueError(f"Unbekannter Codec: {self.codec} (erlaubt: {', '.join(SUFFIXES)})")
+        self.keep = max(MIN_KEEP, keep)
+        self.keep_history = max(0, keep_history)
+        self.manifest = _read_manifest(self.root)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._history: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_env(cls, root: Optional[str] = None) -> "ExportArchive":
+        """Aufbewahrung aus BLUEANT_ARCHIVE_KEEP / BLUEANT_ARCHIVE_HISTORY / BLUEANT_ARCHIVE_CODEC"""
+        return cls(root, codec=os.environ.get("BLUEANT_ARCHIVE_CODEC") or None,
+                   keep=int(os.environ.get("BLUEANT_ARCHIVE_KEEP", DEFAULT_KEEP)),
+                   keep_history=int(os.environ.get("BLUEANT_ARCHIVE_HISTORY", DEFAULT_KEEP_HISTORY)))
+
+    # =========================
+    # Manifest
+    # =========================
+    @property
+    def snapshots(self) -> Dict[str, Dict[str, Any]]:
+        return self.manifest["snapshots"]
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest["snapshots"] = dict(sorted(self.snapshots.items()))
+        self.manifest["latest"] = next(
+            (name for name in reversed(self.snapshots) if self.snapshots[name]["state"] == FULL), None
+        )
+        _write_atomic(os.path.join(self.root, MANIFEST), dumps(self.manifest, indent=True))
+
+    def names(self, state: Optional[str] = None) -> List[str]:
+        """Snapshot-Namen aufsteigend (Zeitstempel), optional nur FULL oder HISTORY"""
+        return [name for name, entry in self.snapshots.items() if state is None or entry["state"] == state]
+
+    def latest(self) -> Optional[str]:
+        return self.manifest.get("latest")
+
+    def previous(self, name: str) -> Optional[str]:
+        earlier = [n for n in self.names() if n < name]
+        return earlier[-1] if earlier else None
+
+    def path(self, name: str, kind: str = "combined") -> Optional[str]:
+        """Datei eines vollständig aufbewahrten Snapshots (None im History-Store)"""
+        entry = self.snapshots.get(name)
+        if entry is None or entry["state"] != FULL or kind not in entry["files"]:
+            return None
+        return os.path.join(self.root, entry["files"][kind])
+
+    # =========================
+    # Schreiben
+    # =========================
+    def snapshot_dir(self, name: str) -> str:
+        return os.path.join(self.root, SNAPSHOT_DIR, name)
+
+    def write(self, name: str, kind: str, data: Any) -> str:
+        """Schreibt eine Datei eines Snapshots komprimiert (noch ohne Manifest-Eintrag)"""
+        if kind not in KINDS:
+            raise ValueError(f"Unbekannte Dateiart: {kind} (erlaubt: {', '.join(KINDS)})")
+        directory = self.snapshot_dir(name)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"blueant_{kind}_{name}.json{SUFFIXES[self.codec]}")
+
+        raw = dumps(data)
+        stored = compress(raw, self.codec)
+        _write_atomic(path, stored)
+
+        pending = self._pending.setdefault(name, {"files": {}, "raw_bytes": 0, "stored_bytes": 0})
+        pending["files"][kind] = os.path.relpath(path, self.root)
+        pending["raw_bytes"] += len(raw)
+        pending["stored_bytes"] += len(stored)
+        if kind == "combined":
+            pending["count"] = len(data)
+        print(f"💾 Gespeichert: {path} ({len(raw) / 1e6:.1f} MB → {len(stored) / 1e6:.2f} MB, {self.codec})")
+        return path
+
+    def commit(self, name: str) -> Dict[str, int]:
+        """Trägt den Snapshot ins Manifest ein und wendet die Aufbewahrung an"""
+        pending = self._pending.pop(name, None)
+        if pending is None or "combined" not in pending["files"]:
+            raise ValueError(f"Snapshot {name} hat keine kombinierte Datei")
+        self.snapshots[name] = {
+            "state": FULL,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "codec": self.codec,
+            **pending,
+        }
+        self._save_manifest()
+        return self.apply_retention()
+
+    def add(self, name: str, combined: List[Dict[str, Any]], masterdata: Optional[Dict[str, Any]] = None,
+            projects: Optional[Any] = None) -> str:
+        """Snapshot in einem Schritt schreiben und eintragen; liefert die kombinierte Datei"""
+        for kind, data in (("projects", projects), ("masterdata", masterdata)):
+            if data is not None:
+                self.write(name, kind, data)
+        path = self.write(name, "combined", combined)
+        self.commit(name)
+        return path
+
+    def import_file(self, combined_path: str) -> str:
+        """Übernimmt einen bisherigen Export (blueant_combined_<ts>.json plus Masterdata/Projekte daneben)"""
+        directory, filename = os.path.split(combined_path)
+        name = filename.split(".")[0].removeprefix("blueant_combined_")
+        sibling = {kind: os.path.join(directory, f"blueant_{kind}_{name}.json")
+                   for kind in ("masterdata", "projects")}
+        return self.add(name, load_file(combined_path),
+                        **{kind: load_file(path) for kind, path in sibling.items() if os.path.exists(path)})
+
+    # =========================
+    # Lesen
+    # =========================
+    def load(self, name: str, kind: str = "combined") -> Any:
+        """Inhalt einer Snapshot-Datei, bei verdichteten Snapshots aus dem History-Store"""
+        entry = self.snapshots.get(name)
+        if entry is None:
+            raise KeyError(f"Snapshot nicht im Archiv: {name}")
+        if entry["state"] == FULL:
+            path = self.path(name, kind)
+            if path is None:
+                raise KeyError(f"Snapshot {name} enthält keine Datei {kind}")
+            return load_file(path)
+
+        refs = self._load_history()["snapshots"][name]
+        if kind == "combined":
+            return self._read_objects(refs["combined"])
+        if kind == "masterdata" and refs.get("masterdata"):
+            return self._read_objects([refs["masterdata"]])[0]
+        raise KeyError(f"Datei {kind} von Snapshot {name} ist nicht im History-Store")
+
+    # =========================
+    # History-Store
+    # =========================
+    @property
+    def history_dir(self) -> str:
+        return os.path.join(self.root, HISTORY_DIR)
+
+    @property
+    def _pack_path(self) -> str:
+        return os.path.join(self.history_dir, "objects.pack")
+
+    def _load_history(self) -> Dict[str, Any]:
+        if self._history is None:
+            path = os.path.join(self.history_dir, "index.json")
+            self._history = load_file(path) if os.path.exists(path) else {"objects": {}, "snapshots": {}}
+        return self._history
+
+    def _save_history(self):
+        _write_atomic(os.path.join(self.history_dir, "index.json"), dumps(self._load_history()))
+
+    def _read_objects(self, hashes: List[str], objects: Optional[Dict[str, list]] = None) -> List[Any]:
+        objects = objects if objects is not None else self._load_history()["objects"]
+        blocks: Dict[int, List[Any]] = {}
+        result = []
+        with open(self._pack_path, "rb") as f:
+            for object_hash in hashes:
+                offset, length, codec, position = objects[object_hash]
+                if offset not in blocks:
+                    f.seek(offset)
+                    blocks[offset] = loads(decompress(f.read(length), codec))
+                result.append(blocks[offset][position])
+        return result
+
+    def _append_block(self, f, items: Dict[str, Any]):
+        """Neue Datensätze (Hash -> Inhalt) als ein komprimierter Block ans Pack"""
+        if not items:
+            return
+        stored = compress(dumps(list(items.values())), self.codec)
+        offset = f.tell()
+        f.write(stored)
+        objects = self._load_history()["objects"]
+        for position, object_hash in enumerate(items):
+            objects[object_hash] = [offset, len(stored), self.codec, position]
+
+    def _compact(self, name: str):
+        """Verschiebt einen vollständigen Snapshot in den History-Store"""
+        history = self._load_history()
+        objects = history["objects"]
+        os.makedirs(self.history_dir, exist_ok=True)
+        new_items: Dict[str, Any] = {}
+
+        def ref(item) -> str:
+            object_hash = _object_hash(dumps(item))
+            if object_hash not in objects:
+                new_items.setdefault(object_hash, item)
+            return object_hash
+
+        combined = self.load(name, "combined")
+        masterdata = self.load(name, "masterdata") if self.path(name, "masterdata") else None
+        refs = {"combined": [ref(entry) for entry in combined],
+                "masterdata": ref(masterdata) if masterdata is not None else None}
+        with open(self._pack_path, "ab") as f:
+            self._append_block(f, new_items)
+        history["snapshots"][name] = refs
+        self._save_history()
+
+        self.snapshots[name].update(state=HISTORY, files={})
+        shutil.rmtree(self.snapshot_dir(name), ignore_errors=True)
+
+    def _repack(self):
+        """Schreibt das Pack nur mit noch referenzierten Datensätzen neu (ein Block je altem Block)"""
+        history = self._load_history()
+        used = {h for refs in history["snapshots"].values()
+                for h in refs["combined"] + ([refs["masterdata"]] if refs.get("masterdata") else [])}
+        by_block: Dict[int, List[str]] = {}
+        for object_hash, (offset, *_) in history["objects"].items():
+            if object_hash in used:
+                by_block.setdefault(offset, []).append(object_hash)
+
+        old_objects = history["objects"]
+        history["objects"] = {}
+        tmp_path = f"{self._pack_path}.tmp"
+        with open(tmp_path, "wb") as dst:
+            for offset in sorted(by_block):
+                hashes = by_block[offset]
+                self._append_block(dst, dict(zip(hashes, self._read_objects(hashes, old_objects))))
+        os.replace(tmp_path, self._pack_path)
+        self._save_history()
+
+    def apply_retention(self) -> Dict[str, int]:
+        """Verdichtet Snapshots über `keep` hinaus, löscht History über `keep_history` hinaus"""
+        full = self.names(FULL)
+        compacted = full[:max(0, len(full) - self.keep)]
+        for name in compacted:
+            self._compact(name)
+
+        in_history = self.names(HISTORY)
+        dropped = in_history[:max(0, len(in_history) - self.keep_history)]
+        if dropped:
+            history = self._load_history()
+            for name in dropped:
+                history["snapshots"].pop(name, None)
+                del self.snapshots[name]
+            self._repack()
+
+        if compacted or dropped:
+            self._save_manifest()
+            print(f"🗂️ Archiv: {len(compacted)} Snapshots verdichtet, {len(dropped)} gelöscht")
+        return {"compacted": len(compacted), "dropped": len(dropped)}
+
+    # =========================
+    # Kennzahlen
+    # =========================
+    def stats(self) -> Dict[str, Any]:
+        full = [self.snapshots[name] for name in self.names(FULL)]
+        history_bytes = sum(os.path.getsize(os.path.join(self.history_dir, f))
+                            for f in os.listdir(self.history_dir)) if os.path.isdir(self.history_dir) else 0
+        return {
+            "snapshots": len(self.snapshots),
+            "full": len(full),
+            "history": len(self.names(HISTORY)),
+            "latest": self.latest(),
+            "raw_bytes": sum(entry["raw_bytes"] for entry in self.snapshots.values()),
+            "stored_bytes": sum(entry["stored_bytes"] for entry in full) + history_bytes,
+            "history_objects": len(self._load_history()["objects"]),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blue Ant Exportarchiv verwalten")
+    parser.add_argument("command", choices=["import", "list", "prune", "latest"])
+    parser.add_argument("files", nargs="*", help="Bei import: blueant_combined_*.json")
+    parser.add_argument("--archive", default=None, help=f"Archivverzeichnis (Default: {DEFAULT_ARCHIVE_DIR})")
+    parser.add_argument("--codec", choices=list(SUFFIXES), default=None)
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help=f"Vollständig aufbewahrte Snapshots (mind. {MIN_KEEP})")
+    parser.add_argument("--keep-history", type=int, default=DEFAULT_KEEP_HISTORY,
+                        help="Snapshots im History-Store")
+    args = parser.parse_args()
+
+    archive = ExportArchive(args.archive, codec=args.codec, keep=args.keep, keep_history=args.keep_history)
+    if args.command == "import":
+        files = sorted(f for pattern in args.files for f in glob.glob(pattern))
+        for path in files:
+            archive.import_file(path)
+        print(f"✅ {len(files)} Exporte übernommen")
+    elif args.command == "prune":
+        archive.apply_retention()
+    elif args.command == "latest":
+        print(latest_snapshot(archive.root) or "")
+        raise SystemExit(0)
+
+    stats = archive.stats()
+    print(f"📦 {archive.root}: {stats['snapshots']} Snapshots ({stats['full']} vollständig, "
+          f"{stats['history']} im History-Store, {stats['history_objects']} Datensätze)")
+    print(f"   {stats['raw_bytes'] / 1e6:.1f} MB JSON → {stats['stored_bytes'] / 1e6:.2f} MB auf Platte")
+    for name in archive.names():
+        entry = archive.snapshots[name]
+        print(f"   {name}  {entry['state']:<7}  {entry.get('count', 0)} Projekte"
+              + ("  ← neuester" if name == stats["latest"] else ""))
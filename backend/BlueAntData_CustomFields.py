@@ -0,0 +1,264 @@
+"""
+Typisierte Spalten und Indizes über die Custom Fields eines Exports.
+
+Grundlage sind die aufgelösten Custom Fields (Feldname -> Anzeigewert, siehe
+BlueAntData_Enrichment) plus Typ und Optionsliste je Feld. Beim Aufbau
+werden die Werte einmal spaltenweise abgelegt:
+
+    ListBox, Boolean, String   kategorial: Code je Projekt (int32, -1 = leer)
+                               plus Kategorienliste (ListBox in Optionsreihenfolge)
+    Double, Long, Calculated   float64 (NaN = leer)
+    Date                       datetime64[D] (NaT = leer)
+    Memo, StructuredMemo, ...  nicht indiziert (Volltext über den TextIndex)
+
+Kategoriale Spalten mit wenigen Werten bekommen zusätzlich je Kategorie eine
+Bitmap (gepackte Bits, ein Byte je acht Projekte); eine Auswahl mehrerer Werte
+ist dann ein ODER über wenige Bitmaps. Filter und Gruppierungen arbeiten nur
+auf diesen Arrays, nicht mehr auf den dicts der Projekte.
+
+    python BlueAntData_CustomFields.py blueant_combined_20260118_184540.json
+"""
+import argparse
+import time
+from collections.abc import Mapping
+from typing import Dict, Any, Optional, List, Iterable, Sequence, Tuple
+
+import numpy as np
+
+
+CATEGORY_TYPES = {"ListBox", "Boolean", "String"}
+NUMBER_TYPES = {"Double", "Long", "Calculated"}
+DATE_TYPES = {"Date"}
+
+# Bis zu dieser Kategorienzahl werden Bitmaps angelegt (darüber Vergleich der Codes)
+BITMAP_MAX_CATEGORIES = 64
+
+# Wert für "nicht gesetzt" in Auswahl und Zählungen
+EMPTY = None
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == ""
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value) if not _is_empty(value) else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _date(value: Any) -> np.datetime64:
+    try:
+        return np.datetime64(str(value)[:10], "D") if not _is_empty(value) else np.datetime64("NaT")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+class CustomFieldColumn:
+    """Eine typisierte Custom-Field-Spalte (kind: category, number oder date)"""
+
+    def __init__(self, name: str, field_type: str, raw_values: Sequence[Any],
+                 options: Sequence[str] = ()):
+        self.name = name
+        self.type = field_type
+        self.size = len(raw_values)
+        self.categories: List[Any] = []
+        self.codes: Optional[np.ndarray] = None
+        self.values: Optional[np.ndarray] = None
+        self.bitmaps: Optional[np.ndarray] = None
+
+        if field_type in NUMBER_TYPES:
+            self.kind = "number"
+            self.values = np.fromiter((_number(v) for v in raw_values), dtype=np.float64, count=self.size)
+        elif field_type in DATE_TYPES:
+            self.kind = "date"
+            try:
+                self.values = np.array(["NaT" if _is_empty(v) else str(v)[:10] for v in raw_values],
+                                       dtype="datetime64[D]")
+            except ValueError:  # einzelne ungültige Daten -> NaT
+                self.values = np.array([_date(v) for v in raw_values], dtype="datetime64[D]")
+        else:
+            self.kind = "category"
+            self._encode(raw_values, options)
+
+    def _encode(self, raw_values: Sequence[Any], options: Sequence[str]):
+        positions: Dict[Any, int] = {}
+        for label in options:
+            if not _is_empty(label) and label not in positions:
+                positions[label] = len(positions)
+        codes = np.full(self.size, -1, dtype=np.int32)
+        for pos, value in enumerate(raw_values):
+            if _is_empty(value):
+                continue
+            code = positions.get(value)
+            if code is None:
+                code = positions[value] = len(positions)
+            codes[pos] = code
+
+        self.categories = list(positions)
+        self.codes = codes
+        if len(self.categories) <= BITMAP_MAX_CATEGORIES:
+            self.bitmaps = np.packbits(codes[None, :] == np.arange(len(self.categories))[:, None], axis=1)
+
+    def _codes_for(self, selected: Iterable[Any]) -> Tuple[List[int], bool]:
+        positions = {label: i for i, label in enumerate(self.categories)}
+        selected = list(selected)
+        return ([positions[v] for v in selected if v in positions],
+                any(_is_empty(v) for v in selected))
+
+    def mask(self, selection: Any) -> np.ndarray:
+        """
+        Auswahl je Projekt.
+
+        Kategorial: Iterable der gewünschten Werte (EMPTY/None = nicht gesetzt).
+        Zahl/Datum: (von, bis), offene Grenze mit None; leere Werte fallen heraus.
+        """
+        if self.kind == "category":
+            codes, with_empty = self._codes_for(selection)
+            if self.bitmaps is not None and codes:
+                packed = np.bitwise_or.reduce(self.bitmaps[codes], axis=0)
+                selected = np.unpackbits(packed, count=self.size).astype(bool)
+            else:
+                selected = np.isin(self.codes, codes)
+            if with_empty:
+                selected |= self.codes < 0
+            return selected
+
+        low, high = selection
+        if self.kind == "date":
+            low = None if low is None else np.datetime64(str(low)[:10], "D")
+            high = None if high is None else np.datetime64(str(high)[:10], "D")
+            selected = ~np.isnat(self.values)
+        else:
+            selected = ~np.isnan(self.values)
+        if low is not None:
+            selected &= self.values >= low
+        if high is not None:
+            selected &= self.values <= high
+        return selected
+
+    def counts(self, mask: Optional[np.ndarray] = None) -> Dict[Any, int]:
+        """Projekte je Kategorie (EMPTY = nicht gesetzt), nur vorhandene Werte"""
+        return {label: int(n) for label, n in self._grouped(np.ones(self.size), mask).items() if n}
+
+    def sums(self, weights: np.ndarray, mask: Optional[np.ndarray] = None) -> Dict[Any, float]:
+        """Summe von `weights` (z. B. Plan-Aufwand) je Kategorie"""
+        return {label: float(total) for label, total in self._grouped(weights, mask).items()}
+
+    def _grouped(self, weights: np.ndarray, mask: Optional[np.ndarray]) -> Dict[Any, float]:
+        if self.kind != "category":
+            raise ValueError(f"Gruppieren nur über kategoriale Felder ({self.name}: {self.type})")
+        codes = self.codes if mask is None else self.codes[mask]
+        weights = np.asarray(weights, dtype=float)
+        weights = weights if mask is None else weights[mask]
+        # Code -1 (leer) landet über +1 in Fach 0
+        sums = np.bincount(codes + 1, weights=weights, minlength=len(self.categories) + 1)
+        grouped = {label: sums[i + 1] for i, label in enumerate(self.categories)}
+        grouped[EMPTY] = sums[0]
+        return grouped
+
+    @property
+    def filled(self) -> int:
+        """Projekte mit gesetztem (bei Zahl/Datum: gültigem) Wert"""
+        if self.kind == "category":
+            return int((self.codes >= 0).sum())
+        return int((~np.isnat(self.values)).sum() if self.kind == "date" else (~np.isnan(self.values)).sum())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "type": self.type, "kind": self.kind, "filled": self.filled,
+                "categories": len(self.categories), "bitmap": self.bitmaps is not None}
+
+
+class CustomFieldIndex(Mapping):
+    """Alle indizierbaren Custom Fields eines Exports (Feldname -> CustomFieldColumn)"""
+
+    def __init__(self, columns: Dict[str, CustomFieldColumn], size: int):
+        self.columns = columns
+        self.size = size
+
+    @classmethod
+    def build(cls, custom_fields: Sequence[Dict[str, Any]],
+              fields: Sequence[Dict[str, Any]]) -> "CustomFieldIndex":
+        """
+        Aus den aufgelösten Custom Fields je Projekt und den Felddefinitionen
+        (name, type, options) in einem Durchlauf über die Projekte.
+        """
+        size = len(custom_fields)
+        indexed = {f["name"]: f for f in fields
+                   if f.get("type") in CATEGORY_TYPES | NUMBER_TYPES | DATE_TYPES}
+        raw: Dict[str, List[Any]] = {name: [None] * size for name in indexed}
+        for pos, values in enumerate(custom_fields):
+            for name, value in values.items():
+                column = raw.get(name)
+                if column is not None:
+                    column[pos] = value
+
+        columns = {}
+        for name, values in raw.items():
+            if all(_is_empty(v) for v in values):
+                continue
+            column = CustomFieldColumn(name, indexed[name]["type"], values, indexed[name].get("options") or ())
+            # Nur unlesbare Zahlen/Daten (alles NaN/NaT): nicht filterbar, Spalte weglassen
+            if column.filled:
+                columns[name] = column
+        return cls(columns, size)
+
+    def __getitem__(self, name: str) -> CustomFieldColumn:
+        return self.columns[name]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def names(self, kind: Optional[str] = None) -> List[str]:
+        return [name for name, column in self.columns.items() if kind is None or column.kind == kind]
+
+    def mask(self, filters: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """UND über mehrere Felder (Auswahl je Feld wie CustomFieldColumn.mask)"""
+        selected = np.ones(self.size, dtype=bool)
+        for name, selection in (filters or {}).items():
+            if name not in self.columns:
+                raise KeyError(f"Custom Field nicht indiziert: {name}")
+            selected &= self.columns[name].mask(selection)
+        return selected
+
+    def counts(self, name: str, mask: Optional[np.ndarray] = None) -> Dict[Any, int]:
+        return self.columns[name].counts(mask)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [column.stats() for column in self.columns.values()]
+
+
+if __name__ == "__main__":
+    try:
+        from .BlueAntData_Enrichment import MasterdataLookup, resolve
+        from .BlueAntData_JSON import load_combined_file
+    except ImportError:
+        from BlueAntData_Enrichment import MasterdataLookup, resolve
+        from BlueAntData_JSON import load_combined_file
+
+    parser = argparse.ArgumentParser(description="Custom-Field-Index einer Blue Ant Exportdatei")
+    parser.add_argument("path", help="Kombinierte Exportdatei (.json)")
+    parser.add_argument("--field", default=None, help="Verteilung eines Feldes ausgeben")
+    args = parser.parse_args()
+
+    lookup = MasterdataLookup.for_data_file(args.path)
+    if lookup is None:
+        print("❌ Keine Masterdata zur Exportdatei gefunden")
+        raise SystemExit(1)
+    view = resolve(load_combined_file(args.path, typed=False), lookup)
+
+    start = time.perf_counter()
+    index = CustomFieldIndex.build(view.custom_fields, view.fields)
+    print(f"🔎 {len(index)} Custom Fields über {index.size} Projekte in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms indiziert")
+    for stats in index.stats():
+        print(f"   {stats['name']} ({stats['type']}, {stats['kind']}): {stats['filled']} gesetzt"
+              + (f", {stats['categories']} Werte" if stats["kind"] == "category" else "")
+              + (", Bitmap" if stats["bitmap"] else ""))
+    if args.field:
+        for label, count in sorted(index.counts(args.field).items(), key=lambda item: -item[1]):
+            print(f"   {label if label is not EMPTY else '(leer)'}: {count}")
@@ -0,0 +1,366 @@
+"""
+Auflösung der Masterdata (Status, Custom Fields) für die Exportdaten.
+
+Die Projekte tragen nur IDs: `statusId` verweist auf einen Eintrag in
+project_statuses (mit `text`, `phase`, `sortIdx`, `color`, ...), Custom
+Fields sind ein dict Feld-ID -> Wert, ListBox-Werte sind Options-Keys.
+`MasterdataLookup` baut daraus einmal ID-indizierte Tabellen (Status als
+sortiertes ID-Array, Felder mit Options-Maps); `resolve` löst alle Projekte
+eines Exports in einem Durchlauf auf (Status per Binärsuche über das ganze
+ID-Array). Das Ergebnis (`ResolvedView`) schreiben die Exporter (bzw. dieses
+Skript) neben die Exportdatei als .resolved; beim Laden wird es
+wiederverwendet, solange Export und Masterdata unverändert sind. Der
+Lesepfad (Dashboard, Reports) schreibt selbst keine Dateien.
+
+    python BlueAntData_Enrichment.py blueant_combined_20260118_184540.json
+"""
+import argparse
+import hashlib
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Iterable, Sequence
+
+import numpy as np
+
+try:
+    from .BlueAntData_CustomFields import CustomFieldIndex
+    from .BlueAntData_JSON import COMPRESSED_SUFFIXES, data_stem, dumps, load_combined_file, load_file
+except ImportError:
+    from BlueAntData_CustomFields import CustomFieldIndex
+    from BlueAntData_JSON import COMPRESSED_SUFFIXES, data_stem, dumps, load_combined_file, load_file
+
+
+UNKNOWN_STATUS = "Unbekannt"
+STATUS_FIELDS = ("id", "name", "text", "phase", "sortIdx", "color", "active", "submitStatusReport")
+
+# Schlüssel der ListBox-Option für "kein Wert"
+NULL_OPTION = "null"
+
+
+def status_name(status: Dict[str, Any]) -> str:
+    """Anzeigename eines Status (Blue Ant liefert nur `text`, ältere Daten `name`)"""
+    return status.get("name") or status.get("text") or UNKNOWN_STATUS
+
+
+def project_status_id(project: Dict[str, Any]) -> Any:
+    """Status-ID eines Projekts (die API liefert `statusId`, ältere Exporte `statusID`)"""
+    return project.get("statusId", project.get("statusID"))
+
+
+def status_rows(statuses: Iterable[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """Status-ID -> normalisierter Status (STATUS_FIELDS, `name` aus `text`), ungültige IDs ausgelassen"""
+    rows = {}
+    for status in statuses:
+        try:
+            status_id = int(status["id"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        row = {key: status.get(key) for key in STATUS_FIELDS}
+        row["id"] = status_id
+        row["name"] = status_name(status)
+        rows[status_id] = row
+    return rows
+
+
+def entry_id(entry: Dict[str, Any]) -> Any:
+    project = (entry.get("project_data") or {}).get("project") or {}
+    return entry.get("project_id", project.get("id"))
+
+
+def masterdata_path_for(json_path: str) -> str:
+    """
+    blueant_combined_X.json (oder .records, .json.gz) -> blueant_masterdata_X.json
+    im gleichen Verzeichnis; im Exportarchiv die komprimierte Variante
+    """
+    directory, name = os.path.split(data_stem(json_path))
+    base = os.path.join(directory, name.replace("blueant_combined_", "blueant_masterdata_", 1) + ".json")
+    for suffix in COMPRESSED_SUFFIXES:
+        if not os.path.exists(base) and os.path.exists(base + suffix):
+            return base + suffix
+    return base
+
+
+def resolved_path_for(json_path: str) -> str:
+    """blueant_combined_X.json (auch .json.gz) -> blueant_combined_X.resolved (JSON, vom Export-Glob nicht erfasst)"""
+    return data_stem(json_path) + ".resolved"
+
+
+# =========================
+# Lookup-Tabellen
+# =========================
+@dataclass(frozen=True)
+class CustomField:
+    """Definition eines Custom Fields (Options nur bei ListBox)"""
+    id: str
+    name: str
+    type: str
+    options: Dict[str, str]
+
+    def decode(self, value: Any) -> Any:
+        """Anzeigewert: ListBox-Key -> Optionstext, sonst unverändert"""
+        if not self.options:
+            return value
+        key = NULL_OPTION if value is None or value == "None" else str(value)
+        return self.options.get(key, value)
+
+
+class MasterdataLookup:
+    """ID-indizierte Status- und Custom-Field-Tabellen einer Masterdata-Datei"""
+
+    def __init__(self, statuses: Iterable[Dict[str, Any]] = (),
+                 fields: Iterable[Dict[str, Any]] = ()):
+        rows = status_rows(statuses)
+        self.status_ids = np.array(sorted(rows), dtype=np.int64)
+        self.statuses = tuple(rows[status_id] for status_id in self.status_ids.tolist())
+
+        self.fields: Dict[str, CustomField] = {}
+        names = Counter(f.get("name") for f in fields if f.get("id") is not None)
+        for f in fields:
+            if f.get("id") is None:
+                continue
+            name = f.get("name") or str(f["id"])
+            if names[f.get("name")] > 1:
+                name = f"{name} ({f['id']})"
+            options = {str(o.get("key")): o.get("value") or "" for o in f.get("options") or []}
+            self.fields[str(f["id"])] = CustomField(str(f["id"]), name, f.get("type") or "", options)
+
+        digest = hashlib.sha1(dumps([self.statuses, [vars(f) for f in self.fields.values()]]))
+        self.version = digest.hexdigest()[:16]
+
+    @classmethod
+    def from_masterdata(cls, masterdata: Dict[str, Any], context_type: str = "Project") -> "MasterdataLookup":
+        statuses = (masterdata.get("project_statuses") or {}).get("projectStatus") or []
+        definitions = (masterdata.get("customfield_definitions") or {}).get(context_type) or {}
+        return cls(statuses, definitions.get("customFields") or [])
+
+    @classmethod
+    def from_file(cls, path: str) -> "MasterdataLookup":
+        return cls.from_masterdata(load_file(path))
+
+    @classmethod
+    def for_data_file(cls, json_path: str) -> Optional["MasterdataLookup"]:
+        """Lookup aus der Masterdata-Datei desselben Exports, falls vorhanden"""
+        path = masterdata_path_for(json_path)
+        if os.path.abspath(path) == os.path.abspath(json_path) or not os.path.exists(path):
+            return None
+        return cls.from_file(path)
+
+    def status_positions(self, status_ids: Sequence[Any]) -> np.ndarray:
+        """Position je Status-ID in `statuses` (-1 = unbekannt), für alle IDs auf einmal"""
+        ids = np.fromiter((-1 if s is None else int(s) for s in status_ids), dtype=np.int64,
+                          count=len(status_ids))
+        if not len(self.status_ids):
+            return np.full(len(ids), -1, dtype=np.int64)
+        positions = np.searchsorted(self.status_ids, ids)
+        positions[positions == len(self.status_ids)] = 0
+        return np.where(self.status_ids[positions] == ids, positions, -1)
+
+    def status(self, status_id: Any) -> Optional[Dict[str, Any]]:
+        if status_id is None:
+            return None
+        pos = int(self.status_positions([status_id])[0])
+        return self.statuses[pos] if pos >= 0 else None
+
+    def field_table(self) -> List[Dict[str, Any]]:
+        """Felddefinitionen für den Custom-Field-Index (Name, Typ, Optionstexte in Reihenfolge)"""
+        return [{"name": f.name, "type": f.type, "options": list(f.options.values())}
+                for f in self.fields.values()]
+
+    def decode_custom_fields(self, values: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Custom Fields eines Projekts als Feldname -> Anzeigewert"""
+        decoded = {}
+        for field_id, value in (values or {}).items():
+            definition = self.fields.get(str(field_id))
+            if definition is None:
+                decoded[str(field_id)] = value
+            else:
+                decoded[definition.name] = definition.decode(value)
+        return decoded
+
+
+# =========================
+# Aufgelöste Sicht
+# =========================
+class ResolvedView:
+    """
+    Aufgelöste Masterdata je Projekt, in Exportreihenfolge.
+
+    Status-Attribute liegen einmal je Status vor; je Projekt wird nur die
+    Position in dieser Tabelle gehalten (-1 = unbekannt). Custom Fields
+    werden beim ersten Zugriff auf `custom_index` typisiert und indiziert.
+    """
+
+    def __init__(self, project_ids: Sequence[Any], status_ids: Sequence[Any],
+                 status_pos: Sequence[int], statuses: Sequence[Dict[str, Any]],
+                 custom_fields: Sequence[Dict[str, Any]], fields: Sequence[Dict[str, Any]] = (),
+                 version: str = ""):
+        self.project_ids = list(project_ids)
+        self.status_ids = list(status_ids)
+        self.status_pos = np.asarray(status_pos, dtype=np.int64)
+        self.statuses = tuple(statuses)
+        self.custom_fields = list(custom_fields)
+        self.fields = list(fields)
+        self.version = version
+        self._columns: Dict[str, np.ndarray] = {}
+        self._custom_index: Optional[CustomFieldIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.project_ids)
+
+    def status_info(self, pos: int) -> Dict[str, Any]:
+        status_pos = int(self.status_pos[pos])
+        return self.statuses[status_pos] if status_pos >= 0 else {}
+
+    def status_infos(self) -> List[Dict[str, Any]]:
+        return [self.statuses[p] if p >= 0 else {} for p in self.status_pos.tolist()]
+
+    def status_table(self) -> Dict[str, Dict[str, Any]]:
+        """Status nach Anzeigename (z. B. für Farben und Sortierung im Dashboard)"""
+        return {status["name"]: status for status in self.statuses}
+
+    def column(self, attribute: str) -> np.ndarray:
+        """Ein Status-Attribut (name, phase, sortIdx, color, ...) je Projekt"""
+        if attribute not in self._columns:
+            values = np.array([status.get(attribute) for status in self.statuses] + [None], dtype=object)
+            # Position -1 greift auf den angehängten Platzhalter (unbekannter Status)
+            self._columns[attribute] = values[self.status_pos]
+        return self._columns[attribute]
+
+    @property
+    def custom_index(self) -> CustomFieldIndex:
+        """Typisierte Spalten mit Kategorie-/Bitmap-Index über alle Custom Fields"""
+        if self._custom_index is None:
+            self._custom_index = CustomFieldIndex.build(self.custom_fields, self.fields)
+        return self._custom_index
+
+    def mask(self, status: Optional[Iterable[str]] = None, phase: Optional[Iterable[Any]] = None,
+             custom: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Auswahl je Projekt nach Statusname, Phase und Custom Fields (siehe CustomFieldIndex.mask)"""
+        selected = np.ones(len(self), dtype=bool)
+        if status is not None:
+            wanted = set(status)
+            positions = [i for i, s in enumerate(self.statuses) if s["name"] in wanted]
+            if UNKNOWN_STATUS in wanted:
+                positions.append(-1)
+            selected &= np.isin(self.status_pos, positions)
+        if phase is not None:
+            wanted = {str(p) for p in phase}
+            positions = [i for i, s in enumerate(self.statuses) if str(s.get("phase")) in wanted]
+            selected &= np.isin(self.status_pos, positions)
+        if custom:
+            selected &= self.custom_index.mask(custom)
+        return selected
+
+    # =========================
+    # Speichern / Laden
+    # =========================
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "statuses": list(self.statuses),
+            "project_ids": self.project_ids,
+            "status_ids": self.status_ids,
+            "status_pos": self.status_pos.tolist(),
+            "custom_fields": self.custom_fields,
+            "fields": self.fields,
+        }
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "ResolvedView":
+        return cls(raw["project_ids"], raw["status_ids"], raw["status_pos"], raw["statuses"],
+                   raw["custom_fields"], raw["fields"], raw.get("version", ""))
+
+    def save(self, path: str) -> str:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(dumps(self.to_dict()))
+        os.replace(tmp_path, path)
+        print(f"🗂️ Aufgelöste Masterdata gespeichert: {path} ({len(self)} Projekte)")
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "ResolvedView":
+        return cls.from_dict(load_file(path))
+
+
+def resolve(combined: List[Dict[str, Any]], lookup: MasterdataLookup) -> ResolvedView:
+    """Löst Status und Custom Fields aller Projekte auf"""
+    project_ids, status_ids = [], []
+    for entry in combined:
+        project = (entry.get("project_data") or {}).get("project") or {}
+        project_ids.append(entry.get("project_id", project.get("id")))
+        status_ids.append(project_status_id(project))
+
+    return ResolvedView(
+        project_ids, status_ids, lookup.status_positions(status_ids), lookup.statuses,
+        [lookup.decode_custom_fields(((entry.get("project_data") or {}).get("project") or {}).get("customFields"))
+         for entry in combined],
+        lookup.field_table(),
+        lookup.version,
+    )
+
+
+def write_resolved(combined: List[Dict[str, Any]], masterdata: Dict[str, Any], path: str) -> str:
+    """Für die Exporter: aufgelöste Sicht direkt aus den frisch exportierten Daten"""
+    return resolve(combined, MasterdataLookup.from_masterdata(masterdata)).save(path)
+
+
+def load_resolved(json_path: str, combined: List[Dict[str, Any]],
+                  lookup: Optional[MasterdataLookup] = None, save: bool = False) -> Optional[ResolvedView]:
+    """
+    Aufgelöste Sicht einer Exportdatei.
+
+    Nutzt die gespeicherte .resolved-Datei, wenn sie nicht älter als der Export
+    ist und zu Masterdata und Projekten passt; sonst wird im Speicher neu
+    aufgelöst (nur mit `save` auch gespeichert, Standard ist rein lesend).
+    None, wenn keine Masterdata-Datei vorliegt.
+    """
+    if lookup is None:
+        try:
+            lookup = MasterdataLookup.for_data_file(json_path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Masterdata nicht lesbar ({e}), Status bleiben unaufgelöst")
+            return None
+        if lookup is None:
+            return None
+
+    path = resolved_path_for(json_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(json_path):
+        try:
+            view = ResolvedView.load(path)
+            if (view.version == lookup.version and len(view) == len(combined)
+                    and view.project_ids == [entry_id(entry) for entry in combined]):
+                return view
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Aufgelöste Masterdata nicht lesbar ({e}), löse neu auf")
+
+    view = resolve(combined, lookup)
+    if save:
+        try:
+            view.save(path)
+        except OSError as e:
+            print(f"⚠️ Aufgelöste Masterdata nicht gespeichert: {e}")
+    return view
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Masterdata einer Blue Ant Exportdatei auflösen")
+    parser.add_argument("path", help="Kombinierte Exportdatei (.json)")
+    parser.add_argument("--masterdata", default=None, help="Masterdata-Datei (Default: zum Export passend)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    lookup = (MasterdataLookup.from_file(args.masterdata) if args.masterdata
+              else MasterdataLookup.for_data_file(args.path))
+    if lookup is None:
+        print(f"❌ Keine Masterdata gefunden: {masterdata_path_for(args.path)}")
+        raise SystemExit(1)
+
+    view = resolve(load_combined_file(args.path, typed=False), lookup)
+    view.save(resolved_path_for(args.path))
+    print(f"🔎 {len(view)} Projekte, {len(lookup.statuses)} Status, {len(lookup.fields)} Custom Fields "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+    for name, count in Counter(view.column("name").tolist()).most_common():
+        print(f"   {name or UNKNOWN_STATUS}: {count}")
@@ -0,0 +1,235 @@
+"""
+Schnelle JSON-Schicht für Exporter und Dashboard.
+
+Nutzt msgspec oder orjson, falls installiert, sonst die Standardbibliothek.
+Für das Dashboard gibt es typisierte Schemas (TypedDicts): msgspec dekodiert
+damit nur die Felder, die wirklich gelesen werden, und überspringt den Rest
+(z. B. die pro Projekt mitgeschriebenen Custom-Field-Definitionen). Das
+Ergebnis sind normale dicts, der restliche Code bleibt unverändert.
+
+Komprimierte Dateien (.json.gz, .json.zst aus dem Exportarchiv) werden
+anhand der Endung transparent entpackt.
+"""
+import gzip
+import json
+import os
+from typing import Any, Dict, List, Optional, TypedDict
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+if msgspec is not None:
+    BACKEND = "msgspec"
+elif orjson is not None:
+    BACKEND = "orjson"
+else:
+    BACKEND = "json"
+
+
+# =========================
+# Schemas (nur genutzte Felder)
+# =========================
+class KPI(TypedDict, total=False):
+    id: Optional[str]
+    period: Optional[str]
+    value: Any
+
+
+class KPIResponse(TypedDict, total=False):
+    kpis: Optional[List[KPI]]
+
+
+class PlanningEntry(TypedDict, total=False):
+    description: Optional[str]
+    type: Any
+    start: Optional[str]
+    end: Optional[str]
+    plannedWork: Optional[float]
+    actualWork: Optional[float]
+
+
+class PlanningEntriesResponse(TypedDict, total=False):
+    planningEntries: Optional[List[PlanningEntry]]
+
+
+class Project(TypedDict, total=False):
+    id: Any
+    name: Optional[str]
+    number: Optional[str]
+    statusId: Any
+    statusID: Any
+    departmentId: Any
+    start: Optional[str]
+    end: Optional[str]
+    lastChanged: Optional[str]
+    statusMemo: Optional[str]
+    subjectMemo: Optional[str]
+    customFields: Any
+
+
+class ProjectResponse(TypedDict, total=False):
+    project: Optional[Project]
+
+
+class ProjectStatus(TypedDict, total=False):
+    id: Any
+    name: Optional[str]
+    text: Optional[str]
+    phase: Any
+    sortIdx: Any
+    color: Optional[str]
+    active: Optional[bool]
+    submitStatusReport: Optional[bool]
+
+
+class CombinedEntry(TypedDict, total=False):
+    project_id: Any
+    project_data: Optional[ProjectResponse]
+    kpis: Optional[KPIResponse]
+    planningentries: Optional[PlanningEntriesResponse]
+    status_info: Optional[ProjectStatus]
+
+
+_decoders: Dict[Any, Any] = {}
+
+
+def _decoder(schema):
+    if schema not in _decoders:
+        _decoders[schema] = msgspec.json.Decoder(schema)
+    return _decoders[schema]
+
+
+# =========================
+# Dekodieren / Enkodieren
+# =========================
+def loads(data, schema=None) -> Any:
+    """
+    Dekodiert JSON (bytes oder str).
+
+    Mit `schema` (z. B. List[CombinedEntry]) und msgspec werden nur die
+    Felder des Schemas gelesen; ohne msgspec wird das Schema ignoriert.
+    """
+    if msgspec is not None:
+        if schema is not None:
+            return _decoder(schema).decode(data)
+        return msgspec.json.decode(data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Enkodiert nach UTF-8-JSON (ohne ASCII-Escaping, wie bisher).
+
+    Mit orjson ist der Inhalt gleichwertig, aber nicht byteweise identisch zu
+    `json.dumps`: Floats werden teils anders geschrieben (z. B. 1e16 statt 1e+16).
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def dump(obj: Any, f, indent: bool = False):
+    """
+    Schreibt JSON in eine Binärdatei.
+
+    Listen und dicts auf oberster Ebene werden Element für Element
+    geschrieben, damit nie die gesamte Datei als ein Puffer im Speicher liegt.
+    """
+    sep = b",\n" if indent else b","
+    pad = b"\n  " if indent else b""
+
+    if isinstance(obj, list):
+        f.write(b"[" + pad if obj else b"[")
+        for i, item in enumerate(obj):
+            if i:
+                f.write(sep + (b"  " if indent else b""))
+            f.write(dumps(item, indent).replace(b"\n", pad) if indent else dumps(item))
+        f.write(b"\n]" if indent and obj else b"]")
+    elif isinstance(obj, dict):
+        f.write(b"{" + pad if obj else b"{")
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                f.write(sep + (b"  " if indent else b""))
+            encoded = dumps(value, indent).replace(b"\n", pad) if indent else dumps(value)
+            f.write(dumps(key if isinstance(key, str) else str(key)) + b": " + encoded)
+        f.write(b"\n}" if indent and obj else b"}")
+    else:
+        f.write(dumps(obj, indent))
+
+
+# =========================
+# Kompression
+# =========================
+# Dateiendung -> Codec
+COMPRESSED_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def data_stem(path: str) -> str:
+    """Pfad ohne Daten- und Kompressionsendung (X.json.gz -> X, X.json -> X)"""
+    root, ext = os.path.splitext(path)
+    if ext in COMPRESSED_SUFFIXES:
+        root = os.path.splitext(root)[0]
+    return root
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, 6, mtime=0)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard ist nicht installiert (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"Unbekannter Codec: {codec} (erlaubt: {', '.join(COMPRESSED_SUFFIXES.values())})")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard ist nicht installiert (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unbekannter Codec: {codec}")
+
+
+def read_bytes(path: str) -> bytes:
+    """Dateiinhalt, bei .gz/.zst entpackt"""
+    with open(path, "rb") as f:
+        data = f.read()
+    codec = COMPRESSED_SUFFIXES.get(os.path.splitext(path)[1])
+    return decompress(data, codec) if codec else data
+
+
+def load_file(path: str, schema=None) -> Any:
+    return loads(read_bytes(path), schema)
+
+
+def load_combined_file(path: str, typed: bool = True) -> List[Dict[str, Any]]:
+    """Lädt eine kombinierte Exportdatei, typisiert nur mit den Dashboard-Feldern"""
+    data = read_bytes(path)
+
+    if typed and msgspec is not None:
+        try:
+            return loads(data, List[CombinedEntry])
+        except msgspec.ValidationError:
+            # Unerwartete Feldtypen -> generisch dekodieren statt abzubrechen
+            pass
+    return loads(data)
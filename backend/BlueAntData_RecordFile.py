@@ -0,0 +1,252 @@
+"""
+Binäres Containerformat der kombinierten Exportdaten mit Direktzugriff.
+
+Für ein einzelnes Projekt muss blueant_combined_*.json komplett geparst
+werden. Der Exporter schreibt deshalb zusätzlich eine gleichnamige
+.records-Datei: jeder Datensatz einzeln (optional komprimiert) mit
+Längenpräfix, am Ende ein nach Projekt-ID sortierter Index. Gelesen wird
+über mmap; ein Projekt kostet eine Binärsuche im Index plus das Dekodieren
+genau dieses Datensatzes, die Iteration über alle Projekte ist lazy.
+
+    Header   MAGIC (8 Bytes) | Codec (1 Byte) | reserviert (7 Bytes)
+    Records  [Länge uint32][Datensatz] ...  (Reihenfolge wie im Export)
+    Index    je Projekt: id int64 | offset uint64 | length uint32
+    Trailer  Index-Offset uint64 | Anzahl uint64 | MAGIC
+
+    python BlueAntData_RecordFile.py blueant_combined_20260118_184540.json
+    python BlueAntData_RecordFile.py blueant_combined_20260118_184540.records --project 500000001
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Any, Optional, List, Iterator
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from .BlueAntData_JSON import data_stem, dumps, load_combined_file, loads
+except ImportError:
+    from BlueAntData_JSON import data_stem, dumps, load_combined_file, loads
+
+
+MAGIC = b"BAREC\x00\x01\x00"
+CODECS = {"none": 0, "zlib": 1, "zstd": 2}
+DEFAULT_CODEC = "zlib"
+
+_HEADER = struct.Struct("<8sB7x")
+_LENGTH = struct.Struct("<I")
+_TRAILER = struct.Struct("<QQ8s")
+INDEX_DTYPE = np.dtype([("id", "<i8"), ("offset", "<u8"), ("length", "<u4")])
+
+
+def records_path_for(json_path: str) -> str:
+    """blueant_combined_X.json (auch .json.gz/.json.zst) -> blueant_combined_X.records"""
+    return data_stem(json_path) + ".records"
+
+
+def _entry_id(entry: Dict[str, Any]) -> Optional[int]:
+    project = (entry.get("project_data") or {}).get("project") or {}
+    project_id = entry.get("project_id", project.get("id"))
+    return int(project_id) if project_id is not None else None
+
+
+def _compressor(codec: str):
+    if codec == "none":
+        return lambda data: data
+    if codec == "zlib":
+        return lambda data: zlib.compress(data, 6)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard ist nicht installiert (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=3).compress
+    raise ValueError(f"Unbekannter Codec: {codec} (erlaubt: {', '.join(CODECS)})")
+
+
+def _decompressor(codec_id: int):
+    if codec_id == CODECS["none"]:
+        return lambda data: data
+    if codec_id == CODECS["zlib"]:
+        return zlib.decompress
+    if codec_id == CODECS["zstd"]:
+        if zstandard is None:
+            raise ImportError("zstandard ist nicht installiert (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress
+    raise ValueError(f"Unbekannter Codec in Record-Datei: {codec_id}")
+
+
+# =========================
+# Schreiben
+# =========================
+def write_records(combined: List[Dict[str, Any]], path: str, codec: str = DEFAULT_CODEC) -> str:
+    """Schreibt die Record-Datei neu (erst in eine temporäre Datei, dann atomar ersetzen)"""
+    compress = _compressor(codec)
+    tmp_path = f"{path}.tmp"
+    index = []
+
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, CODECS[codec]))
+        for entry in combined:
+            payload = compress(dumps(entry))
+            offset = f.tell() + _LENGTH.size
+            f.write(_LENGTH.pack(len(payload)))
+            f.write(payload)
+            project_id = _entry_id(entry)
+            if project_id is not None:
+                index.append((project_id, offset, len(payload)))
+
+        entries = np.array(index, dtype=INDEX_DTYPE)
+        entries.sort(order="id", kind="stable")
+        if len(entries) > 1 and (entries["id"][1:] == entries["id"][:-1]).any():
+            raise ValueError(f"Doppelte Projekt-IDs in {path}")
+
+        index_offset = f.tell()
+        f.write(entries.tobytes())
+        f.write(_TRAILER.pack(index_offset, len(entries), MAGIC))
+
+    os.replace(tmp_path, path)
+    print(f"📦 Record-Datei gespeichert: {path} ({len(index)} Projekte, {codec})")
+    return path
+
+
+# =========================
+# Lesen
+# =========================
+class RecordFile:
+    """
+    Schreibgeschützter Direktzugriff auf eine .records-Datei über mmap.
+
+    Der Index wird nicht kopiert, sondern direkt aus der gemappten Datei
+    gelesen; `get` dekodiert nur den angefragten Datensatz.
+    """
+
+    def __init__(self, path: str, schema=None):
+        self.path = path
+        self.schema = schema
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # leere Datei
+            self._file.close()
+            raise ValueError(f"Keine gültige Record-Datei: {path}")
+
+        size = len(self._mm)
+        if size < _HEADER.size + _TRAILER.size:
+            self.close()
+            raise ValueError(f"Keine gültige Record-Datei: {path}")
+        magic, codec_id = _HEADER.unpack_from(self._mm, 0)
+        self._index_offset, count, trailer_magic = _TRAILER.unpack_from(self._mm, size - _TRAILER.size)
+        if magic != MAGIC or trailer_magic != MAGIC:
+            self.close()
+            raise ValueError(f"Keine gültige Record-Datei (unvollständig geschrieben?): {path}")
+
+        self._decompress = _decompressor(codec_id)
+        self._index = np.frombuffer(self._mm, dtype=INDEX_DTYPE, count=count, offset=self._index_offset)
+
+    def __enter__(self) -> "RecordFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # Der Index verweist in die gemappte Datei und muss vorher freigegeben werden
+        self._index = None
+        if getattr(self, "_mm", None) is not None and not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, project_id) -> bool:
+        return self._find(project_id) is not None
+
+    def _find(self, project_id) -> Optional[int]:
+        try:
+            key = int(project_id)
+        except (TypeError, ValueError):
+            return None
+        ids = self._index["id"]
+        pos = int(np.searchsorted(ids, key))
+        return pos if pos < len(ids) and ids[pos] == key else None
+
+    def _decode(self, offset: int, length: int) -> Dict[str, Any]:
+        data = self._decompress(self._mm[offset:offset + length])
+        if self.schema is not None:
+            try:
+                return loads(data, self.schema)
+            except ValueError:
+                # Unerwartete Feldtypen -> generisch dekodieren (wie load_combined_file)
+                pass
+        return loads(data)
+
+    def ids(self) -> List[int]:
+        """Alle Projekt-IDs (aufsteigend)"""
+        return self._index["id"].tolist()
+
+    def get(self, project_id) -> Optional[Dict[str, Any]]:
+        """Ein kombinierter Datensatz oder None"""
+        pos = self._find(project_id)
+        if pos is None:
+            return None
+        entry = self._index[pos]
+        return self._decode(int(entry["offset"]), int(entry["length"]))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Alle Datensätze in Exportreihenfolge, einzeln dekodiert"""
+        pos = _HEADER.size
+        while pos < self._index_offset:
+            (length,) = _LENGTH.unpack_from(self._mm, pos)
+            pos += _LENGTH.size
+            yield self._decode(pos, length)
+            pos += length
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+
+def open_records(json_path: str, schema=None) -> Optional[RecordFile]:
+    """Record-Datei neben einer Exportdatei, falls vorhanden und nicht älter als diese"""
+    path = records_path_for(json_path)
+    if not os.path.exists(path):
+        return None
+    if os.path.exists(json_path) and os.path.getmtime(path) < os.path.getmtime(json_path):
+        return None
+    try:
+        return RecordFile(path, schema)
+    except ValueError as e:
+        print(f"⚠️ {e}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blue Ant Record-Datei erzeugen oder lesen")
+    parser.add_argument("path", help="Kombinierte Exportdatei (.json) oder Record-Datei (.records)")
+    parser.add_argument("--codec", choices=list(CODECS), default=DEFAULT_CODEC)
+    parser.add_argument("--project", type=int, default=None, help="Ein Projekt ausgeben")
+    args = parser.parse_args()
+
+    path = args.path
+    if not path.endswith(".records"):
+        path = write_records(load_combined_file(path, typed=False), records_path_for(path), args.codec)
+
+    start = time.perf_counter()
+    with RecordFile(path) as records:
+        opened = time.perf_counter()
+        print(f"📂 {path}: {len(records)} Projekte, geöffnet in {(opened - start) * 1000:.2f} ms")
+        if args.project is not None:
+            entry = records.get(args.project)
+            elapsed = (time.perf_counter() - opened) * 1e6
+            if entry is None:
+                print(f"❌ Projekt {args.project} nicht gefunden")
+            else:
+                print(f"🔎 Projekt {args.project} in {elapsed:.0f} µs gelesen")
+                print(dumps(entry, indent=True).decode("utf-8"))
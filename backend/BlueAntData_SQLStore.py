@@ -0,0 +1,215 @@
+"""
+SQLite-Ablage der kombinierten Exportdaten.
+
+Der Exporter schreibt neben blueant_combined_*.json eine gleichnamige
+.sqlite-Datei mit Projekten, KPIs, Planning Entries, Status und dem
+Volltextindex (BlueAntData_TextIndex). Analysten können sie direkt mit SQL
+abfragen (sqlite3, DBeaver, pandas.read_sql), das Dashboard lädt sie für
+Drill-downs und die Volltextsuche. SQLite ist Teil der Standardbibliothek,
+es wird keine zusätzliche Abhängigkeit benötigt.
+
+    sqlite3 blueant_combined_20260118_184540.sqlite \\
+        "SELECT status_name, COUNT(*) FROM projects GROUP BY status_name"
+"""
+import os
+import sqlite3
+from typing import Dict, Any, Optional, List, Iterable
+
+try:
+    from .BlueAntData_Enrichment import project_status_id, status_name
+    from .BlueAntData_JSON import data_stem
+    from .BlueAntData_TextIndex import create_text_index, index_combined
+except ImportError:
+    from BlueAntData_Enrichment import project_status_id, status_name
+    from BlueAntData_JSON import data_stem
+    from BlueAntData_TextIndex import create_text_index, index_combined
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statuses (
+    status_id     INTEGER PRIMARY KEY,
+    name          TEXT,
+    text          TEXT,
+    phase         TEXT,
+    color         TEXT,
+    active        INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    project_id    INTEGER PRIMARY KEY,
+    pos           INTEGER NOT NULL,
+    number        TEXT,
+    name          TEXT,
+    status_id     INTEGER,
+    status_name   TEXT,
+    department_id INTEGER,
+    type_id       INTEGER,
+    priority_id   INTEGER,
+    start_date    TEXT,
+    end_date      TEXT,
+    last_changed  TEXT,
+    status_memo   TEXT,
+    subject_memo  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status_id);
+CREATE INDEX IF NOT EXISTS idx_projects_status_name ON projects (status_name);
+CREATE INDEX IF NOT EXISTS idx_projects_department ON projects (department_id);
+CREATE INDEX IF NOT EXISTS idx_projects_end ON projects (end_date);
+
+CREATE TABLE IF NOT EXISTS kpis (
+    project_id    INTEGER NOT NULL,
+    kpi_id        TEXT NOT NULL,
+    period        TEXT NOT NULL,
+    value         REAL,
+    PRIMARY KEY (project_id, kpi_id, period)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_kpis_kpi_period ON kpis (kpi_id, period);
+
+CREATE TABLE IF NOT EXISTS planning_entries (
+    project_id    INTEGER NOT NULL,
+    seq           INTEGER NOT NULL,
+    description   TEXT,
+    type          TEXT,
+    is_milestone  INTEGER NOT NULL,
+    start_date    TEXT,
+    end_date      TEXT,
+    planned_work  REAL,
+    actual_work   REAL,
+    PRIMARY KEY (project_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_planning_entries_milestone ON planning_entries (is_milestone, end_date);
+
+CREATE VIEW IF NOT EXISTS project_work AS
+SELECT p.project_id,
+       COALESCE(plan.value, 0)   AS work_plan,
+       COALESCE(actual.value, 0) AS work_actual
+FROM projects p
+LEFT JOIN kpis plan
+       ON plan.project_id = p.project_id AND plan.kpi_id = 'WorkTotalPlan' AND plan.period = 'TOTAL'
+LEFT JOIN kpis actual
+       ON actual.project_id = p.project_id AND actual.kpi_id = 'WorkTotalActual' AND actual.period = 'TOTAL';
+"""
+
+
+def store_path_for(json_path: str) -> str:
+    """blueant_combined_X.json (auch .json.gz/.json.zst) -> blueant_combined_X.sqlite"""
+    return data_stem(json_path) + ".sqlite"
+
+
+def connect(path: str, read_only: bool = True) -> sqlite3.Connection:
+    """Öffnet eine Store-Datei (standardmäßig schreibgeschützt)"""
+    if read_only:
+        uri = f"file:{os.path.abspath(path)}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+    return sqlite3.connect(path, check_same_thread=False)
+
+
+def create_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+    create_text_index(conn)
+
+
+# =========================
+# Befüllen
+# =========================
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _status_rows(statuses: Iterable[Dict[str, Any]]):
+    for status in statuses:
+        if status.get("id") is None:
+            continue
+        active = status.get("active")
+        yield (
+            status["id"], status_name(status), status.get("text"),
+            None if status.get("phase") is None else str(status.get("phase")),
+            status.get("color"), None if active is None else int(bool(active)),
+        )
+
+
+def insert_combined(conn: sqlite3.Connection, combined: List[Dict[str, Any]],
+                    masterdata: Optional[Dict[str, Any]] = None):
+    """Schreibt kombinierte Exportdaten (und optional alle Status aus den Masterdata)"""
+    statuses: Dict[Any, Dict[str, Any]] = {}
+    if masterdata and "project_statuses" in masterdata:
+        for status in masterdata["project_statuses"].get("projectStatus", []):
+            statuses[status.get("id")] = status
+
+    projects, kpis, entries = [], [], []
+
+    for pos, entry in enumerate(combined):
+        project = (entry.get("project_data") or {}).get("project") or {}
+        project_id = entry.get("project_id", project.get("id"))
+        if project_id is None:
+            continue
+
+        status_info = entry.get("status_info") or {}
+        status_id = project_status_id(project)
+        if status_info.get("id") is not None:
+            statuses.setdefault(status_info["id"], status_info)
+        # Anzeigename wie im Dashboard: Masterdata-Status (nur `text`), sonst status_info
+        status = statuses.get(status_id if status_id is not None else status_info.get("id")) or status_info
+
+        projects.append((
+            int(project_id), pos, project.get("number"), project.get("name"),
+            status_id, status_name(status), project.get("departmentId"),
+            project.get("typeId"), project.get("priorityId"),
+            project.get("start"), project.get("end"), project.get("lastChanged"),
+            project.get("statusMemo"), project.get("subjectMemo"),
+        ))
+
+        for kpi in (entry.get("kpis") or {}).get("kpis") or []:
+            if kpi.get("id") is None:
+                continue
+            # Ohne Periode: leere Periode (wie KPIStore.NO_PERIOD), nicht TOTAL
+            kpis.append((int(project_id), kpi["id"], kpi.get("period") or "",
+                         _number(kpi.get("value"))))
+
+        for seq, pe in enumerate((entry.get("planningentries") or {}).get("planningEntries") or []):
+            pe_type = pe.get("type")
+            entries.append((
+                int(project_id), seq, pe.get("description"),
+                None if pe_type in (None, "") else str(pe_type),
+                int(pe_type in (None, "")),
+                pe.get("start"), pe.get("end"),
+                _number(pe.get("plannedWork")), _number(pe.get("actualWork")),
+            ))
+
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO statuses VALUES (?, ?, ?, ?, ?, ?)",
+                         _status_rows(statuses.values()))
+        conn.executemany("INSERT OR REPLACE INTO projects VALUES "
+                         "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", projects)
+        # Doppelte KPIs: der letzte Wert gewinnt (wie im KPIStore)
+        conn.executemany("INSERT OR REPLACE INTO kpis VALUES (?, ?, ?, ?)", kpis)
+        conn.executemany("INSERT OR REPLACE INTO planning_entries VALUES "
+                         "(?, ?, ?, ?, ?, ?, ?, ?, ?)", entries)
+
+    # Volltextindex (FTS5) über Statustext, Projektgegenstand und Meilensteine
+    index_combined(conn, combined)
+
+
+def write_store(combined: List[Dict[str, Any]], path: str,
+                masterdata: Optional[Dict[str, Any]] = None) -> str:
+    """Schreibt die Store-Datei neu (erst in eine temporäre Datei, dann atomar ersetzen)"""
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        create_schema(conn)
+        insert_combined(conn, combined, masterdata)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    print(f"🗄️ SQL-Store gespeichert: {path}")
+    return path
@@ -0,0 +1,425 @@
+"""
+Ähnlichkeitsindex über Projekttexte und KPI-Kennzahlen.
+
+Jedes Projekt wird als Vektor aus zwei Teilen abgebildet:
+- Text (Name, Statustext, Projektgegenstand, Meilensteine): TF-IDF über
+  gestemmte Wörter, per Hashing-Trick auf feste Dimension gebracht. Ist
+  sentence-transformers installiert und BLUEANT_EMBEDDING_MODEL gesetzt,
+  werden stattdessen dichte Embeddings des Modells genutzt (CPU).
+- Kennzahlen (Plan/Ist-Aufwand, Fortschritt, Abweichung, Laufzeit,
+  Meilensteine), spaltenweise standardisiert.
+
+Die Suche ist exakt (Matrix-Vektor-Produkt) und wechselt ab IVF_MIN_SIZE
+Projekten auf einen IVF-Index (k-Means-Zellen, nur die nächsten `nprobe`
+Zellen werden durchsucht). `update()` arbeitet inkrementell: nur Projekte
+mit geändertem Inhalt (Content-Hash) werden neu eingebettet.
+"""
+import hashlib
+import math
+import os
+import re
+import threading
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+
+import numpy as np
+
+try:
+    from .BlueAntData_Archive import archive_root_for
+    from .BlueAntData_JSON import load_combined_file
+    from .BlueAntData_TextIndex import stem_german, strip_html
+except ImportError:
+    from BlueAntData_Archive import archive_root_for
+    from BlueAntData_JSON import load_combined_file
+    from BlueAntData_TextIndex import stem_german, strip_html
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+TFIDF = "tfidf"
+TEXT_DIM = 512
+KPI_FEATURES = ["work_plan", "work_actual", "progress", "variance_ratio", "duration_years", "milestones"]
+
+# Anteil von Text bzw. Kennzahlen an der Kosinus-Ähnlichkeit
+TEXT_WEIGHT = 0.7
+KPI_WEIGHT = 0.3
+
+IVF_MIN_SIZE = 20000
+IVF_NPROBE = 16
+
+INDEX_FILENAME = "blueant_similarity.npz"
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def index_path_for(data_file: str) -> str:
+    """
+    Indexdatei im Verzeichnis der Exportdatei (eine pro Verzeichnis, wird
+    fortgeschrieben); bei Snapshots des Exportarchivs im Archivverzeichnis
+    """
+    directory = archive_root_for(data_file) or os.path.dirname(os.path.abspath(data_file))
+    return os.path.join(directory, INDEX_FILENAME)
+
+
+# =========================
+# Merkmale
+# =========================
+def project_text(entry: Dict[str, Any]) -> str:
+    project = (entry.get("project_data") or {}).get("project") or {}
+    milestones = [
+        pe.get("description") or ""
+        for pe in (entry.get("planningentries") or {}).get("planningEntries") or []
+        if pe.get("type") in (None, "")
+    ]
+    return " ".join([
+        project.get("name") or "",
+        strip_html(project.get("statusMemo")),
+        strip_html(project.get("subjectMemo")),
+        *milestones,
+    ])
+
+
+def _total_kpi(entry: Dict[str, Any], kpi_id: str) -> float:
+    for kpi in (entry.get("kpis") or {}).get("kpis") or []:
+        if kpi.get("id") == kpi_id and kpi.get("period") == "TOTAL":
+            try:
+                return float(kpi.get("value") or 0.0)
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+def _years(start: Optional[str], end: Optional[str]) -> float:
+    try:
+        return (date.fromisoformat(end[:10]) - date.fromisoformat(start[:10])).days / 365.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def project_features(entry: Dict[str, Any]) -> np.ndarray:
+    """Kennzahlen-Vektor in der Reihenfolge von KPI_FEATURES (noch nicht standardisiert)"""
+    project = (entry.get("project_data") or {}).get("project") or {}
+    plan = _total_kpi(entry, "WorkTotalPlan")
+    actual = _total_kpi(entry, "WorkTotalActual")
+    milestones = sum(
+        1 for pe in (entry.get("planningentries") or {}).get("planningEntries") or []
+        if pe.get("type") in (None, "")
+    )
+    return np.array([
+        math.log1p(max(plan, 0.0)),
+        math.log1p(max(actual, 0.0)),
+        min(actual / plan, 2.0) if plan > 0 else 0.0,
+        max(min((actual - plan) / plan, 2.0), -2.0) if plan > 0 else 0.0,
+        _years(project.get("start"), project.get("end")),
+        float(milestones),
+    ], dtype=np.float32)
+
+
+def _content_hash(text: str, features: np.ndarray) -> str:
+    digest = hashlib.sha1(text.encode("utf-8"))
+    digest.update(features.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _project_id(entry: Dict[str, Any]) -> Optional[int]:
+    project_id = entry.get("project_id")
+    if project_id is None:
+        project_id = ((entry.get("project_data") or {}).get("project") or {}).get("id")
+    return None if project_id is None else int(project_id)
+
+
+@lru_cache(maxsize=65536)
+def _bucket(word: str) -> int:
+    """Spalte eines Wortes: Stamm, gehasht auf TEXT_DIM"""
+    digest = hashlib.blake2b(stem_german(word).encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little") % TEXT_DIM
+
+
+def hashed_term_frequencies(texts: Iterable[str]) -> np.ndarray:
+    """Sublineare Termfrequenz (1 + log tf) gestemmter Wörter, gehasht auf TEXT_DIM Spalten"""
+    texts = list(texts)
+    matrix = np.zeros((len(texts), TEXT_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        counts: Dict[int, int] = {}
+        for word in _WORD_RE.findall(text):
+            if len(word) < 3:
+                continue
+            bucket = _bucket(word)
+            counts[bucket] = counts.get(bucket, 0) + 1
+        for bucket, count in counts.items():
+            matrix[row, bucket] = 1.0 + math.log(count)
+    return matrix
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# =========================
+# Index
+# =========================
+class SimilarityIndex:
+    """
+    Top-k ähnliche Projekte über Text- und Kennzahlenvektoren.
+
+        index = SimilarityIndex.load_or_create("blueant_similarity.npz")
+        index.update(combined_data)
+        index.save("blueant_similarity.npz")
+        index.similar(500000123, k=5)  # [(project_id, score), ...]
+    """
+
+    def __init__(self, embedder: Optional[str] = None):
+        self.embedder = embedder or os.environ.get("BLUEANT_EMBEDDING_MODEL") or TFIDF
+        if self.embedder != TFIDF and SentenceTransformer is None:
+            print(f"⚠️ sentence-transformers nicht installiert, nutze TF-IDF statt {self.embedder}")
+            self.embedder = TFIDF
+        self._model = None
+
+        self.ids: List[int] = []
+        self.hashes: List[str] = []
+        self.text_vectors = np.zeros((0, TEXT_DIM), dtype=np.float32)
+        self.features = np.zeros((0, len(KPI_FEATURES)), dtype=np.float32)
+        self._pos: Dict[int, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._ivf: Optional[Tuple[np.ndarray, List[np.ndarray]]] = None
+        # Suchmatrix und IVF werden beim ersten Zugriff gebaut; der Index wird zwischen Sessions geteilt
+        self._build_lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, project_id) -> bool:
+        return project_id in self._pos
+
+    # =========================
+    # Einbetten
+    # =========================
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if self.embedder == TFIDF:
+            return hashed_term_frequencies(texts)
+        if self._model is None:
+            self._model = SentenceTransformer(self.embedder, device="cpu")
+        return np.asarray(self._model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+    # =========================
+    # Inkrementell aktualisieren
+    # =========================
+    def update(self, combined: List[Dict[str, Any]], remove_missing: bool = False) -> Dict[str, int]:
+        """
+        Übernimmt neue und geänderte Projekte aus kombinierten Exportdaten.
+
+        Mit `remove_missing` werden Projekte entfernt, die nicht mehr
+        enthalten sind (vollständiger Export statt gefiltertem Teilexport).
+        """
+        changed_pos, changed_rows, new_ids, new_rows = [], [], [], []
+        texts, features, hashes = [], [], []
+        seen = set()
+
+        for entry in combined:
+            project_id = _project_id(entry)
+            if project_id is None or project_id in seen:
+                continue
+            seen.add(project_id)
+
+            text = project_text(entry)
+            vector = project_features(entry)
+            content_hash = _content_hash(text, vector)
+
+            pos = self._pos.get(project_id)
+            if pos is not None and self.hashes[pos] == content_hash:
+                continue
+
+            row = len(texts)
+            texts.append(text)
+            features.append(vector)
+            hashes.append(content_hash)
+            if pos is None:
+                new_ids.append(project_id)
+                new_rows.append(row)
+            else:
+                changed_pos.append(pos)
+                changed_rows.append(row)
+
+        removed = [pid for pid in self.ids if pid not in seen] if remove_missing else []
+
+        if texts:
+            text_vectors = self._embed(texts)
+            features = np.vstack(features)
+
+            for pos, row in zip(changed_pos, changed_rows):
+                self.text_vectors[pos] = text_vectors[row]
+                self.features[pos] = features[row]
+                self.hashes[pos] = hashes[row]
+
+            if new_rows:
+                self.ids.extend(new_ids)
+                self.hashes.extend(hashes[row] for row in new_rows)
+                if not len(self.text_vectors):
+                    # Dimension hängt vom Embedder ab (TEXT_DIM oder Modellgröße)
+                    self.text_vectors = text_vectors[:0]
+                self.text_vectors = np.vstack([self.text_vectors, text_vectors[new_rows]])
+                self.features = np.vstack([self.features, features[new_rows]])
+
+        if texts:
+            self._pos = {pid: i for i, pid in enumerate(self.ids)}
+            self._matrix = None
+            self._ivf = None
+        self.remove(removed)
+
+        return {"added": len(new_ids), "updated": len(changed_pos),
+                "removed": len(removed), "total": len(self.ids)}
+
+    def remove(self, project_ids: Iterable[int]) -> int:
+        """Entfernt Projekte (z. B. gelöschte Projekte aus einem Änderungsfeed)"""
+        removed_set = {pid for pid in project_ids if pid in self._pos}
+        if not removed_set:
+            return 0
+        keep = [i for i, pid in enumerate(self.ids) if pid not in removed_set]
+        self.ids = [self.ids[i] for i in keep]
+        self.hashes = [self.hashes[i] for i in keep]
+        self.text_vectors = self.text_vectors[keep]
+        self.features = self.features[keep]
+        self._pos = {pid: i for i, pid in enumerate(self.ids)}
+        self._matrix = None
+        self._ivf = None
+        return len(removed_set)
+
+    # =========================
+    # Suchmatrix
+    # =========================
+    def _build_matrix(self) -> np.ndarray:
+        if self.embedder == TFIDF:
+            doc_freq = np.count_nonzero(self.text_vectors, axis=0)
+            idf = np.log((1 + len(self.ids)) / (1 + doc_freq)) + 1.0
+            text = _normalize_rows(self.text_vectors * idf.astype(np.float32))
+        else:
+            text = _normalize_rows(self.text_vectors)
+
+        std = self.features.std(axis=0)
+        std[std == 0] = 1.0
+        kpi = _normalize_rows((self.features - self.features.mean(axis=0)) / std)
+
+        return np.hstack([text * math.sqrt(TEXT_WEIGHT), kpi * math.sqrt(KPI_WEIGHT)]).astype(np.float32)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        matrix = self._matrix
+        if matrix is None:
+            with self._build_lock:
+                if self._matrix is None:
+                    self._matrix = self._build_matrix()
+                matrix = self._matrix
+        return matrix
+
+    def _build_ivf(self, iterations: int = 8, seed: int = 0):
+        """k-Means-Zellen (√n) über die Suchmatrix, Zuordnung Zelle -> Zeilen"""
+        matrix = self.matrix
+        n_lists = max(int(math.sqrt(len(matrix))), 1)
+        rng = np.random.default_rng(seed)
+        centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(matrix @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = matrix[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize_rows(centroids)
+
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        lists = [np.flatnonzero(assignment == c) for c in range(n_lists)]
+        self._ivf = (centroids, lists)
+
+    def _candidates(self, vector: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        if len(self.ids) < IVF_MIN_SIZE:
+            return None
+        ivf = self._ivf
+        if ivf is None:
+            with self._build_lock:
+                if self._ivf is None:
+                    self._build_ivf()
+                ivf = self._ivf
+        centroids, lists = ivf
+        nearest = np.argsort(centroids @ vector)[::-1][:nprobe]
+        return np.concatenate([lists[c] for c in nearest])
+
+    # =========================
+    # Abfragen
+    # =========================
+    def similar(self, project_id: int, k: int = 5, nprobe: int = IVF_NPROBE) -> List[Tuple[int, float]]:
+        """Die k ähnlichsten anderen Projekte mit gewichteter Kosinus-Ähnlichkeit"""
+        pos = self._pos.get(project_id)
+        if pos is None:
+            return []
+
+        matrix = self.matrix
+        vector = matrix[pos]
+        rows = self._candidates(vector, nprobe)
+        scores = (matrix if rows is None else matrix[rows]) @ vector
+
+        if rows is None:
+            rows = np.arange(len(matrix))
+        keep = rows != pos
+        rows, scores = rows[keep], scores[keep]
+        if not len(rows):
+            return []
+
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    # =========================
+    # Speichern / Laden
+    # =========================
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            embedder=np.array(self.embedder),
+            ids=np.array(self.ids, dtype=np.int64),
+            hashes=np.array(self.hashes, dtype="U16"),
+            text_vectors=self.text_vectors,
+            features=self.features,
+        )
+        os.replace(tmp_path, path)
+        print(f"🧭 Ähnlichkeitsindex gespeichert: {path} ({len(self.ids)} Projekte)")
+
+    @classmethod
+    def load(cls, path: str, embedder: Optional[str] = None) -> "SimilarityIndex":
+        with np.load(path) as data:
+            stored_embedder = str(data["embedder"])
+            index = cls(embedder or stored_embedder)
+            if index.embedder != stored_embedder:
+                # Anderes Modell -> Vektoren nicht vergleichbar, neu aufbauen
+                return index
+            index.ids = [int(pid) for pid in data["ids"]]
+            index.hashes = [str(h) for h in data["hashes"]]
+            index.text_vectors = data["text_vectors"]
+            index.features = data["features"]
+        index._pos = {pid: i for i, pid in enumerate(index.ids)}
+        return index
+
+    @classmethod
+    def load_or_create(cls, path: str, embedder: Optional[str] = None) -> "SimilarityIndex":
+        if os.path.exists(path):
+            try:
+                return cls.load(path, embedder)
+            except (OSError, KeyError, ValueError) as e:
+                print(f"⚠️ Ähnlichkeitsindex nicht lesbar ({e}), baue neu auf")
+        return cls(embedder)
+
+    @classmethod
+    def for_data_file(cls, data_file: str,
+                      raw_data: Optional[List[Dict[str, Any]]] = None) -> "SimilarityIndex":
+        """Gespeicherten Index laden und auf den Stand der Exportdatei bringen (ohne zu speichern)"""
+        index = cls.load_or_create(index_path_for(data_file))
+        index.update(raw_data if raw_data is not None else load_combined_file(data_file),
+                     remove_missing=True)
+        return index
@@ -0,0 +1,230 @@
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+
+DEFAULT_MASTERDATA_TEMPLATE = Path(__file__).with_name("blueant_masterdata_20260118_184540.json")
+
+# KPI-IDs, die der Generator pro Projekt erzeugt (Plan/Ist-Paare)
+KPI_IDS = [
+    ("WorkTotalPlan", "WorkTotalActual"),
+    ("CostTotalPlan", "CostTotalActual"),
+    ("RevenueTotalPlan", "RevenueTotalActual"),
+]
+
+_NAME_PREFIXES = ["Einführung", "Migration", "Modernisierung", "Aufbau", "Optimierung",
+                  "Rollout", "Konsolidierung", "Digitalisierung", "Erneuerung", "Pilot"]
+_NAME_SUBJECTS = ["ERP-System", "Kundenportal", "Rechenzentrum", "CRM", "Data Warehouse",
+                  "Zahlungsverkehr", "Intranet", "Netzwerk", "Meldewesen", "Archivsystem",
+                  "Personalverwaltung", "Berichtswesen", "Cloud-Plattform", "Service Desk"]
+_STATUS_SENTENCES = [
+    "Das Projekt läuft planmäßig.",
+    "Die Abstimmung mit dem Fachbereich ist abgeschlossen.",
+    "Es gibt eine Verzögerung bei der Lieferung der Hardware.",
+    "Das Risiko eines Ressourcenengpasses im nächsten Quartal steigt.",
+    "Ein technisches Problem bei der Schnittstelle wurde identifiziert.",
+    "Die Lage ist kritisch, Eskalation an den Lenkungsausschuss.",
+    "Der Test verläuft ohne Auffälligkeiten.",
+    "Die Migration gestaltet sich schwierig.",
+    "Meilenstein Konzeption wurde erreicht.",
+]
+_SUBJECT_SENTENCES = [
+    "Ziel ist die Ablösung des Altsystems.",
+    "Der Umfang umfasst alle Standorte.",
+    "Die Umsetzung erfolgt agil in Sprints.",
+    "Besonderheit sind regulatorische Anforderungen.",
+    "Es werden externe Dienstleister eingebunden.",
+]
+_MILESTONES = ["Kick-off", "Konzeption", "Realisierung", "Test", "Abnahme", "Go-Live", "Projektabschluss"]
+
+
+def load_masterdata_template(path: Optional[str] = None) -> Dict[str, Any]:
+    """Lädt die echte Masterdata-Datei als Vorlage"""
+    with open(path or DEFAULT_MASTERDATA_TEMPLATE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SyntheticTenant:
+    """
+    Synthetischer Blue Ant Mandant.
+
+    Projekte werden deterministisch aus (seed, Projektnummer) erzeugt und erst
+    beim Zugriff gebaut. Dadurch lassen sich auch 100.000 Projekte ohne
+    großen Speicherbedarf bereitstellen.
+    """
+
+    FIRST_PROJECT_ID = 500000000
+
+    def __init__(self, n_projects: int = 100, seed: int = 42,
+                 masterdata: Optional[Dict[str, Any]] = None,
+                 reference_date: Optional[date] = None):
+        self.n_projects = n_projects
+        self.seed = seed
+        self.masterdata = masterdata if masterdata is not None else load_masterdata_template()
+        self.reference_date = reference_date or date(2026, 1, 18)
+
+        statuses = self.masterdata.get("project_statuses", {}).get("projectStatus", [])
+        self.status_ids = [s["id"] for s in statuses if s.get("active", True)] or [10]
+
+        project_defs = self.masterdata.get("customfield_definitions", {}).get("Project", {})
+        self.project_customfields = [
+            cf for cf in project_defs.get("customFields", [])
+            if cf.get("type") in ("ListBox", "Double", "Long", "Date", "Boolean", "String")
+        ]
+
+        self._project_list = None
+
+    # =========================
+    # Projekt-IDs
+    # =========================
+    def project_ids(self) -> List[int]:
+        return [self.FIRST_PROJECT_ID + i for i in range(self.n_projects)]
+
+    def has_project(self, project_id: int) -> bool:
+        return 0 <= project_id - self.FIRST_PROJECT_ID < self.n_projects
+
+    def _rng(self, project_id: int, salt: int = 0) -> random.Random:
+        return random.Random(self.seed * 1_000_003 + project_id * 7 + salt)
+
+    # =========================
+    # Projekte
+    # =========================
+    def project(self, project_id: int) -> Dict[str, Any]:
+        """Vollständiger Projektdatensatz (wie GET /projects/{id})"""
+        rng = self._rng(project_id)
+        index = project_id - self.FIRST_PROJECT_ID
+
+        start = self.reference_date - timedelta(days=rng.randint(30, 900))
+        end = start + timedelta(days=rng.randint(90, 720))
+
+        status_memo = " ".join(rng.sample(_STATUS_SENTENCES, k=rng.randint(1, 4)))
+        if rng.random() < 0.2:
+            status_memo = f"<p><b>Status:</b> {status_memo}</p>"
+
+        custom_fields = {}
+        for cf in self.project_customfields:
+            if rng.random() < 0.5:
+                continue
+            custom_fields[str(cf["id"])] = self._customfield_value(cf, rng)
+
+        return {
+            "id": project_id,
+            "number": f"P-{index:06d}",
+            "name": f"{rng.choice(_NAME_PREFIXES)} {rng.choice(_NAME_SUBJECTS)} {index}",
+            "statusId": rng.choice(self.status_ids),
+            "departmentId": 1000 + rng.randint(0, 11),
+            "typeId": 2000 + rng.randint(0, 4),
+            "priorityId": 3000 + rng.randint(0, 2),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "lastChanged": (self.reference_date - timedelta(days=rng.randint(0, 60))).isoformat(),
+            "statusMemo": status_memo,
+            "subjectMemo": " ".join(rng.sample(_SUBJECT_SENTENCES, k=rng.randint(1, 3))),
+            "customFields": custom_fields,
+        }
+
+    def _customfield_value(self, cf: Dict[str, Any], rng: random.Random) -> Any:
+        cf_type = cf.get("type")
+        if cf_type == "ListBox":
+            options = [o["key"] for o in cf.get("options", []) if o.get("key") != "null"]
+            return rng.choice(options) if options else None
+        if cf_type == "Double":
+            return round(rng.uniform(0, 10), 2)
+        if cf_type == "Long":
+            return rng.randint(0, 1000)
+        if cf_type == "Date":
+            return (self.reference_date - timedelta(days=rng.randint(0, 365))).isoformat()
+        if cf_type == "Boolean":
+            return rng.random() < 0.5
+        return f"Wert {rng.randint(1, 99)}"
+
+    def project_summaries(self) -> List[Dict[str, Any]]:
+        """Projektliste (wie GET /projects), wird einmal erzeugt und gecacht"""
+        if self._project_list is None:
+            summaries = []
+            for project_id in self.project_ids():
+                p = self.project(project_id)
+                summaries.append({k: p[k] for k in (
+                    "id", "number", "name", "statusId", "departmentId",
+                    "typeId", "start", "end", "lastChanged"
+                )})
+            self._project_list = summaries
+        return self._project_list
+
+    # =========================
+    # KPIs & Planning Entries
+    # =========================
+    def kpis(self, project_id: int) -> List[Dict[str, Any]]:
+        """KPIs (TOTAL + Monatswerte) eines Projekts"""
+        rng = self._rng(project_id, salt=1)
+        project = self.project(project_id)
+        start = date.fromisoformat(project["start"])
+
+        months = []
+        current = date(start.year, start.month, 1)
+        while current <= self.reference_date and len(months) < 12:
+            months.append(current.strftime("%Y-%m"))
+            current = (current + timedelta(days=32)).replace(day=1)
+
+        progress = rng.uniform(0.0, 1.3)
+        result = []
+        for plan_id, actual_id in KPI_IDS:
+            plan = round(rng.uniform(50, 5000), 1)
+            actual = round(plan * progress * rng.uniform(0.8, 1.2), 1)
+
+            result.append({"id": plan_id, "period": "TOTAL", "value": plan})
+            result.append({"id": actual_id, "period": "TOTAL", "value": actual})
+
+            for month in months:
+                result.append({"id": actual_id, "period": month,
+                               "value": round(actual / max(len(months), 1), 1)})
+
+        return result
+
+    def planningentries(self, project_id: int) -> List[Dict[str, Any]]:
+        """Planning Entries (Vorgänge und Meilensteine ohne Typ)"""
+        rng = self._rng(project_id, salt=2)
+        project = self.project(project_id)
+        start = date.fromisoformat(project["start"])
+        end = date.fromisoformat(project["end"])
+        span = max((end - start).days, 1)
+
+        entries = []
+        for i, name in enumerate(_MILESTONES[:rng.randint(2, len(_MILESTONES))]):
+            ms_end = start + timedelta(days=int(span * (i + 1) / len(_MILESTONES)))
+            planned = round(rng.uniform(10, 400), 1)
+            actual = round(planned * rng.uniform(0, 1.2), 1) if ms_end <= self.reference_date else 0.0
+
+            entries.append({
+                "id": project_id * 100 + i,
+                "description": name,
+                "type": None if rng.random() < 0.7 else "Task",
+                "start": start.isoformat(),
+                "end": ms_end.isoformat(),
+                "plannedWork": planned,
+                "actualWork": actual,
+            })
+        return entries
+
+    # =========================
+    # Offline-Export (ohne HTTP)
+    # =========================
+    def _envelope(self, **payload) -> Dict[str, Any]:
+        return {"status": {"name": "OK", "code": 200}, "timestamp": 0, **payload}
+
+    def export_projects(self) -> Dict[int, Dict[str, Any]]:
+        """Gleiche Struktur wie BlueAntAPI.export_all_projects()"""
+        return {
+            project_id: {
+                "project": self._envelope(project=self.project(project_id)),
+                "kpis": self._envelope(kpis=self.kpis(project_id)),
+                "planningentries": self._envelope(planningEntries=self.planningentries(project_id)),
+            }
+            for project_id in self.project_ids()
+        }
+
+    def export_masterdata(self) -> Dict[str, Any]:
+        """Gleiche Struktur wie BlueAntAPI.export_all_masterdata()"""
+        return self.masterdata
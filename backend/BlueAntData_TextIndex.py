@@ -0,0 +1,225 @@
+"""
+Volltextindex (SQLite FTS5) über Statustext, Projektgegenstand und Meilensteine.
+
+Zwei Tabellen:
+- project_text: deutsch normalisiert und gestemmt (CISTEM), für die
+  gerankte Suche (bm25) im Dashboard
+- project_text_raw: Statustext unverändert mit Trigramm-Tokenizer, für
+  Teilwort-Treffer wie bisher (`"risiko" in status_text.lower()`), aber als
+  eine Abfrage über das ganze Portfolio
+
+Der Index wird beim Export in die SQL-Store-Datei geschrieben
+(BlueAntData_SQLStore) oder bei Bedarf im Speicher aufgebaut.
+"""
+import html
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Iterable, Set
+
+
+TEXT_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS project_text USING fts5(
+    project_id UNINDEXED,
+    status_memo,
+    subject_memo,
+    milestones,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS project_text_raw USING fts5(
+    project_id UNINDEXED,
+    status_memo,
+    tokenize = 'trigram'
+);
+"""
+
+# Gewichtung der Spalten für bm25 (project_id, Status, Gegenstand, Meilensteine)
+BM25_WEIGHTS = (0.0, 3.0, 1.0, 2.0)
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# =========================
+# Normalisierung
+# =========================
+def strip_html(text: Optional[str]) -> str:
+    """Entfernt HTML-Tags und löst Entities auf"""
+    if not text:
+        return ""
+    return html.unescape(_TAG_RE.sub(" ", text))
+
+
+_GE_PREFIX_RE = re.compile(r"^ge(.{4,})")
+_DOUBLE_RE = re.compile(r"(.)\1")
+_DOUBLE_MARK_RE = re.compile(r"(.)\*")
+_SUFFIX_LONG_RE = re.compile(r"(e[mr]|nd)$")
+_SUFFIX_RE = re.compile(r"[tesn]$")
+
+
+@lru_cache(maxsize=65536)
+def stem_german(word: str) -> str:
+    """
+    CISTEM-Stemmer (Weissweiler & Fraser 2017), ohne Groß-/Kleinschreibung.
+
+    Umlaute werden gefaltet, Endungen wie -e, -en, -er, -em, -nd, -s, -t
+    abgeschnitten: "Verzögerungen" -> "verzogerung", "Risiken" -> "risik".
+    """
+    word = word.lower()
+    word = word.replace("ü", "u").replace("ö", "o").replace("ä", "a").replace("ß", "ss")
+    word = _GE_PREFIX_RE.sub(r"\1", word)
+    word = word.replace("sch", "$").replace("ei", "%").replace("ie", "&")
+    word = _DOUBLE_RE.sub(r"\1*", word)
+
+    while len(word) > 3:
+        if len(word) > 5:
+            word, n = _SUFFIX_LONG_RE.subn("", word)
+            if n:
+                continue
+        word, n = _SUFFIX_RE.subn("", word)
+        if not n:
+            break
+
+    word = _DOUBLE_MARK_RE.sub(r"\1\1", word)
+    return word.replace("&", "ie").replace("%", "ei").replace("$", "sch")
+
+
+def normalize_german(text: Optional[str]) -> str:
+    """HTML entfernen, tokenisieren, stemmen -> Leerzeichen-getrennte Stämme"""
+    return " ".join(stem_german(w) for w in _WORD_RE.findall(strip_html(text)))
+
+
+# =========================
+# Aufbau
+# =========================
+def create_text_index(conn: sqlite3.Connection):
+    conn.executescript(TEXT_SCHEMA)
+
+
+def index_combined(conn: sqlite3.Connection, combined: List[Dict[str, Any]]):
+    """Indexiert Statustext, Projektgegenstand und Meilenstein-Beschreibungen"""
+    rows, raw_rows = [], []
+
+    for entry in combined:
+        project = (entry.get("project_data") or {}).get("project") or {}
+        project_id = entry.get("project_id", project.get("id"))
+        if project_id is None:
+            continue
+
+        milestones = " ".join(
+            pe.get("description") or ""
+            for pe in (entry.get("planningentries") or {}).get("planningEntries") or []
+            if pe.get("type") in (None, "")
+        )
+        rows.append((
+            int(project_id),
+            normalize_german(project.get("statusMemo")),
+            normalize_german(project.get("subjectMemo")),
+            normalize_german(milestones),
+        ))
+        if project.get("statusMemo"):
+            raw_rows.append((int(project_id), project["statusMemo"]))
+
+    with conn:
+        conn.executemany("INSERT INTO project_text VALUES (?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO project_text_raw VALUES (?, ?)", raw_rows)
+        conn.execute("INSERT INTO project_text(project_text) VALUES ('optimize')")
+        conn.execute("INSERT INTO project_text_raw(project_text_raw) VALUES ('optimize')")
+
+
+def has_text_index(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'project_text_raw'"
+    ).fetchone()
+    return row is not None
+
+
+# =========================
+# Abfragen
+# =========================
+def _phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Suchbegriffe des Nutzers -> FTS5-Ausdruck (alle Stämme, jeweils als Präfix)"""
+    stems = [stem_german(w) for w in _WORD_RE.findall(text or "")]
+    stems = [s for s in stems if s]
+    if not stems:
+        return None
+    return " AND ".join(f"{_phrase(s)}*" for s in stems)
+
+
+def search(conn: sqlite3.Connection, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Gerankte Suche; liefert project_id und Score (kleiner = relevanter)"""
+    query = fts_query(text)
+    if not query:
+        return []
+    rows = conn.execute(
+        f"SELECT project_id, bm25(project_text, {', '.join(map(str, BM25_WEIGHTS))}) AS score "
+        "FROM project_text WHERE project_text MATCH ? ORDER BY score LIMIT ?",
+        (query, limit),
+    ).fetchall()
+    return [{"project_id": project_id, "score": score} for project_id, score in rows]
+
+
+def keyword_matches(conn: sqlite3.Connection, keywords: Iterable[str]) -> Set[int]:
+    """
+    Projekte, deren Statustext eines der Schlüsselwörter als Teilwort enthält.
+
+    Entspricht `any(k in status_memo.lower() for k in keywords)`; Schlüssel-
+    wörter unter drei Zeichen (vom Trigramm-Index nicht abgedeckt) laufen
+    über LIKE.
+    """
+    keywords = [k for k in keywords if k]
+    long_words = [k for k in keywords if len(k) >= 3]
+    short_words = [k for k in keywords if len(k) < 3]
+
+    matches: Set[int] = set()
+    if long_words:
+        query = " OR ".join(_phrase(k) for k in long_words)
+        matches.update(row[0] for row in conn.execute(
+            "SELECT project_id FROM project_text_raw WHERE project_text_raw MATCH ?", (query,)
+        ))
+    for word in short_words:
+        matches.update(row[0] for row in conn.execute(
+            "SELECT project_id FROM project_text_raw WHERE status_memo LIKE ?", (f"%{word}%",)
+        ))
+    return matches
+
+
+class TextIndex:
+    """Volltextindex auf eigener Verbindung (Store-Datei oder im Speicher), threadsicher"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_combined(cls, combined: List[Dict[str, Any]]) -> "TextIndex":
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        create_text_index(conn)
+        index_combined(conn, combined)
+        conn.execute("PRAGMA query_only = ON")
+        return cls(conn)
+
+    @classmethod
+    def open(cls, path: str) -> Optional["TextIndex"]:
+        """Index aus einer SQL-Store-Datei, None falls sie keinen enthält"""
+        uri = f"file:{os.path.abspath(path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        if not has_text_index(conn):
+            conn.close()
+            return None
+        return cls(conn)
+
+    def search(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return search(self.conn, text, limit)
+
+    def keyword_matches(self, keywords: Iterable[str]) -> Set[int]:
+        with self._lock:
+            return keyword_matches(self.conn, keywords)
@@ -0,0 +1,402 @@
+"""
+Benchmarks für die Pipeline Export -> Kombinieren -> Speichern -> Laden -> Dashboard.
+
+Jeder Benchmark ist ein Context Manager: Setup vor `yield`, Teardown danach.
+Geyieldet wird die zu messende Funktion ohne Argumente.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.BlueAntAPI_AsyncExport import AsyncBlueAntAPI
+from backend.BlueAntAPI_DataExport import BlueAntAPI, save_json
+from backend.BlueAntAPI_MockServer import MockBlueAntServer
+from backend.BlueAntData_Archive import ExportArchive, latest_snapshot
+from backend.BlueAntData_CustomFields import CustomFieldIndex
+from backend.BlueAntData_Enrichment import MasterdataLookup, ResolvedView, resolve
+from backend.BlueAntData_RecordFile import RecordFile, write_records
+from backend.BlueAntData_SimilarityIndex import SimilarityIndex
+from backend.BlueAntData_TenantGenerator import SyntheticTenant
+from backend.BlueAntData_TextIndex import TextIndex
+
+from blue_ant_analytics import (
+    AMPEL_VALUES, CRITICAL_KEYWORDS, DEFAULT_RULES, Portfolio, load_combined, build_projects,
+    assess_portfolio, project_table
+)
+from blue_ant_kpi_store import KPIStore
+from blue_ant_llm import LLMScheduler
+from blue_ant_mapreduce import PortfolioMapReduce
+from blue_ant_prompts import PromptContextBuilder
+from blue_ant_sql import PortfolioSQL
+
+
+# Name -> (Benchmark-Funktion, maximale Portfoliogröße oder None)
+BENCHMARKS: Dict[str, Tuple[Callable, Optional[int]]] = {}
+
+DEFAULT_SIZES: List[int] = [100, 1000, 10000]
+
+# Simulierte Antwortzeit der API in Sekunden (nur für die Latenz-Benchmarks)
+NETWORK_LATENCY = 0.01
+
+# Simulierte Inferenzzeit je Prompt in Sekunden (llm_fanout)
+LLM_LATENCY = 0.01
+
+
+def benchmark(name: str, max_size: Optional[int] = None):
+    def decorator(fn):
+        BENCHMARKS[name] = (contextmanager(fn), max_size)
+        return fn
+    return decorator
+
+
+# =========================
+# Hilfen
+# =========================
+_tenants: Dict[int, SyntheticTenant] = {}
+_combined: Dict[int, list] = {}
+
+
+def tenant(size: int) -> SyntheticTenant:
+    if size not in _tenants:
+        _tenants[size] = SyntheticTenant(n_projects=size, seed=size)
+    return _tenants[size]
+
+
+def combined(size: int) -> list:
+    if size not in _combined:
+        t = tenant(size)
+        _combined[size] = _quiet_api().combine_data(t.export_projects(), t.export_masterdata())
+    return _combined[size]
+
+
+def _quiet_api(base_url: Optional[str] = None) -> BlueAntAPI:
+    api = BlueAntAPI("benchmark", base_url=base_url)
+    api.REQUEST_DELAY = 0
+    api.MASTERDATA_DELAY = 0
+    return api
+
+
+def quiet(fn: Callable) -> Callable:
+    """Unterdrückt die Konsolenausgaben des Exporters während der Messung"""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+
+# =========================
+# Export (gegen lokalen Mock-Server)
+# =========================
+@benchmark("export_all_projects", max_size=1000)
+def bench_export_all_projects(size):
+    with MockBlueAntServer(tenant(size)) as server:
+        api = _quiet_api(server.base_url)
+        yield quiet(api.export_all_projects)
+
+
+@benchmark("export_all_projects_latency", max_size=100)
+def bench_export_all_projects_latency(size):
+    # Wie export_all_projects, aber mit Netzwerklatenz je Request (Vergleich zu async)
+    with MockBlueAntServer(tenant(size), latency=NETWORK_LATENCY) as server:
+        api = _quiet_api(server.base_url)
+        yield quiet(api.export_all_projects)
+
+
+@benchmark("export_all_projects_async", max_size=1000)
+def bench_export_all_projects_async(size):
+    with MockBlueAntServer(tenant(size), latency=NETWORK_LATENCY) as server:
+        async def run():
+            async with AsyncBlueAntAPI("benchmark", base_url=server.base_url,
+                                       max_concurrency=32) as api:
+                return await api.export_all_projects()
+        yield quiet(lambda: asyncio.run(run()))
+
+
+@benchmark("export_all_masterdata", max_size=100)
+def bench_export_all_masterdata(size):
+    with MockBlueAntServer(tenant(size)) as server:
+        api = _quiet_api(server.base_url)
+        yield quiet(api.export_all_masterdata)
+
+
+# =========================
+# Kombinieren, Speichern, Laden
+# =========================
+@benchmark("combine_data")
+def bench_combine_data(size):
+    t = tenant(size)
+    projects_data = t.export_projects()
+    masterdata = t.export_masterdata()
+    api = _quiet_api()
+    yield lambda: api.combine_data(projects_data, masterdata)
+
+
+@benchmark("save_json")
+def bench_save_json(size):
+    data = combined(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blueant_combined_benchmark.json")
+        yield quiet(lambda: save_json(data, path))
+
+
+@benchmark("load_data")
+def bench_load_data(size):
+    data = combined(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blueant_combined_benchmark.json")
+        quiet(lambda: save_json(data, path))()
+        yield lambda: load_combined(path)
+
+
+@benchmark("load_data_stdlib")
+def bench_load_data_stdlib(size):
+    # Referenz: generisches json.load wie vor der schnellen JSON-Schicht
+    data = combined(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blueant_combined_benchmark.json")
+        quiet(lambda: save_json(data, path))()
+
+        def load():
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        yield load
+
+
+@benchmark("archive_snapshot")
+def bench_archive_snapshot(size):
+    # Export komprimiert ins Archiv schreiben (statt save_json mit indent=2)
+    data = combined(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = ExportArchive(tmp)
+        yield quiet(lambda: archive.add("20260101_000000", data))
+
+
+@benchmark("load_data_archive")
+def bench_load_data_archive(size):
+    # Neuesten Snapshot über das Manifest finden und komprimiert laden
+    data = combined(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        quiet(lambda: ExportArchive(tmp).add("20260101_000000", data))()
+        yield lambda: load_combined(latest_snapshot(tmp))
+
+
+@benchmark("load_single_project")
+def bench_load_single_project(size):
+    # Ein Projekt (Deep-Link) aus der Record-Datei: Öffnen plus ein Datensatz
+    data = combined(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blueant_combined_benchmark.records")
+        quiet(lambda: write_records(data, path))()
+        project_id = data[len(data) // 2]["project_id"]
+
+        def load():
+            with RecordFile(path) as records:
+                return records.get(project_id)
+        yield load
+
+
+# =========================
+# Dashboard-Berechnungen
+# =========================
+@benchmark("build_projects")
+def bench_build_projects(size):
+    data = combined(size)
+    yield lambda: build_projects(data, KPIStore.from_combined(data))
+
+
+@benchmark("resolve_masterdata")
+def bench_resolve_masterdata(size):
+    # Status und Custom Fields aller Projekte auflösen (Lookup einmal je Masterdata)
+    data = combined(size)
+    lookup = MasterdataLookup.from_masterdata(tenant(size).export_masterdata())
+    yield lambda: resolve(data, lookup)
+
+
+@benchmark("load_resolved")
+def bench_load_resolved(size):
+    # Gespeicherte aufgelöste Sicht laden statt neu auflösen
+    data = combined(size)
+    lookup = MasterdataLookup.from_masterdata(tenant(size).export_masterdata())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blueant_combined_benchmark.resolved")
+        quiet(lambda: resolve(data, lookup).save(path))()
+        yield lambda: ResolvedView.load(path)
+
+
+@benchmark("assess_criticality")
+def bench_assess_criticality(size):
+    projects, _ = build_projects(combined(size))
+    yield lambda: assess_portfolio(projects)
+
+
+@benchmark("criticality_rules")
+def bench_criticality_rules(size):
+    # Nur die Regelauswertung über die fertige Projekttabelle
+    projects, _ = build_projects(combined(size))
+    table = project_table(projects)
+    yield lambda: DEFAULT_RULES.evaluate(table)
+
+
+@benchmark("keyword_scan")
+def bench_keyword_scan(size):
+    # Referenz: Schlüsselwörter per Teilstring-Suche in jedem Statustext
+    projects, _ = build_projects(combined(size))
+    yield lambda: {
+        p.project_id for p in projects
+        if p.status_text and any(w in p.status_text.lower() for w in CRITICAL_KEYWORDS)
+    }
+
+
+@benchmark("keyword_index")
+def bench_keyword_index(size):
+    text_index = TextIndex.from_combined(combined(size))
+    yield lambda: text_index.keyword_matches(CRITICAL_KEYWORDS)
+
+
+@benchmark("similarity_build")
+def bench_similarity_build(size):
+    data = combined(size)
+    yield lambda: SimilarityIndex().update(data)
+
+
+@benchmark("similarity_query")
+def bench_similarity_query(size):
+    index = SimilarityIndex()
+    index.update(combined(size))
+    project_ids = index.ids[:100]
+    index.similar(project_ids[0])  # Suchmatrix aufbauen
+    yield lambda: [index.similar(project_id, k=5) for project_id in project_ids]
+
+
+@benchmark("llm_fanout", max_size=100)
+def bench_llm_fanout(size):
+    # Drei Analysen je Projekt, zwei Sessions fragen dieselben Projekte an
+    def generate(prompt):
+        time.sleep(LLM_LATENCY)
+        return prompt
+
+    prompts = [{kind: f"{kind}:{project_id}" for kind in ("analysis", "risk", "optimization")}
+               for project_id in range(size)]
+
+    def run():
+        scheduler = LLMScheduler(generate, max_parallel=4)
+        futures = [scheduler.submit_many(batch) for batch in prompts for _ in range(2)]
+        return [f.result() for batch in futures for f in batch.values()]
+    yield run
+
+
+@benchmark("portfolio_mapreduce", max_size=1000)
+def bench_portfolio_mapreduce(size):
+    # Map-Reduce über alle Projekte mit simulierter Inferenzzeit (kalter Cache)
+    projects = Portfolio.from_combined(combined(size)).projects
+
+    def generate(prompt):
+        time.sleep(LLM_LATENCY)
+        return prompt[:200]
+
+    def run():
+        mapreduce = PortfolioMapReduce(LLMScheduler(generate, max_parallel=4))
+        return mapreduce.run(projects, lambda summary: summary)
+    yield run
+
+
+@benchmark("prompt_context")
+def bench_prompt_context(size):
+    # Memos aller Projekte bereinigen und kürzen (kalter Cache)
+    projects = Portfolio.from_combined(combined(size)).projects
+
+    def run():
+        builder = PromptContextBuilder(field_tokens=200)
+        return [builder.project_fields(p) for p in projects]
+    yield run
+
+
+@benchmark("session_rerun")
+def bench_session_rerun(size):
+    # Gemeinsames Portfolio, pro Session/Rerun nur die Filteransicht:
+    # der Spitzen-Speicher entspricht den Zusatzkosten je weiterer Session
+    portfolio = Portfolio.from_combined(combined(size))
+    statuses = list(portfolio.status_counter)
+    yield lambda: portfolio.view(statuses[:len(statuses) // 2 + 1], AMPEL_VALUES)
+
+
+@benchmark("cube_aggregates")
+def bench_cube_aggregates(size):
+    # Nur Kennzahlen, Status- und Ampelzählung einer Filterkombination aus dem Würfel
+    portfolio = Portfolio.from_combined(combined(size))
+    statuses = list(portfolio.status_counter)[:len(portfolio.status_counter) // 2 + 1]
+
+    def aggregates():
+        cube = portfolio.cube
+        return (cube.totals(status=statuses, ampel=AMPEL_VALUES),
+                cube.counts("status", status=statuses),
+                cube.counts("ampel", status=statuses, ampel=AMPEL_VALUES))
+    yield aggregates
+
+
+def _resolved(size: int):
+    return resolve(combined(size), MasterdataLookup.from_masterdata(tenant(size).export_masterdata()))
+
+
+@benchmark("custom_field_index")
+def bench_custom_field_index(size):
+    # Typisierte Spalten plus Kategorie-/Bitmap-Index über alle Custom Fields
+    view = _resolved(size)
+    yield lambda: CustomFieldIndex.build(view.custom_fields, view.fields)
+
+
+@benchmark("custom_field_filter")
+def bench_custom_field_filter(size):
+    # Filteransicht mit zwei Custom Fields (Wertauswahl und Zahlenbereich)
+    portfolio = Portfolio.from_combined(combined(size), resolved=_resolved(size))
+    category = portfolio.custom_fields.names("category")[0]
+    number = portfolio.custom_fields.names("number")[0]
+    custom_filter = {category: portfolio.custom_fields[category].categories[:1], number: (2.0, 8.0)}
+    statuses = list(portfolio.status_counter)
+    yield lambda: portfolio.view(statuses, AMPEL_VALUES, None, custom_filter)
+
+
+@benchmark("sql_breakdown")
+def bench_sql_breakdown(size):
+    portfolio = Portfolio.from_combined(combined(size))
+    portfolio_sql = PortfolioSQL.build(portfolio, raw_data=combined(size))
+    statuses = list(portfolio.status_counter)
+    yield lambda: portfolio_sql.breakdown(statuses, AMPEL_VALUES)
+
+
+# =========================
+# Speicher: Dict-Records vs. Slot-Records
+# =========================
+def _legacy_dict(p) -> dict:
+    """Frühere Darstellung: ein dict pro Projekt mit verschachtelten Meilenstein-dicts"""
+    record = dict(p)
+    record["milestones"] = [dict(ms) for ms in p.milestones]
+    record["criticality"] = {**p.criticality, "reasons": list(p.criticality.reasons)}
+    return record
+
+
+def _slot_copy(p):
+    return replace(
+        p,
+        milestones=tuple(replace(ms) for ms in p.milestones),
+        criticality=replace(p.criticality),
+    )
+
+
+@benchmark("records_dict")
+def bench_records_dict(size):
+    projects = Portfolio.from_combined(combined(size)).projects
+    yield lambda: [_legacy_dict(p) for p in projects]
+
+
+@benchmark("records_slots")
+def bench_records_slots(size):
+    projects = Portfolio.from_combined(combined(size)).projects
+    yield lambda: [_slot_copy(p) for p in projects]
@@ -0,0 +1,180 @@
+"""
+Benchmark-Runner für die Blue Ant Pipeline.
+
+Misst Laufzeit (min/median über mehrere Wiederholungen) und Spitzen-Speicher
+(tracemalloc) jedes Benchmarks auf synthetischen Portfolios wachsender Größe.
+Ergebnisse werden pro Commit unter benchmarks/results/ abgelegt und mit einer
+Baseline verglichen. Liegt ein Hot Path über dem Schwellwert, endet der Lauf
+mit Exit-Code 1.
+
+Beispiele:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 100 1000 --only combine_data load_data
+    python benchmarks/run_benchmarks.py --compare a1b2c3d --threshold 0.15
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_pipeline import BENCHMARKS, DEFAULT_SIZES  # noqa: E402
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# =========================
+# Messen
+# =========================
+def measure(bench, size: int, repeat: int) -> Dict[str, Any]:
+    with bench(size) as fn:
+        fn()  # Warm-up
+
+        timings = []
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+
+        # Speicher separat messen, tracemalloc verfälscht die Laufzeit
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "peak_memory": peak,
+    }
+
+
+# =========================
+# Ergebnisse
+# =========================
+def save_results(results: Dict[str, Any], commit: str) -> Path:
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR / f"{commit}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_baseline(compare: Optional[str], commit: str) -> Optional[Dict[str, Any]]:
+    """Baseline: angegebener Commit oder jüngster gespeicherter Lauf eines anderen Commits"""
+    if not RESULTS_DIR.exists():
+        return None
+
+    if compare:
+        path = RESULTS_DIR / f"{compare}.json"
+        if not path.exists():
+            print(f"⚠️ Keine Ergebnisse für {compare} gefunden")
+            return None
+    else:
+        candidates = [p for p in RESULTS_DIR.glob("*.json") if p.stem != commit]
+        if not candidates:
+            return None
+        path = max(candidates, key=lambda p: p.stat().st_mtime)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float):
+    """Liefert alle Regressionen (Laufzeit oder Speicher) über dem Schwellwert"""
+    regressions = []
+    for key, now in current["results"].items():
+        before = baseline["results"].get(key)
+        if not before:
+            continue
+        for metric in ("min", "peak_memory"):
+            if before[metric] > 0 and now[metric] > before[metric] * (1 + threshold):
+                change = now[metric] / before[metric] - 1
+                regressions.append((key, metric, before[metric], now[metric], change))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Blue Ant Pipeline-Benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Portfoliogrößen (Anzahl Projekte)")
+    parser.add_argument("--only", nargs="+", default=None, help="Nur diese Benchmarks")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", default=None,
+                        help="Commit, gegen den verglichen wird (Default: letzter Lauf)")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Erlaubte Verschlechterung, 0.2 = 20%%")
+    parser.add_argument("--no-save", action="store_true", help="Ergebnisse nicht speichern")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {},
+    }
+
+    print("\n" + "=" * 60)
+    print(f"⏱️ BENCHMARKS @ {commit}")
+    print("=" * 60)
+
+    for name, (bench, max_size) in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        for size in args.sizes:
+            if max_size and size > max_size:
+                continue
+            key = f"{name}[{size}]"
+            r = measure(bench, size, args.repeat)
+            results["results"][key] = r
+            print(f"{key:<32} min {r['min'] * 1000:10.1f} ms   "
+                  f"median {r['median'] * 1000:10.1f} ms   "
+                  f"peak {r['peak_memory'] / 1024 / 1024:8.1f} MB")
+
+    baseline = load_baseline(args.compare, commit)
+
+    if not args.no_save:
+        path = save_results(results, commit)
+        print(f"\n💾 Gespeichert: {path.relative_to(ROOT)}")
+
+    if not baseline:
+        print("ℹ️ Keine Baseline zum Vergleich vorhanden")
+        return 0
+
+    regressions = compare_results(results, baseline, args.threshold)
+    if not regressions:
+        print(f"✅ Keine Regression gegenüber {baseline['commit']} (Schwellwert {args.threshold:.0%})")
+        return 0
+
+    print(f"\n❌ {len(regressions)} Regression(en) gegenüber {baseline['commit']}:")
+    for key, metric, before, now, change in regressions:
+        print(f"   {key} {metric}: {before:.4g} -> {now:.4g} (+{change:.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
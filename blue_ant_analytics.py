@@ -0,0 +1,819 @@
+"""
+Headless Rechenkern des Blue Ant Dashboards.
+
+Alle Funktionen sind frei von Seiteneffekten und ohne Streamlit nutzbar
+(Dashboard, CLI-Reports, Batch-Jobs, Benchmarks). Eingaben werden nie
+verändert, Ergebnisse werden als neue Records zurückgegeben.
+"""
+import hashlib
+import os
+import sys
+import threading
+import warnings
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from datetime import datetime
+from enum import StrEnum
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Set, Tuple, Iterable, Callable, Sequence, TypedDict
+
+import numpy as np
+import pandas as pd
+
+from backend.BlueAntData_CustomFields import CustomFieldIndex
+from backend.BlueAntData_Enrichment import ResolvedView, load_resolved, status_name
+from backend.BlueAntData_JSON import CombinedEntry, load_combined_file
+from backend.BlueAntData_RecordFile import RecordFile
+from backend.BlueAntData_SimilarityIndex import SimilarityIndex
+from backend.BlueAntData_TextIndex import TextIndex
+from blue_ant_kpi_store import KPIStore
+from blue_ant_rules import CRITICAL_KEYWORDS, CriticalityRules
+
+
+# =========================
+# Typen
+# =========================
+class Ampel(StrEnum):
+    """Statusampel; vergleicht und hasht wie der String, `code` für Arrays"""
+    GRUEN = "GRUEN"
+    GELB = "GELB"
+    ROT = "ROT"
+    GRAU = "GRAU"
+
+    @property
+    def code(self) -> int:
+        return _AMPEL_CODES[self]
+
+
+_AMPEL_CODES = {a: i for i, a in enumerate(Ampel)}
+
+AMPEL_VALUES = [a.value for a in Ampel]
+
+
+class _Record(Mapping):
+    """
+    Dict-Zugriff (record["plan"], .get, .keys, dict(record)) für Slot-Records.
+
+    Records werden von allen Sessions gemeinsam referenziert und nach dem
+    Bau nicht verändert (Änderungen nur über dataclasses.replace); ohne
+    __dict__ pro Objekt sinkt der Speicherbedarf deutlich. Bewusst nicht
+    `frozen`: dessen __init__ setzt jedes Feld über object.__setattr__ und
+    macht den Bau der Projektliste etwa dreimal langsamer.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__dataclass_fields__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.__dataclass_fields__)
+
+    def __len__(self) -> int:
+        return len(self.__dataclass_fields__)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+@dataclass(slots=True, eq=False)
+class Milestone(_Record):
+    name: str
+    start: Optional[str]
+    end: Optional[str]
+    plannedWork: float
+    actualWork: float
+    progress: float
+
+
+@dataclass(slots=True, eq=False)
+class Criticality(_Record):
+    score: int
+    reasons: Tuple[str, ...]
+    is_critical: bool
+
+
+@dataclass(slots=True, eq=False)
+class ProjectRecord(_Record):
+    key: str
+    name: str
+    number: str
+    plan: float
+    actual: float
+    variance: float
+    progress: float
+    status: str
+    phase: str
+    ampel: Ampel
+    milestones: Tuple[Milestone, ...]
+    status_text: str
+    subject_text: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    project_id: Optional[int]
+    criticality: Optional[Criticality] = None
+
+
+class PortfolioTotals(TypedDict):
+    count: int
+    plan: float
+    actual: float
+    variance: float
+    avg_progress: float
+
+
+class PortfolioView(TypedDict):
+    projects: Tuple[ProjectRecord, ...]
+    totals: PortfolioTotals
+    status_counts: Dict[str, int]
+    ampel_counts: Dict[str, int]
+    critical_projects: Tuple[ProjectRecord, ...]
+
+
+# =========================
+# Daten laden
+# =========================
+def load_combined(path: str) -> List[Dict[str, Any]]:
+    """Lädt eine kombinierte Exportdatei (blueant_combined_*.json oder .records), nur die genutzten Felder"""
+    if path.endswith(".records"):
+        with RecordFile(path, schema=CombinedEntry) as records:
+            return records.load_all()
+    return load_combined_file(path)
+
+
+def data_version(path: str) -> str:
+    """Versionskennung einer Exportdatei (Pfad, Größe, Änderungszeit)"""
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# =========================
+# Projekte aufbereiten
+# =========================
+def parse_api_date(value: Optional[str]) -> Optional[datetime]:
+    """Parst ein Blue Ant Datum ('2025-01-31' oder ISO mit Uhrzeit)"""
+    if not value:
+        return None
+    try:
+        date_str = value.replace("Z", "").replace("+00:00", "")
+        if "T" in date_str:
+            return datetime.fromisoformat(date_str).replace(tzinfo=None)
+        return datetime.strptime(date_str, "%Y-%m-%d")
+    except (ValueError, AttributeError):
+        return None
+
+
+def extract_milestones(planningentries: Optional[Dict[str, Any]]) -> Tuple[Milestone, ...]:
+    """Meilensteine = Planning Entries ohne Type"""
+    milestones = []
+
+    for pe in (planningentries or {}).get("planningEntries", []):
+        pe_type = pe.get("type")
+
+        if pe_type is None or pe_type == "":
+            planned = pe.get("plannedWork", 0)
+            actual = pe.get("actualWork", 0)
+
+            progress_ms = (actual / planned * 100) if planned > 0 else 0
+
+            milestones.append(Milestone(
+                name=pe.get("description", "Meilenstein"),
+                start=pe.get("start"),
+                end=pe.get("end"),
+                plannedWork=planned,
+                actualWork=actual,
+                progress=round(progress_ms, 1)
+            ))
+
+    return tuple(milestones)
+
+
+def classify_ampel(progress: float) -> Ampel:
+    """Statusampel aus dem Fortschritt"""
+    if progress >= 90:
+        return Ampel.GRUEN
+    elif progress >= 50:
+        return Ampel.GELB
+    elif progress > 0:
+        return Ampel.ROT
+    return Ampel.GRAU
+
+
+def build_project(entry: Dict[str, Any], work_plan: float, work_actual: float,
+                  status_info: Optional[Dict[str, Any]] = None) -> ProjectRecord:
+    """Baut einen Projekt-Record aus einem kombinierten Exporteintrag (Status ggf. aufgelöst)"""
+    project_data = entry.get("project_data", {}).get("project", {})
+    if status_info is None:
+        status_info = entry.get("status_info", {})
+
+    name = project_data.get("name", "Unbekannt")
+    number = project_data.get("number", "-")
+
+    progress = (work_actual / work_plan * 100) if work_plan > 0 else 0.0
+    phase = status_info.get("phase")
+
+    return ProjectRecord(
+        key=f"{name} ({number})",
+        name=name,
+        number=number,
+        plan=work_plan,
+        actual=work_actual,
+        variance=work_actual - work_plan,
+        progress=progress,
+        status=sys.intern(status_name(status_info)),
+        phase=sys.intern(str(phase)) if phase is not None else "Unbekannt",
+        ampel=classify_ampel(progress),
+        milestones=extract_milestones(entry.get("planningentries", {})),
+        status_text=project_data.get("statusMemo", ""),
+        subject_text=project_data.get("subjectMemo", ""),
+        start_date=project_data.get("start"),
+        end_date=project_data.get("end"),
+        project_id=project_data.get("id")
+    )
+
+
+def build_projects(raw_data: List[Dict[str, Any]],
+                   kpi_store: Optional[KPIStore] = None,
+                   resolved: Optional[ResolvedView] = None) -> Tuple[List[ProjectRecord], Counter]:
+    """
+    Baut die Projektliste des Dashboards aus den kombinierten Exportdaten.
+
+    Mit `resolved` (aufgelöste Masterdata derselben Daten) kommen Status und
+    Phase von dort statt aus `status_info` der Einträge.
+    """
+    if kpi_store is None:
+        kpi_store = KPIStore.from_combined(raw_data)
+
+    work_plan_column = kpi_store.column("WorkTotalPlan")
+    work_actual_column = kpi_store.column("WorkTotalActual")
+    status_infos = resolved.status_infos() if resolved is not None else [None] * len(raw_data)
+
+    projects = [
+        build_project(entry, float(work_plan_column[pos]), float(work_actual_column[pos]), status_infos[pos])
+        for pos, entry in enumerate(raw_data)
+    ]
+    return projects, status_counts(projects)
+
+
+# =========================
+# Kritikalität
+# =========================
+# Standard-Regelwerk (blue_ant_rules.DEFAULT_CONFIG), eigene per Datei
+DEFAULT_RULES = CriticalityRules.default()
+
+
+def is_overdue(milestone: Milestone, today: datetime) -> bool:
+    """Meilenstein nicht abgeschlossen und Enddatum überschritten"""
+    if milestone.progress >= 100:
+        return False
+    end_date = parse_api_date(milestone.end)
+    return end_date is not None and end_date < today
+
+
+def overdue_counts(projects: Sequence[ProjectRecord], today: datetime) -> np.ndarray:
+    """Überfällige Meilensteine je Projekt wie is_overdue (jedes Enddatum wird nur einmal geparst)"""
+    late_by_end: Dict[Optional[str], bool] = {}
+    counts = np.zeros(len(projects), dtype=int)
+    for pos, project in enumerate(projects):
+        overdue = 0
+        for milestone in project.milestones:
+            if milestone.progress >= 100:
+                continue
+            late = late_by_end.get(milestone.end)
+            if late is None:
+                end_date = parse_api_date(milestone.end)
+                late = late_by_end[milestone.end] = end_date is not None and end_date < today
+            overdue += late
+        counts[pos] = overdue
+    return counts
+
+
+def project_table(projects: Sequence[ProjectRecord], today: Optional[datetime] = None,
+                  keyword_hits: Optional[Set[int]] = None,
+                  keywords: Sequence[str] = CRITICAL_KEYWORDS,
+                  columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Spaltentabelle der Projekte für das Regelwerk (siehe blue_ant_rules.COLUMNS).
+
+    Mit `columns` werden nur diese Spalten berechnet. `keyword_hits` kommt
+    aus dem Volltextindex; ohne Index werden die Statustexte nach
+    `keywords` durchsucht.
+    """
+    today = today or datetime.now()
+    count = len(projects)
+    builders = {
+        "plan": lambda: np.fromiter((p.plan for p in projects), dtype=float, count=count),
+        "actual": lambda: np.fromiter((p.actual for p in projects), dtype=float, count=count),
+        "variance": lambda: np.fromiter((p.variance for p in projects), dtype=float, count=count),
+        "progress": lambda: np.fromiter((p.progress for p in projects), dtype=float, count=count),
+        "ampel": lambda: np.array([p.ampel.value for p in projects], dtype=object),
+        "status": lambda: np.array([p.status for p in projects], dtype=object),
+        "milestones": lambda: np.fromiter((len(p.milestones) for p in projects), dtype=int, count=count),
+        "overdue_milestones": lambda: overdue_counts(projects, today),
+        "keyword_hit": lambda: np.fromiter((
+            bool(p.status_text) and any(word in p.status_text.lower() for word in keywords)
+            if keyword_hits is None else p.project_id in keyword_hits
+            for p in projects
+        ), dtype=bool, count=count),
+    }
+    return {name: builders[name]() for name in (columns if columns is not None else builders)}
+
+
+def _score(value: float):
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def assess_portfolio(projects: Sequence[ProjectRecord], today: Optional[datetime] = None,
+                     keyword_hits: Optional[Set[int]] = None,
+                     rules: Optional[CriticalityRules] = None) -> List[Criticality]:
+    """Kritikalität aller Projekte, eine vektorisierte Auswertung des Regelwerks"""
+    rules = rules or DEFAULT_RULES
+    result = rules.evaluate(project_table(projects, today, keyword_hits, rules.keywords, rules.columns))
+    return [
+        Criticality(score=_score(score), reasons=reasons, is_critical=critical)
+        for score, reasons, critical in zip(result.scores.tolist(), result.reasons(),
+                                            result.is_critical.tolist())
+    ]
+
+
+def with_criticality(projects: Iterable[ProjectRecord], today: Optional[datetime] = None,
+                     keyword_hits: Optional[Set[int]] = None,
+                     rules: Optional[CriticalityRules] = None) -> List[ProjectRecord]:
+    """Neue Records inklusive Kritikalität (die Eingabe bleibt unverändert)"""
+    projects = list(projects)
+    return [
+        replace(p, criticality=criticality)
+        for p, criticality in zip(projects, assess_portfolio(projects, today, keyword_hits, rules))
+    ]
+
+
+def assess_criticality(project: ProjectRecord, today: Optional[datetime] = None,
+                       keyword_hit: Optional[bool] = None,
+                       rules: Optional[CriticalityRules] = None) -> Criticality:
+    """
+    Bewertet die Kritikalität eines einzelnen Projekts.
+
+    Für ganze Portfolios `assess_portfolio` verwenden (eine Auswertung für alle).
+    """
+    keyword_hits = None if keyword_hit is None else ({project.project_id} if keyword_hit else set())
+    return assess_portfolio([project], today, keyword_hits, rules)[0]
+
+
+def unique_keys(projects: Sequence[ProjectRecord]) -> List[ProjectRecord]:
+    """
+    Projekte mit eindeutigem `key`.
+
+    "Name (Nummer)" ist nicht eindeutig (z. B. in der zusammengeführten Datei
+    mehrerer Mandanten); doppelte Keys bekommen die Projekt-ID angehängt, ohne
+    ID bzw. bei gleicher ID die Position im Portfolio.
+    """
+    counts = Counter(p.key for p in projects)
+    if len(counts) == len(projects):
+        return list(projects)
+
+    taken = set(counts)
+    result = []
+    for pos, p in enumerate(projects):
+        if counts[p.key] > 1:
+            key = f"{p.key} #{p.project_id}" if p.project_id is not None else f"{p.key} #{pos + 1}"
+            suffix = 1
+            while key in taken:
+                key = f"{p.key} #{pos + 1}" if suffix == 1 else f"{p.key} #{pos + 1}.{suffix}"
+                suffix += 1
+            taken.add(key)
+            p = replace(p, key=key)
+        result.append(p)
+
+    duplicates = sorted(key for key, n in counts.items() if n > 1)
+    warnings.warn(f"{len(duplicates)} doppelte Projekt-Keys eindeutig gemacht: {', '.join(duplicates[:5])}"
+                  + (", ..." if len(duplicates) > 5 else ""), stacklevel=2)
+    return result
+
+
+def rank_critical(projects: Iterable[ProjectRecord], top: Optional[int] = None) -> List[ProjectRecord]:
+    """Kritische Projekte absteigend nach Score"""
+    critical = [p for p in projects if p.criticality.is_critical]
+    ranked = sorted(critical, key=lambda x: x.criticality.score, reverse=True)
+    return ranked[:top] if top else ranked
+
+
+# =========================
+# Portfolio-Kennzahlen
+# =========================
+def filter_projects(projects: Iterable[ProjectRecord], status_filter: Iterable[str],
+                    ampel_filter: Iterable[str]) -> List[ProjectRecord]:
+    status_filter = set(status_filter)
+    ampel_filter = set(ampel_filter)
+    return [
+        p for p in projects
+        if p.status in status_filter
+           and p.ampel in ampel_filter
+    ]
+
+
+def portfolio_totals(projects: List[ProjectRecord]) -> PortfolioTotals:
+    total_projects = len(projects)
+    total_plan = sum(p.plan for p in projects)
+    total_actual = sum(p.actual for p in projects)
+    avg_progress = sum(p.progress for p in projects) / total_projects if total_projects > 0 else 0
+
+    return {
+        "count": total_projects,
+        "plan": total_plan,
+        "actual": total_actual,
+        "variance": total_actual - total_plan,
+        "avg_progress": avg_progress,
+    }
+
+
+def status_counts(projects: Iterable[ProjectRecord]) -> Counter:
+    return Counter(p.status for p in projects)
+
+
+def ampel_counts(projects: Iterable[ProjectRecord]) -> Counter:
+    return Counter(p.ampel for p in projects)
+
+
+def portfolio_view(projects: Iterable[ProjectRecord], status_counter: Dict[str, int],
+                   status_filter: Iterable[str], ampel_filter: Iterable[str]) -> PortfolioView:
+    """Alle Kennzahlen der Portfolio-Übersicht für eine Filterkombination"""
+    status_filter = set(status_filter)
+    filtered = filter_projects(projects, status_filter, ampel_filter)
+
+    return {
+        "projects": tuple(filtered),
+        "totals": portfolio_totals(filtered),
+        "status_counts": {s: n for s, n in status_counter.items() if s in status_filter},
+        "ampel_counts": dict(ampel_counts(filtered)),
+        "critical_projects": tuple(rank_critical(filtered)),
+    }
+
+
+# =========================
+# Aggregat-Würfel
+# =========================
+CUBE_DIMENSIONS = ("status", "ampel", "critical", "phase")
+CUBE_MEASURES = ("count", "plan", "actual", "progress")
+
+
+class PortfolioCube:
+    """
+    Vorberechnete Summen je Zelle Status × Ampel × kritisch × Phase.
+
+    Einmal pro Datenversion aufgebaut (schreibgeschützt, von allen Sessions
+    geteilt). Kennzahlen einer Filterkombination entstehen durch Summieren
+    weniger Zellen statt durch einen Durchlauf über alle Projekte.
+    """
+
+    def __init__(self, projects: Sequence[ProjectRecord], status_values: Optional[Iterable[str]] = None):
+        self.projects = tuple(projects)
+        count = len(self.projects)
+        self.values: Dict[str, List[Any]] = {
+            "status": list(status_values if status_values is not None
+                           else dict.fromkeys(p.status for p in self.projects)),
+            "ampel": list(Ampel),
+            "critical": [False, True],
+            "phase": sorted({p.phase for p in self.projects}),
+        }
+        self._positions = {dim: {v: i for i, v in enumerate(values)} for dim, values in self.values.items()}
+
+        critical = [bool(p.criticality and p.criticality.is_critical) for p in self.projects]
+        self.codes = {
+            "status": np.fromiter((self._positions["status"][p.status] for p in self.projects), int, count),
+            "ampel": np.fromiter((p.ampel.code for p in self.projects), int, count),
+            "critical": np.array(critical, dtype=int),
+            "phase": np.fromiter((self._positions["phase"][p.phase] for p in self.projects), int, count),
+        }
+        measures = np.zeros((count, len(CUBE_MEASURES)))
+        measures[:, 0] = 1
+        measures[:, 1] = [p.plan for p in self.projects]
+        measures[:, 2] = [p.actual for p in self.projects]
+        measures[:, 3] = [p.progress for p in self.projects]
+
+        self.cells = np.zeros(tuple(len(v) for v in self.values.values()) + (len(CUBE_MEASURES),))
+        np.add.at(self.cells, tuple(self.codes[dim] for dim in CUBE_DIMENSIONS), measures)
+        self.cells.flags.writeable = False
+        # Projektwerte für Auswahlen quer zu den Dimensionen (z. B. Custom Fields)
+        self.measures = measures
+        self.measures.flags.writeable = False
+
+        # Kritische Projekte einmal absteigend nach Score (stabil wie rank_critical)
+        ranked = sorted((pos for pos in range(count) if critical[pos]),
+                        key=lambda pos: self.projects[pos].criticality.score, reverse=True)
+        self._ranking = np.array(ranked, dtype=int)
+
+    def _index(self, dim: str, selected: Optional[Iterable[Any]]) -> np.ndarray:
+        if selected is None:
+            return np.arange(len(self.values[dim]))
+        positions = self._positions[dim]
+        return np.array(sorted({positions[v] for v in selected if v in positions}), dtype=int)
+
+    def select(self, status: Optional[Iterable[str]] = None, ampel: Optional[Iterable[str]] = None,
+               critical: Optional[Iterable[bool]] = None, phase: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Teilwürfel der gewählten Werte (None = alle), letzte Achse: CUBE_MEASURES"""
+        filters = dict(zip(CUBE_DIMENSIONS, (status, ampel, critical, phase)))
+        return self.cells[np.ix_(*(self._index(dim, filters[dim]) for dim in CUBE_DIMENSIONS))]
+
+    def totals(self, **filters) -> PortfolioTotals:
+        return self._totals(self.select(**filters).reshape(-1, len(CUBE_MEASURES)).sum(axis=0))
+
+    @staticmethod
+    def _totals(sums: np.ndarray) -> PortfolioTotals:
+        count, plan, actual, progress = sums
+        count = int(count)
+        return {
+            "count": count,
+            "plan": float(plan),
+            "actual": float(actual),
+            "variance": float(actual - plan),
+            "avg_progress": float(progress) / count if count > 0 else 0,
+        }
+
+    def counts(self, dim: str, **filters) -> Dict[Any, int]:
+        """Projekte je Wert einer Dimension (nur vorhandene Werte)"""
+        axis = CUBE_DIMENSIONS.index(dim)
+        sums = self.select(**filters)[..., 0].sum(axis=tuple(i for i in range(len(CUBE_DIMENSIONS)) if i != axis))
+        return {self.values[dim][i]: int(n) for i, n in zip(self._index(dim, filters.get(dim)).tolist(), sums) if n}
+
+    def _counts(self, dim: str, selected: np.ndarray) -> Dict[Any, int]:
+        counts = np.bincount(self.codes[dim][selected], minlength=len(self.values[dim]))
+        return {self.values[dim][i]: int(counts[i]) for i in np.flatnonzero(counts).tolist()}
+
+    def mask(self, **filters) -> np.ndarray:
+        """Auswahl je Projekt (für die Projektlisten einer Filterkombination)"""
+        selected = np.ones(len(self.projects), dtype=bool)
+        for dim, values in filters.items():
+            if values is not None:
+                selected &= np.isin(self.codes[dim], self._index(dim, values))
+        return selected
+
+    def view(self, status_filter: Iterable[str], ampel_filter: Iterable[str],
+             phase_filter: Optional[Iterable[str]] = None,
+             mask: Optional[np.ndarray] = None) -> PortfolioView:
+        """
+        Wie portfolio_view, Kennzahlen aus den Zellen statt aus allen Projekten.
+
+        `mask` schränkt zusätzlich je Projekt ein (z. B. Custom Fields); die
+        Kennzahlen kommen dann aus den Projektwerten der Auswahl.
+        """
+        filters = {"status": set(status_filter), "ampel": set(ampel_filter),
+                   "phase": set(phase_filter) if phase_filter is not None else None}
+        selected = self.mask(**filters)
+        if mask is None:
+            totals = self.totals(**filters)
+            status_counts = self.counts("status", status=filters["status"], phase=filters["phase"])
+            ampel_counts = self.counts("ampel", **filters)
+        else:
+            selected &= mask
+            totals = self._totals(self.measures[selected].sum(axis=0))
+            status_counts = self._counts("status", self.mask(status=filters["status"], phase=filters["phase"]) & mask)
+            ampel_counts = self._counts("ampel", selected)
+        return {
+            "projects": tuple(self.projects[pos] for pos in np.flatnonzero(selected).tolist()),
+            "totals": totals,
+            "status_counts": status_counts,
+            "ampel_counts": ampel_counts,
+            "critical_projects": tuple(self.projects[pos] for pos in self._ranking[selected[self._ranking]].tolist()),
+        }
+
+
+FRAME_COLUMNS = ["key", "name", "number", "plan", "actual", "variance", "progress",
+                 "status", "ampel", "project_id"]
+
+
+def projects_frame(projects: Iterable[ProjectRecord]) -> pd.DataFrame:
+    """Skalare Projektfelder als DataFrame (für Charts, ohne Meilensteine/Texte)"""
+    projects = list(projects)
+    frame = pd.DataFrame(
+        [[getattr(p, c) for c in FRAME_COLUMNS] for p in projects],
+        columns=FRAME_COLUMNS,
+    )
+    frame["ampel"] = frame["ampel"].astype(str)
+    frame["criticality"] = [p.criticality.score if p.criticality else 0 for p in projects]
+    return frame
+
+
+# =========================
+# Export-Zeilen
+# =========================
+def export_rows(projects: Iterable[ProjectRecord], style: str = "excel") -> List[Dict[str, Any]]:
+    """Zeilen für den Excel-, CSV- oder JSON-Export"""
+    if style == "json":
+        return [{
+            "name": p.name,
+            "number": p.number,
+            "status": p.status,
+            "ampel": p.ampel,
+            "plan": p.plan,
+            "actual": p.actual,
+            "variance": p.variance,
+            "progress": p.progress,
+            "criticality": dict(p.criticality)
+        } for p in projects]
+
+    rows = []
+    for p in projects:
+        row = {
+            "Projektname": p.name,
+            "Nummer": p.number,
+            "Status": p.status,
+            "Ampel": p.ampel,
+            "Plan (h)": p.plan,
+            "Ist (h)": p.actual,
+            "Abweichung (h)": p.variance,
+            "Fortschritt (%)": round(p.progress, 2),
+            "Kritikalität": p.criticality.score
+        }
+        if style == "excel":
+            row["Kritisch"] = "Ja" if p.criticality.is_critical else "Nein"
+        rows.append(row)
+    return rows
+
+
+# =========================
+# Portfolio & Cache
+# =========================
+class Portfolio:
+    """
+    Aufbereitetes Portfolio einer Datenversion (Projekte inkl. Kritikalität).
+
+    Das Portfolio ist unveränderlich und wird von allen Sessions geteilt:
+    Records sind Slot-Dataclasses (nach dem Bau unverändert) mit eindeutigem
+    `key` (siehe unique_keys), Listen sind Tupel, die KPI-Arrays sind
+    schreibgeschützt. Die Rohdaten werden nach dem Aufbau nicht gehalten;
+    für Textsuche und Schlüsselwort-Flags dient der Volltextindex, für
+    ähnliche Projekte der Ähnlichkeitsindex, für Status-Attribute und
+    Custom Fields die aufgelöste Masterdata.
+    """
+
+    def __init__(self, projects: Iterable[ProjectRecord], version: str, day: str,
+                 kpi_store: Optional[KPIStore] = None, text_index: Optional[TextIndex] = None,
+                 similarity_index: Optional[SimilarityIndex] = None,
+                 rules: Optional[CriticalityRules] = None,
+                 resolved: Optional[ResolvedView] = None):
+        self.projects = tuple(unique_keys(list(projects)))
+        self.version = version
+        self.day = day
+        self.kpi_store = kpi_store
+        self.text_index = text_index
+        self.similarity_index = similarity_index
+        self.rules = rules or DEFAULT_RULES
+        self.resolved = resolved
+        self.custom_fields: Optional[CustomFieldIndex] = resolved.custom_index if resolved is not None else None
+        # Status-Attribute (Farbe, Phase, sortIdx, ...) nach Anzeigename
+        self.statuses = MappingProxyType(resolved.status_table() if resolved is not None else {})
+        counter = status_counts(self.projects)
+        if self.statuses:
+            # Reihenfolge wie im Blue Ant Statusmodell, unbekannte Status zuletzt
+            order = {name: status.get("sortIdx") or 0 for name, status in self.statuses.items()}
+            counter = sorted(counter.items(), key=lambda item: (item[0] not in order, order.get(item[0], 0)))
+        self.status_counter = MappingProxyType(dict(counter))
+        self.cube = PortfolioCube(self.projects, self.status_counter.keys())
+        self._by_key = {p.key: p for p in self.projects}
+        # Position je Record (Identität): Views liefern dieselben Record-Objekte
+        self._positions = {id(p): pos for pos, p in enumerate(self.projects)}
+        self._by_id = {p.project_id: p for p in self.projects}
+
+    @classmethod
+    def from_combined(cls, raw_data: List[Dict[str, Any]], version: str = "",
+                      kpi_store: Optional[KPIStore] = None,
+                      today: Optional[datetime] = None,
+                      text_index: Optional[TextIndex] = None,
+                      similarity_index: Optional[SimilarityIndex] = None,
+                      rules: Optional[CriticalityRules] = None,
+                      resolved: Optional[ResolvedView] = None) -> "Portfolio":
+        today = today or datetime.now()
+        rules = rules or DEFAULT_RULES
+        if kpi_store is None:
+            kpi_store = KPIStore.from_combined(raw_data)
+        projects, _ = build_projects(raw_data, kpi_store, resolved)
+        keyword_hits = text_index.keyword_matches(rules.keywords) if text_index else None
+        return cls(with_criticality(projects, today, keyword_hits, rules), version,
+                   today.strftime("%Y-%m-%d"), kpi_store, text_index, similarity_index, rules, resolved)
+
+    def search(self, text: str, limit: int = 20) -> List[Tuple[ProjectRecord, float]]:
+        """Gerankte Volltextsuche (leer ohne Index)"""
+        if self.text_index is None:
+            return []
+        return [
+            (self._by_id[hit["project_id"]], hit["score"])
+            for hit in self.text_index.search(text, limit)
+            if hit["project_id"] in self._by_id
+        ]
+
+    def similar(self, project: ProjectRecord, k: int = 5) -> List[Tuple[ProjectRecord, float]]:
+        """Die k ähnlichsten Projekte (leer ohne Index)"""
+        if self.similarity_index is None:
+            return []
+        return [
+            (self._by_id[project_id], score)
+            for project_id, score in self.similarity_index.similar(project.project_id, k)
+            if project_id in self._by_id
+        ]
+
+    def project(self, key: str) -> Optional[ProjectRecord]:
+        return self._by_key.get(key)
+
+    def custom_mask(self, custom_filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Auswahl nach Custom Fields (siehe CustomFieldIndex.mask), None ohne Filter"""
+        if not custom_filter:
+            return None
+        if self.custom_fields is None:
+            raise KeyError("Keine Custom Fields aufgelöst (Masterdata fehlt)")
+        return self.custom_fields.mask(custom_filter)
+
+    def view(self, status_filter: Iterable[str], ampel_filter: Iterable[str],
+             phase_filter: Optional[Iterable[str]] = None,
+             custom_filter: Optional[Dict[str, Any]] = None) -> PortfolioView:
+        return self.cube.view(status_filter, ampel_filter, phase_filter, self.custom_mask(custom_filter))
+
+    def custom_breakdown(self, name: str, projects: Iterable[ProjectRecord]) -> List[Dict[str, Any]]:
+        """Anzahl, Plan- und Ist-Aufwand je Wert eines kategorialen Custom Fields"""
+        column = self.custom_fields[name]
+        selected = np.zeros(len(self.projects), dtype=bool)
+        selected[[self._positions[id(p)] for p in projects]] = True
+        counts = column.counts(selected)
+        plan = column.sums(self.cube.measures[:, 1], selected)
+        actual = column.sums(self.cube.measures[:, 2], selected)
+        return [{"value": value, "count": count, "plan": plan[value], "actual": actual[value]}
+                for value, count in counts.items()]
+
+
+class AnalyticsCache:
+    """
+    Prozessweiter LRU-Cache für Portfolio-Berechnungen.
+
+    Schlüssel sind (Datenversion, Tag, Filter), damit Ergebnisse über
+    Sessions und Reruns hinweg wiederverwendet werden können.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+
+        value = compute()
+
+        with self._lock:
+            self.misses += 1
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def portfolio(self, path: str, today: Optional[datetime] = None,
+                  loader: Callable[[str], List[Dict[str, Any]]] = load_combined,
+                  rules: Optional[CriticalityRules] = None) -> Portfolio:
+        """Portfolio einer Exportdatei, gecacht pro Datenversion, Regelwerk und Tag"""
+        today = today or datetime.now()
+        version = data_version(path) if rules is None else f"{data_version(path)}-{rules.version}"
+        key = ("portfolio", version, today.strftime("%Y-%m-%d"))
+
+        def compute() -> Portfolio:
+            raw_data = loader(path)
+            return Portfolio.from_combined(raw_data, version, today=today, rules=rules,
+                                           resolved=load_resolved(path, raw_data))
+        return self.get_or_compute(key, compute)
+
+    def view(self, portfolio: Portfolio, status_filter: Iterable[str],
+             ampel_filter: Iterable[str], phase_filter: Optional[Iterable[str]] = None,
+             custom_filter: Optional[Dict[str, Any]] = None) -> PortfolioView:
+        """Portfolio-Kennzahlen, gecacht pro Datenversion, Tag und Filterkombination"""
+        status_filter = list(status_filter)
+        ampel_filter = list(ampel_filter)
+        phase_filter = list(phase_filter) if phase_filter is not None else None
+        # Bereiche (von, bis) als Tupel, Wertauswahlen als Menge
+        custom_key = tuple(sorted(
+            (name, selection if isinstance(selection, tuple) else frozenset(selection))
+            for name, selection in (custom_filter or {}).items()
+        ))
+        key = ("view", portfolio.version, portfolio.day,
+               frozenset(status_filter), frozenset(ampel_filter),
+               frozenset(phase_filter) if phase_filter is not None else None, custom_key)
+        return self.get_or_compute(
+            key, lambda: portfolio.view(status_filter, ampel_filter, phase_filter, custom_filter)
+        )
+
+
+# Gemeinsamer Cache für alle Sessions eines Prozesses
+ANALYTICS_CACHE = AnalyticsCache()
@@ -0,0 +1,260 @@
+"""
+Änderungsfeed zwischen zwei Exporten.
+
+Vergleicht zwei kombinierte Exportdateien über die Projekt-ID. Jeder
+Datensatz bekommt einen Inhalts-Hash; Projekte mit gleichem Hash werden
+ohne weitere Arbeit übersprungen, nur neue, gelöschte und geänderte
+Projekte werden aufbereitet und verglichen. Ergebnis ist ein kompakter
+Ereignisstrom (NDJSON, ein Ereignis pro Zeile):
+
+    project_added / project_removed
+    status_changed      Projektstatus
+    ampel_changed       Statusampel
+    work_changed        Plan-/Ist-Aufwand (mit Delta)
+    overrun_started     Ist-Aufwand übersteigt erstmals den Plan
+    milestone_moved     Meilenstein-Ende verschoben (Tage)
+    milestone_added / milestone_removed
+
+Das Dashboard zeigt die Ereignisse im Bereich "Was hat sich geändert?";
+über `ChangeSet.touched_entries` und `removed` lassen sich nachgelagerte
+Indizes (z. B. der Ähnlichkeitsindex) inkrementell fortschreiben.
+
+    python blue_ant_changes.py                       # zwei neueste Exporte
+    python blue_ant_changes.py alt.json neu.json --out changes.ndjson --append
+"""
+import argparse
+import glob
+import hashlib
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Tuple
+
+from backend.BlueAntData_Archive import FULL, ExportArchive, archive_root_for
+from backend.BlueAntData_Enrichment import MasterdataLookup, resolve
+from backend.BlueAntData_JSON import dumps
+from backend.BlueAntData_SimilarityIndex import SimilarityIndex
+
+from blue_ant_analytics import ProjectRecord, build_projects, load_combined, parse_api_date
+
+
+SNAPSHOT_PATTERN = "blueant_combined_[0-9]*.json"
+
+# Aufwandsänderungen darunter (Stunden) sind kein Ereignis
+WORK_TOLERANCE = 0.5
+
+EVENT_LABELS = {
+    "project_added": "Neues Projekt",
+    "project_removed": "Projekt entfernt",
+    "status_changed": "Status geändert",
+    "ampel_changed": "Ampelwechsel",
+    "work_changed": "Aufwand geändert",
+    "overrun_started": "Neue Überschreitung",
+    "milestone_moved": "Meilenstein verschoben",
+    "milestone_added": "Neuer Meilenstein",
+    "milestone_removed": "Meilenstein entfernt",
+}
+
+
+def entry_id(entry: Dict[str, Any]) -> Any:
+    project = (entry.get("project_data") or {}).get("project") or {}
+    return entry.get("project_id", project.get("id"))
+
+
+def record_hash(entry: Dict[str, Any]) -> str:
+    """Inhalts-Hash eines kombinierten Datensatzes"""
+    return hashlib.sha1(dumps(entry)).hexdigest()[:16]
+
+
+def previous_snapshot(path: str) -> Optional[str]:
+    """Der Export vor `path`: im Exportarchiv laut Manifest, sonst im selben Verzeichnis"""
+    root = archive_root_for(path)
+    if root is not None:
+        archive = ExportArchive(root)
+        previous = archive.previous(os.path.basename(os.path.dirname(os.path.abspath(path))))
+        # Nur vollständig aufbewahrte Snapshots haben eine Datei (History-Store: None)
+        return archive.path(previous) if previous else None
+
+    files = sorted(glob.glob(os.path.join(os.path.dirname(path) or ".", SNAPSHOT_PATTERN)))
+    name = os.path.basename(path)
+    earlier = [f for f in files if os.path.basename(f) < name]
+    return earlier[-1] if earlier else None
+
+
+# =========================
+# Änderungen
+# =========================
+@dataclass
+class ChangeSet:
+    """Ereignisse zwischen zwei Exporten plus die betroffenen Projekt-IDs"""
+    old_snapshot: str
+    new_snapshot: str
+    added: List[Any] = field(default_factory=list)
+    removed: List[Any] = field(default_factory=list)
+    changed: List[Any] = field(default_factory=list)
+    unchanged: int = 0
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    touched_entries: List[Dict[str, Any]] = field(default_factory=list)
+
+    def counts(self) -> Counter:
+        return Counter(event["type"] for event in self.events)
+
+    def to_ndjson(self, path: str, append: bool = False):
+        with open(path, "ab" if append else "wb") as f:
+            for event in self.events:
+                f.write(dumps(event) + b"\n")
+
+    def apply_to_similarity_index(self, index: SimilarityIndex) -> Dict[str, int]:
+        """Schreibt den Ähnlichkeitsindex nur für die betroffenen Projekte fort"""
+        stats = index.update(self.touched_entries)
+        stats["removed"] = index.remove(self.removed)
+        stats["total"] = len(index)
+        return stats
+
+
+def _event(kind: str, project: ProjectRecord, snapshot: str, **details) -> Dict[str, Any]:
+    return {"type": kind, "snapshot": snapshot, "project_id": project.project_id,
+            "project": project.key, **details}
+
+
+def _milestone_events(old: ProjectRecord, new: ProjectRecord, snapshot: str) -> List[Dict[str, Any]]:
+    events = []
+    old_ends = {m.name: m.end for m in old.milestones}
+    new_ends = {m.name: m.end for m in new.milestones}
+
+    for name, end in new_ends.items():
+        if name not in old_ends:
+            events.append(_event("milestone_added", new, snapshot, milestone=name, new=end))
+        elif end != old_ends[name]:
+            old_date, new_date = parse_api_date(old_ends[name]), parse_api_date(end)
+            days = (new_date - old_date).days if old_date and new_date else None
+            events.append(_event("milestone_moved", new, snapshot, milestone=name,
+                                 old=old_ends[name], new=end, days=days))
+    for name, end in old_ends.items():
+        if name not in new_ends:
+            events.append(_event("milestone_removed", new, snapshot, milestone=name, old=end))
+    return events
+
+
+def compare_projects(old: ProjectRecord, new: ProjectRecord, snapshot: str = "") -> List[Dict[str, Any]]:
+    """Ereignisse zwischen zwei Ständen desselben Projekts"""
+    events = []
+    if old.status != new.status:
+        events.append(_event("status_changed", new, snapshot, old=old.status, new=new.status))
+    if old.ampel != new.ampel:
+        events.append(_event("ampel_changed", new, snapshot, old=str(old.ampel), new=str(new.ampel)))
+
+    plan_delta, actual_delta = new.plan - old.plan, new.actual - old.actual
+    if abs(plan_delta) >= WORK_TOLERANCE or abs(actual_delta) >= WORK_TOLERANCE:
+        events.append(_event("work_changed", new, snapshot,
+                             plan=new.plan, plan_delta=round(plan_delta, 1),
+                             actual=new.actual, actual_delta=round(actual_delta, 1)))
+    if new.plan > 0 and new.actual > new.plan and not (old.plan > 0 and old.actual > old.plan):
+        events.append(_event("overrun_started", new, snapshot,
+                             plan=new.plan, actual=new.actual, variance=round(new.variance, 1)))
+
+    events.extend(_milestone_events(old, new, snapshot))
+    return events
+
+
+def diff_combined(old_data: List[Dict[str, Any]], new_data: List[Dict[str, Any]],
+                  old_snapshot: str = "", new_snapshot: str = "",
+                  lookup: Optional[MasterdataLookup] = None) -> ChangeSet:
+    """
+    Vergleicht zwei kombinierte Exporte; unveränderte Projekte kosten nur einen Hash-Vergleich.
+
+    Mit `lookup` (Masterdata) werden Statusnamen auch für Exporte ohne
+    `status_info` aufgelöst.
+    """
+    old_index: Dict[Any, Tuple[str, Dict[str, Any]]] = {
+        entry_id(entry): (record_hash(entry), entry) for entry in old_data
+    }
+    changes = ChangeSet(old_snapshot, new_snapshot)
+    old_changed, new_changed, new_added = [], [], []
+    seen = set()
+
+    for entry in new_data:
+        project_id = entry_id(entry)
+        seen.add(project_id)
+        previous = old_index.get(project_id)
+        if previous is None:
+            changes.added.append(project_id)
+            new_added.append(entry)
+        elif previous[0] == record_hash(entry):
+            changes.unchanged += 1
+        else:
+            changes.changed.append(project_id)
+            old_changed.append(previous[1])
+            new_changed.append(entry)
+
+    removed_entries = [entry for project_id, (_, entry) in old_index.items() if project_id not in seen]
+    changes.removed = [entry_id(entry) for entry in removed_entries]
+    changes.touched_entries = new_added + new_changed
+
+    # Nur betroffene Projekte aufbereiten
+    old_entries, new_entries = old_changed + removed_entries, new_changed + new_added
+    old_records, _ = build_projects(old_entries, resolved=resolve(old_entries, lookup) if lookup else None)
+    new_records, _ = build_projects(new_entries, resolved=resolve(new_entries, lookup) if lookup else None)
+
+    for old, new in zip(old_records[:len(old_changed)], new_records[:len(new_changed)]):
+        changes.events.extend(compare_projects(old, new, new_snapshot))
+    for new in new_records[len(new_changed):]:
+        changes.events.append(_event("project_added", new, new_snapshot,
+                                     status=new.status, ampel=str(new.ampel), plan=new.plan))
+    for old in old_records[len(old_changed):]:
+        changes.events.append(_event("project_removed", old, new_snapshot, status=old.status))
+    return changes
+
+
+def diff_files(old_path: str, new_path: str) -> ChangeSet:
+    # Statusmodell aus der Masterdata des neueren Exports (falls vorhanden)
+    return diff_combined(load_combined(old_path), load_combined(new_path),
+                         os.path.basename(old_path), os.path.basename(new_path),
+                         MasterdataLookup.for_data_file(new_path))
+
+
+# =========================
+# CLI
+# =========================
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Änderungen zwischen zwei Blue Ant Exporten")
+    parser.add_argument("old", nargs="?", help="Älterer Export (Default: vorletzter im Archiv bzw. in backend/)")
+    parser.add_argument("new", nargs="?", help="Neuerer Export (Default: neuester im Archiv bzw. in backend/)")
+    parser.add_argument("--out", default="blueant_changes.ndjson", help="NDJSON-Ausgabe")
+    parser.add_argument("--append", action="store_true", help="An bestehenden Feed anhängen")
+    parser.add_argument("--similarity-index", default=None,
+                        help="Ähnlichkeitsindex (.npz) nur für geänderte Projekte fortschreiben")
+    args = parser.parse_args()
+
+    if args.old and args.new:
+        old_path, new_path = args.old, args.new
+    else:
+        archive = ExportArchive()
+        files = [archive.path(name) for name in archive.names(FULL)]
+        if len(files) < 2:
+            files = sorted(glob.glob(os.path.join("backend", SNAPSHOT_PATTERN)))
+        if len(files) < 2:
+            print("❌ Mindestens zwei Exporte nötig")
+            return 1
+        old_path, new_path = files[-2], files[-1]
+
+    changes = diff_files(old_path, new_path)
+    changes.to_ndjson(args.out, append=args.append)
+
+    print(f"🔄 {os.path.basename(old_path)} → {os.path.basename(new_path)}")
+    print(f"   {len(changes.added)} neu, {len(changes.removed)} entfernt, "
+          f"{len(changes.changed)} geändert, {changes.unchanged} unverändert")
+    for kind, count in changes.counts().most_common():
+        print(f"   {EVENT_LABELS.get(kind, kind)}: {count}")
+    print(f"💾 {len(changes.events)} Ereignisse: {args.out}")
+
+    if args.similarity_index:
+        index = SimilarityIndex.load_or_create(args.similarity_index)
+        print(f"🧭 Ähnlichkeitsindex: {changes.apply_to_similarity_index(index)}")
+        index.save(args.similarity_index)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Hintergrund-Jobs für das Dashboard.
+
+Lange Aufgaben (KI-Analysen, Excel-Export) laufen nicht im Skript-Thread von
+Streamlit, sondern in einem gemeinsamen Thread-Pool. Das Skript startet einen
+Job, rendert sofort weiter und zeigt beim nächsten Lauf Fortschritt bzw.
+Ergebnis an:
+- Jobs sind über einen Schlüssel adressiert (z. B. Analyseart, Datenstand,
+  Projekt); derselbe Schlüssel liefert den laufenden oder fertigen Job, auch
+  nach einem Rerun oder aus einer anderen Session
+- der Job meldet Fortschritt über `job.report(done, total, text)`
+- Ergebnisse bleiben `ttl` Sekunden nach Abschluss abrufbar, insgesamt
+  höchstens `max_jobs` abgeschlossene Jobs
+
+    jobs = JobManager(max_workers=4)
+    job = jobs.submit("excel:abc", build_excel, rows, label="Excel-Export")
+    ...
+    job = jobs.get("excel:abc")
+    if job.state == DONE:
+        data = job.result
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, List, Callable
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+STATE_LABELS = {QUEUED: "wartet", RUNNING: "läuft", DONE: "fertig", FAILED: "fehlgeschlagen"}
+
+
+def job_key(*parts: Any) -> str:
+    """Schlüssel aus Analyseart, Datenstand, Projekt-ID, ..."""
+    return ":".join(str(part) for part in parts)
+
+
+class Job:
+    """Zustand eines Hintergrund-Jobs (wird vom Worker-Thread fortgeschrieben)"""
+
+    __slots__ = ("key", "label", "state", "progress", "message", "result", "error",
+                 "submitted", "started", "finished", "future")
+
+    def __init__(self, key: str, label: str):
+        self.key = key
+        self.label = label
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.future: Optional[Future] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in (DONE, FAILED) and self.finished is not None
+
+    @property
+    def elapsed(self) -> float:
+        """Laufzeit in Sekunden (bis jetzt bzw. bis zum Abschluss)"""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def report(self, done: float, total: Optional[float] = None, text: Optional[str] = None):
+        """Fortschritt melden: `done` von `total` Schritten (ohne total: Anteil 0-1)"""
+        self.progress = min(1.0, max(0.0, done / total if total else done))
+        if text is not None:
+            self.message = text
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """Blockierend auf das Ergebnis warten (CLI, Tests)"""
+        if self.future is not None:
+            self.future.exception(timeout)
+        if self.state == FAILED:
+            raise RuntimeError(self.error)
+        return self.result
+
+
+class JobManager:
+    """
+    Job-Registry mit Thread-Pool, gemeinsam für alle Sessions.
+
+    `submit(key, fn, *args)` ruft `fn(job, *args)` im Pool auf; der Rückgabewert
+    landet in `job.result`, eine Exception als Text in `job.error`.
+    """
+
+    def __init__(self, max_workers: int = 4, ttl: float = 3600.0, max_jobs: int = 200):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    # =========================
+    # Starten
+    # =========================
+    def submit(self, key: str, fn: Callable[..., Any], *args, label: str = "",
+               restart: bool = False, **kwargs) -> Job:
+        """
+        Startet einen Job, falls unter `key` keiner wartet oder läuft.
+
+        Ein abgeschlossener Job wird zurückgegeben, solange er gültig ist;
+        mit `restart=True` (oder nach einem Fehler) wird er neu gestartet.
+        """
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(key)
+            if job is not None and (not job.done or (job.state == DONE and not restart)):
+                return job
+
+            job = Job(key, label or key)
+            self._jobs[key] = job
+            job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+            return job
+
+    @staticmethod
+    def _run(job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        job.started = time.time()
+        job.state = RUNNING
+        # `finished` vor dem Zustand setzen: andere Threads lesen ihn, sobald `done` gilt
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.progress = 1.0
+            job.finished = time.time()
+            job.state = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.finished = time.time()
+            job.state = FAILED
+
+    # =========================
+    # Abfragen
+    # =========================
+    def get(self, key: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(key) if key is not None else None
+
+    def jobs(self) -> List[Job]:
+        """Alle bekannten Jobs, neueste zuerst"""
+        with self._lock:
+            self._prune()
+            return sorted(self._jobs.values(), key=lambda job: job.submitted, reverse=True)
+
+    def _prune(self):
+        """Abgelaufene Ergebnisse verwerfen, dann die ältesten über `max_jobs` hinaus"""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.done]
+        for job in finished:
+            if now - job.finished > self.ttl:
+                del self._jobs[job.key]
+        finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.finished)
+        for job in finished[:max(0, len(finished) - self.max_jobs)]:
+            del self._jobs[job.key]
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            states = Counter(job.state for job in self._jobs.values())
+            return {state: states.get(state, 0) for state in STATE_LABELS}
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,191 @@
+from typing import Dict, Any, List, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+TOTAL_PERIOD = "TOTAL"
+# KPIs ohne `period` bekommen eine eigene Periode (zählen nicht als TOTAL)
+NO_PERIOD = ""
+
+
+class KPIStore:
+    """
+    Kompakter KPI-Speicher im Long-Format.
+
+    Alle KPIs aller Projekte und Perioden werden beim Laden genau einmal
+    eingelesen und als NumPy-Arrays (Projekt, KPI, Periode, Wert) abgelegt.
+    KPI-IDs und Perioden werden dabei auf Integer-Codes abgebildet.
+    Die Arrays sind nach (KPI, Periode, Projekt) sortiert, dadurch ist jede
+    Spalte "eine KPI in einer Periode für alle Projekte" ein zusammenhängender
+    Slice, der per Binärsuche gefunden wird.
+    """
+
+    def __init__(self, project_ids: List[Any], kpi_ids: List[str], periods: List[str],
+                 project_idx: np.ndarray, kpi_idx: np.ndarray, period_idx: np.ndarray,
+                 values: np.ndarray):
+        self.project_ids = list(project_ids)
+        self.kpi_ids = list(kpi_ids)
+        self.periods = list(periods)
+
+        self._project_pos = {pid: i for i, pid in enumerate(self.project_ids)}
+        self._kpi_pos = {k: i for i, k in enumerate(self.kpi_ids)}
+        self._period_pos = {p: i for i, p in enumerate(self.periods)}
+
+        # Sortieren nach (KPI, Periode, Projekt) und Duplikate entfernen (letzter Wert gewinnt)
+        keys = self._keys(kpi_idx.astype(np.int64), period_idx.astype(np.int64), project_idx.astype(np.int64))
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        keep = np.append(keys[1:] != keys[:-1], True) if len(keys) else np.zeros(0, dtype=bool)
+
+        self._keys_sorted = keys[keep]
+        self.project_idx = project_idx[order][keep]
+        self.kpi_idx = kpi_idx[order][keep]
+        self.period_idx = period_idx[order][keep]
+        self.values = values[order][keep]
+
+        # Der Speicher wird von allen Sessions geteilt -> schreibgeschützt
+        for arr in (self._keys_sorted, self.project_idx, self.kpi_idx, self.period_idx, self.values):
+            arr.flags.writeable = False
+
+    # =========================
+    # Aufbau
+    # =========================
+    @classmethod
+    def from_combined(cls, raw_data: List[Dict[str, Any]]) -> "KPIStore":
+        """Liest alle KPIs aus den kombinierten Exportdaten (ein Durchlauf)"""
+        project_ids = []
+        kpi_codes: Dict[str, int] = {}
+        period_codes: Dict[str, int] = {}
+
+        project_idx = []
+        kpi_idx = []
+        period_idx = []
+        values = []
+
+        for pos, entry in enumerate(raw_data):
+            project_id = entry.get("project_id")
+            if project_id is None:
+                project_id = (entry.get("project_data") or {}).get("project", {}).get("id")
+            project_ids.append(project_id)
+
+            for kpi in (entry.get("kpis") or {}).get("kpis", []):
+                kpi_id = kpi.get("id")
+                if kpi_id is None:
+                    continue
+
+                value = kpi.get("value")
+                try:
+                    value = float(value) if value is not None else np.nan
+                except (TypeError, ValueError):
+                    continue
+
+                period = kpi.get("period") or NO_PERIOD
+
+                project_idx.append(pos)
+                kpi_idx.append(kpi_codes.setdefault(kpi_id, len(kpi_codes)))
+                period_idx.append(period_codes.setdefault(period, len(period_codes)))
+                values.append(value)
+
+        return cls(
+            project_ids=project_ids,
+            kpi_ids=list(kpi_codes),
+            periods=list(period_codes),
+            project_idx=np.asarray(project_idx, dtype=np.int32),
+            kpi_idx=np.asarray(kpi_idx, dtype=np.int32),
+            period_idx=np.asarray(period_idx, dtype=np.int32),
+            values=np.asarray(values, dtype=np.float64),
+        )
+
+    def _keys(self, kpi_idx, period_idx, project_idx):
+        n_projects = max(len(self.project_ids), 1)
+        n_periods = max(len(self.periods), 1)
+        return (kpi_idx * n_periods + period_idx) * n_projects + project_idx
+
+    def _block(self, kpi_id: str, period: str) -> slice:
+        """Slice aller Einträge einer KPI in einer Periode"""
+        k = self._kpi_pos.get(kpi_id)
+        p = self._period_pos.get(period)
+        if k is None or p is None:
+            return slice(0, 0)
+
+        n_projects = max(len(self.project_ids), 1)
+        start_key = self._keys(k, p, 0)
+        start = int(np.searchsorted(self._keys_sorted, start_key, side="left"))
+        end = int(np.searchsorted(self._keys_sorted, start_key + n_projects, side="left"))
+        return slice(start, end)
+
+    # =========================
+    # Zugriff
+    # =========================
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def project_position(self, project_id: Any) -> Optional[int]:
+        """Position eines Projekts in der Reihenfolge der Exportdaten"""
+        return self._project_pos.get(project_id)
+
+    def column(self, kpi_id: str, period: str = TOTAL_PERIOD, default: float = 0.0) -> np.ndarray:
+        """Eine KPI in einer Periode für alle Projekte (in Export-Reihenfolge)"""
+        out = np.full(len(self.project_ids), default, dtype=np.float64)
+        block = self._block(kpi_id, period)
+        vals = self.values[block]
+        out[self.project_idx[block]] = np.where(np.isnan(vals), default, vals)
+        return out
+
+    def value(self, project_id: Any, kpi_id: str, period: str = TOTAL_PERIOD,
+              default: float = 0.0) -> float:
+        """Einzelwert einer KPI für ein Projekt"""
+        pos = self._project_pos.get(project_id)
+        k = self._kpi_pos.get(kpi_id)
+        p = self._period_pos.get(period)
+        if pos is None or k is None or p is None:
+            return default
+
+        key = self._keys(k, p, pos)
+        i = int(np.searchsorted(self._keys_sorted, key))
+        if i < len(self._keys_sorted) and self._keys_sorted[i] == key:
+            val = float(self.values[i])
+            return default if np.isnan(val) else val
+        return default
+
+    def pivot(self, kpi_ids: Optional[Iterable[str]] = None, period: str = TOTAL_PERIOD,
+              default: float = 0.0) -> pd.DataFrame:
+        """Projekte x KPIs für eine Periode"""
+        kpi_ids = list(kpi_ids) if kpi_ids is not None else self.kpi_ids
+        return pd.DataFrame(
+            {kpi_id: self.column(kpi_id, period, default) for kpi_id in kpi_ids},
+            index=pd.Index(self.project_ids, name="project_id"),
+        )
+
+    def periodic(self, kpi_id: str, exclude: Iterable[str] = (TOTAL_PERIOD, NO_PERIOD)) -> pd.DataFrame:
+        """Projekte x Perioden für eine KPI (z. B. für Zeitreihen-Charts)"""
+        exclude = set(exclude)
+        periods = [p for p in self.periods if p not in exclude]
+        return pd.DataFrame(
+            {period: self.column(kpi_id, period, np.nan) for period in periods},
+            index=pd.Index(self.project_ids, name="project_id"),
+        )
+
+    def project_kpis(self, project_id: Any) -> pd.DataFrame:
+        """Alle KPIs eines Projekts als Tabelle KPI x Periode"""
+        pos = self._project_pos.get(project_id)
+        if pos is None:
+            return pd.DataFrame()
+
+        mask = self.project_idx == pos
+        frame = pd.DataFrame({
+            "kpi_id": np.asarray(self.kpi_ids, dtype=object)[self.kpi_idx[mask]],
+            "period": np.asarray(self.periods, dtype=object)[self.period_idx[mask]],
+            "value": self.values[mask],
+        })
+        return frame.pivot(index="kpi_id", columns="period", values="value")
+
+    def to_frame(self) -> pd.DataFrame:
+        """Gesamter Speicher als Long-Format-Tabelle mit kategorialen Spalten"""
+        return pd.DataFrame({
+            "project_id": np.asarray(self.project_ids, dtype=object)[self.project_idx],
+            "kpi_id": pd.Categorical.from_codes(self.kpi_idx, categories=self.kpi_ids),
+            "period": pd.Categorical.from_codes(self.period_idx, categories=self.periods),
+            "value": self.values,
+        })
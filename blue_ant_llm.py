@@ -0,0 +1,300 @@
+"""
+KI-Aufrufe (Ollama) für das Dashboard.
+
+`LLMScheduler` verteilt Prompts auf eine feste Anzahl Worker-Threads:
+- unabhängige Prompts eines Projekts laufen parallel (bis `max_parallel`)
+- identische Prompts, die bereits warten oder laufen, werden über alle
+  Sessions zu einer Anfrage zusammengefasst (alle erhalten dasselbe Future)
+- die Warteschlange ist priorisiert: INTERACTIVE (Klick im Dashboard) vor
+  BACKGROUND (Batch-Analysen)
+- `metrics()` liefert Warteschlangenlänge, laufende Anfragen, Latenzen und
+  Prompt-Größen
+
+`MockOllamaServer` beantwortet /api/generate lokal mit einstellbarer Latenz,
+um das Dashboard ohne Modell (und mit langsamen Antworten) zu testen:
+
+    python blue_ant_llm.py --port 11500 --latency 30
+    BLUEANT_OLLAMA_URL=http://127.0.0.1:11500/api/generate streamlit run blue_ant_project_dashboard.py
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import queue
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Callable
+
+import requests
+
+
+# Prioritäten (kleiner = wichtiger)
+INTERACTIVE = 0
+BACKGROUND = 10
+
+# Grobe Schätzung für deutschen Text mit dem Llama-3-Tokenizer
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Geschätzte Tokenzahl (ohne Tokenizer, Zeichen / CHARS_PER_TOKEN)"""
+    return int(len(text or "") / CHARS_PER_TOKEN + 0.5)
+
+
+def ollama_generate(prompt: str, model: str, url: str, timeout: float = 90) -> str:
+    """Ein nicht-streamender Generate-Request an Ollama"""
+    r = requests.post(
+        url,
+        json={"model": model, "prompt": prompt, "stream": False},
+        timeout=timeout
+    )
+    r.raise_for_status()
+    return r.json()["response"]
+
+
+class _Job:
+    __slots__ = ("key", "prompt", "priority", "future", "submitted", "started")
+
+    def __init__(self, key: str, prompt: str, priority: int):
+        self.key = key
+        self.prompt = prompt
+        self.priority = priority
+        self.future: Future = Future()
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+
+
+class LLMScheduler:
+    """
+    Priorisierte, zusammenfassende Warteschlange für LLM-Anfragen.
+
+        scheduler = LLMScheduler(lambda p: ollama_generate(p, "llama3", url), max_parallel=2)
+        futures = scheduler.submit_many({"risk": risk_prompt, "opt": opt_prompt})
+        results = {name: f.result() for name, f in futures.items()}
+    """
+
+    def __init__(self, generate: Callable[[str], str], max_parallel: int = 2,
+                 latency_window: int = 200):
+        self.generate = generate
+        self.max_parallel = max_parallel
+
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._workers = []
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._waits: deque = deque(maxlen=latency_window)
+        self._prompt_tokens: deque = deque(maxlen=latency_window)
+
+    @staticmethod
+    def job_key(prompt: str) -> str:
+        return hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+
+    # =========================
+    # Einreihen
+    # =========================
+    def submit(self, prompt: str, priority: int = INTERACTIVE) -> Future:
+        """Reiht einen Prompt ein; läuft derselbe Prompt schon, wird dessen Future geteilt"""
+        key = self.job_key(prompt)
+
+        with self._lock:
+            self.submitted += 1
+            job = self._jobs.get(key)
+            if job is not None:
+                self.coalesced += 1
+                if priority < job.priority and job.started is None:
+                    # Wartender Job wird höher priorisiert, der alte Eintrag wird übersprungen
+                    job.priority = priority
+                    self._queue.put((priority, next(self._seq), job))
+                return job.future
+
+            job = _Job(key, prompt, priority)
+            self._jobs[key] = job
+            self._prompt_tokens.append(estimate_tokens(prompt))
+            self._queue.put((priority, next(self._seq), job))
+            self._ensure_workers()
+
+        return job.future
+
+    def submit_many(self, prompts: Dict[str, str], priority: int = INTERACTIVE) -> Dict[str, Future]:
+        """Mehrere unabhängige Prompts auf einmal (laufen parallel)"""
+        return {name: self.submit(prompt, priority) for name, prompt in prompts.items()}
+
+    def _ensure_workers(self):
+        while len(self._workers) < self.max_parallel:
+            worker = threading.Thread(target=self._work, name=f"llm-worker-{len(self._workers)}",
+                                      daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    # =========================
+    # Abarbeiten
+    # =========================
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lock:
+                if job.started is not None or job.future.done():
+                    continue  # veralteter Eintrag nach Umpriorisierung
+                job.started = time.monotonic()
+                self._waits.append(job.started - job.submitted)
+
+            try:
+                job.future.set_result(self.generate(job.prompt))
+                failed = False
+            except Exception as e:
+                job.future.set_exception(e)
+                failed = True
+
+            with self._lock:
+                self._jobs.pop(job.key, None)
+                self._latencies.append(time.monotonic() - job.started)
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+
+    # =========================
+    # Kennzahlen
+    # =========================
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.started is not None)
+            latencies = list(self._latencies)
+            waits = list(self._waits)
+            prompt_tokens = list(self._prompt_tokens)
+            return {
+                "queue_depth": len(self._jobs) - running,
+                "in_flight": running,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "completed": self.completed,
+                "failed": self.failed,
+                "latency_avg": statistics.fmean(latencies) if latencies else 0.0,
+                "latency_p95": (statistics.quantiles(latencies, n=20)[-1]
+                                if len(latencies) >= 2 else (latencies[0] if latencies else 0.0)),
+                "wait_avg": statistics.fmean(waits) if waits else 0.0,
+                "prompt_tokens_avg": statistics.fmean(prompt_tokens) if prompt_tokens else 0.0,
+                "prompt_tokens_max": max(prompt_tokens, default=0),
+            }
+
+
+# =========================
+# Mock-Server für Tests
+# =========================
+class MockOllamaServer:
+    """Lokaler Ersatz für Ollama (/api/generate, nicht streamend) mit künstlicher Latenz"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 latency_jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/generate"
+
+    def start(self) -> "MockOllamaServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def generate(self, body: Dict[str, Any]) -> tuple:
+        """(HTTP-Status, Antwort) für einen Generate-Request"""
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.error_count += 1
+        time.sleep(delay)
+        if failed:
+            return 500, {"error": "mock: simulated failure"}
+
+        prompt = body.get("prompt", "")
+        first_line = next((line for line in prompt.splitlines() if line.strip()), "")
+        return 200, {
+            "model": body.get("model", ""),
+            "response": f"**Mock-Antwort** nach {delay:.1f}s auf: {first_line[:120]}\n\n"
+                        f"- Prompt mit ca. {estimate_tokens(prompt)} Tokens erhalten",
+            "done": True,
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                if self.path.rstrip("/") == "/api/generate":
+                    status, payload = server.generate(body)
+                else:
+                    status, payload = 404, {"error": f"unknown path {self.path}"}
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler Ollama Mock-Server (langsame KI simulieren)")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=5.0, help="Antwortzeit in Sekunden")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Zufällige Zusatzlatenz in Sekunden")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil fehlerhafter Antworten (0-1)")
+    args = parser.parse_args()
+
+    mock = MockOllamaServer(port=args.port, latency=args.latency, latency_jitter=args.jitter,
+                            error_rate=args.error_rate)
+    print(f"🧪 Ollama Mock-Server: {mock.url} (Latenz {args.latency:.1f}s)")
+    try:
+        mock.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Mock-Server beendet")
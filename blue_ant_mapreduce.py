@@ -0,0 +1,255 @@
+"""
+Portfolio-Analyse über alle Projekte (Map-Reduce).
+
+Ein einzelner Prompt fasst nicht das ganze Portfolio. Deshalb:
+- Map: Projekte werden in Batches (stabil nach Key sortiert) zusammengefasst;
+  die Batches laufen parallel über den LLMScheduler (Priorität BACKGROUND)
+- Reduce: Batch-Zusammenfassungen werden in Gruppen zu je `fan_in`
+  zusammengeführt, Ebene für Ebene, bis eine übrig ist
+- Final: Executive Summary aus Portfolio-Kennzahlen und Gesamtergebnis
+
+Zwischenergebnisse werden je Prompt gecacht. Der Prompt enthält die
+Projektdaten, ein Batch wird also nur neu berechnet, wenn sich eines seiner
+Projekte geändert hat. Die Laufzeit ist begrenzt: Batches, die bis zum
+Zeitlimit nicht fertig sind, werden durch eine aus den Daten berechnete
+Zusammenfassung ersetzt (und laufen im Hintergrund für den nächsten Lauf
+weiter).
+"""
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, as_completed, TimeoutError as FutureTimeout
+from typing import Dict, Any, Optional, List, Callable, Sequence
+
+from blue_ant_analytics import ProjectRecord
+from blue_ant_llm import BACKGROUND, LLMScheduler
+from blue_ant_prompts import clean_memo, trim_to_tokens
+
+
+# Projekte je Map-Batch (wird bei großen Portfolios erhöht, siehe MAX_BATCHES)
+BATCH_SIZE = 25
+# Obergrenze der Map-Aufrufe pro Lauf (begrenzt die Laufzeit auf CPU-Modellen)
+MAX_BATCHES = 16
+# Zusammenfassungen je Reduce-Aufruf
+FAN_IN = 6
+# Token-Budget für die Projektzeilen eines Batches
+BATCH_TOKENS = 2500
+# Token-Budget einer Zusammenfassung (Fallback und Reduce-Eingaben)
+SUMMARY_TOKENS = 400
+# Geschätzte Tokens einer Projektzeile ohne Statustext
+LINE_TOKENS = 45
+
+MAP_PROMPT = """Du bist Portfolio-Controller. Fasse die folgenden {count} Projekte für einen Portfoliobericht zusammen:
+
+{lines}
+
+Nenne in höchstens 8 Stichpunkten:
+- die kritischsten Projekte (Name, Grund)
+- wiederkehrende Risiken und Muster
+- auffällige Abweichungen bei Aufwand und Fortschritt
+Keine Einleitung, nur Stichpunkte."""
+
+REDUCE_PROMPT = """Führe die folgenden Teilberichte eines Projektportfolios zu einem Bericht zusammen:
+
+{summaries}
+
+Behalte die kritischsten Projekte mit Namen, fasse gemeinsame Risiken und Muster zusammen, entferne Dopplungen.
+Höchstens 10 Stichpunkte, keine Einleitung."""
+
+
+def project_line(project: ProjectRecord, memo_tokens: int = 0) -> str:
+    """Eine Zeile mit den Kennzahlen eines Projekts (optional mit gekürztem Statustext)"""
+    criticality = project.criticality
+    line = (
+        f"- {project.name} [{project.number}] | {project.status} | Ampel {project.ampel} | "
+        f"Fortschritt {project.progress:.0f}% | Abweichung {project.variance:+.0f}h"
+    )
+    if criticality and criticality.score:
+        line += f" | Kritikalität {criticality.score}: {_reasons(project)}"
+    if memo_tokens > 0 and project.status_text:
+        memo = trim_to_tokens(clean_memo(project.status_text), memo_tokens)
+        line += " | Status: " + memo.replace("\n", " / ")
+    return line
+
+
+def _score(project: ProjectRecord) -> int:
+    return project.criticality.score if project.criticality else 0
+
+
+def _reasons(project: ProjectRecord) -> str:
+    return ", ".join(reason.strip() for reason in project.criticality.reasons)
+
+
+def facts_summary(projects: Sequence[ProjectRecord], top: int = 5) -> str:
+    """Aus den Daten berechnete Zusammenfassung (Fallback ohne KI)"""
+    ampel = Counter(str(p.ampel) for p in projects)
+    critical = sorted((p for p in projects if p.criticality and p.criticality.is_critical),
+                      key=_score, reverse=True)
+    avg_progress = sum(p.progress for p in projects) / len(projects) if projects else 0.0
+    lines = [
+        f"- {len(projects)} Projekte, Ampel: "
+        + ", ".join(f"{name} {count}" for name, count in sorted(ampel.items())),
+        f"- Ø Fortschritt {avg_progress:.1f}%, Abweichung gesamt "
+        f"{sum(p.variance for p in projects):+.0f}h",
+    ]
+    if critical:
+        lines.append(f"- {len(critical)} kritisch, u.a.: " + "; ".join(
+            f"{p.name} (Score {_score(p)}: {_reasons(p)})" for p in critical[:top]
+        ))
+    return "\n".join(lines)
+
+
+class PortfolioMapReduce:
+    """
+    Map-Reduce-Analyse über einen LLMScheduler, von allen Sessions gemeinsam
+    genutzt (Cache der Zwischenergebnisse je Prompt).
+    """
+
+    def __init__(self, scheduler: LLMScheduler, batch_size: int = BATCH_SIZE,
+                 max_batches: int = MAX_BATCHES, fan_in: int = FAN_IN,
+                 priority: int = BACKGROUND, maxsize: int = 4096):
+        self.scheduler = scheduler
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.fan_in = fan_in
+        self.priority = priority
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # =========================
+    # Cache
+    # =========================
+    def _cached(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        return None
+
+    def _store(self, key: str, future: Future):
+        if future.exception() is not None:
+            return
+        with self._lock:
+            self._data[key] = future.result()
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    # =========================
+    # Stufen
+    # =========================
+    def map_prompts(self, projects: Sequence[ProjectRecord]) -> List[tuple]:
+        """(Prompt, Fallback) je Batch; kritischste Projekte zuerst, Rest bei Platzmangel als Kennzahlen"""
+        projects = sorted(projects, key=lambda p: p.key)
+        batch_size = max(self.batch_size, math.ceil(len(projects) / self.max_batches))
+        line_capacity = BATCH_TOKENS // LINE_TOKENS
+
+        stages = []
+        for start in range(0, len(projects), batch_size):
+            batch = projects[start:start + batch_size]
+            ranked = sorted(batch, key=_score, reverse=True)
+            listed, rest = ranked[:line_capacity], ranked[line_capacity:]
+            memo_tokens = BATCH_TOKENS // len(listed) - LINE_TOKENS
+
+            lines = [project_line(p, memo_tokens if memo_tokens >= 20 else 0) for p in listed]
+            if rest:
+                lines.append(f"Weitere {len(rest)} Projekte (nicht einzeln aufgeführt):\n"
+                             + facts_summary(rest, top=0))
+            stages.append((MAP_PROMPT.format(count=len(batch), lines="\n".join(lines)),
+                           facts_summary(batch)))
+        return stages
+
+    def reduce_groups(self, summaries: List[str]) -> List[List[str]]:
+        """Gruppen zu je fan_in (eine übrig bleibende Einzelne kommt zur vorigen Gruppe)"""
+        groups = [summaries[i:i + self.fan_in] for i in range(0, len(summaries), self.fan_in)]
+        if len(groups) > 1 and len(groups[-1]) == 1:
+            groups[-2].extend(groups.pop())
+        return groups
+
+    def _stage_count(self, batches: int) -> int:
+        count, n = batches + 1, batches
+        while n > 1:
+            n = len(self.reduce_groups([""] * n))
+            count += n
+        return count
+
+    def _run_stage(self, stages: List[tuple], deadline: float, stats: Dict[str, int],
+                   on_progress: Optional[Callable[[], None]] = None) -> List[str]:
+        results: List[Optional[str]] = [None] * len(stages)
+        pending: Dict[Future, int] = {}
+
+        for i, (prompt, _) in enumerate(stages):
+            key = self.scheduler.job_key(prompt)
+            cached = self._cached(key)
+            if cached is not None:
+                results[i] = cached
+                stats["cache_hits"] += 1
+                if on_progress:
+                    on_progress()
+                continue
+            future = self.scheduler.submit(prompt, self.priority)
+            future.add_done_callback(lambda f, key=key: self._store(key, f))
+            pending[future] = i
+            stats["llm_calls"] += 1
+
+        try:
+            for future in as_completed(pending, timeout=max(0.0, deadline - time.monotonic())):
+                if future.exception() is None:
+                    results[pending[future]] = future.result()
+                if on_progress:
+                    on_progress()
+        except FutureTimeout:
+            pass
+
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = stages[i][1]
+                stats["fallbacks"] += 1
+        return results
+
+    def run(self, projects: Sequence[ProjectRecord], final_prompt: Callable[[str], str],
+            time_budget: float = 600.0,
+            on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Analysiert alle Projekte. `final_prompt` erhält das zusammengeführte
+        Ergebnis und liefert den Prompt für den Abschlussbericht.
+
+        Zeitbudget: Map bis 60%, Reduce bis 85%, Abschlussbericht bis 100%.
+        """
+        started = time.monotonic()
+        stats = {"projects": len(projects), "batches": 0, "levels": 0,
+                 "llm_calls": 0, "cache_hits": 0, "fallbacks": 0}
+
+        map_stages = self.map_prompts(projects)
+        stats["batches"] = len(map_stages)
+        total = self._stage_count(len(map_stages))
+        done = 0
+
+        def progress():
+            nonlocal done
+            done += 1
+            if on_progress:
+                on_progress(min(done, total), total)
+
+        summaries = self._run_stage(map_stages, started + 0.6 * time_budget, stats, progress)
+
+        while len(summaries) > 1:
+            stats["levels"] += 1
+            summaries = self._run_stage([(
+                REDUCE_PROMPT.format(summaries="\n\n".join(
+                    f"TEILBERICHT {n}:\n{trim_to_tokens(summary, SUMMARY_TOKENS)}"
+                    for n, summary in enumerate(group, 1)
+                )),
+                trim_to_tokens("\n".join(group), SUMMARY_TOKENS * 2),
+            ) for group in self.reduce_groups(summaries)], started + 0.85 * time_budget, stats, progress)
+
+        merged_summary = summaries[0] if summaries else ""
+        # Ohne Abschlussbericht (Zeitlimit/Fehler) bleibt report None
+        report = self._run_stage([(final_prompt(merged_summary), None)],
+                                 started + time_budget, stats, progress)[0]
+
+        stats["seconds"] = round(time.monotonic() - started, 1)
+        if on_progress:
+            on_progress(total, total)
+        return {"report": report, "summary": merged_summary, "stats": stats}
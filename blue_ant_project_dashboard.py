@@ -1,11 +1,32 @@
+import hashlib
 import json
+import os
 import streamlit as st
-import requests
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from collections import Counter
+from concurrent.futures import as_completed
 from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Optional, Callable
+
+from blue_ant_analytics import (
+    ANALYTICS_CACHE, AMPEL_VALUES, Portfolio, data_version, export_rows, is_overdue, load_combined,
+    projects_frame
+)
+from blue_ant_changes import EVENT_LABELS, ChangeSet, diff_files, previous_snapshot
+from blue_ant_jobs import DONE, STATE_LABELS, Job, JobManager, job_key
+from blue_ant_llm import INTERACTIVE, LLMScheduler, ollama_generate
+from blue_ant_mapreduce import PortfolioMapReduce
+from blue_ant_prompts import PromptContextBuilder
+from blue_ant_rules import CriticalityRules, load_rules
+from blue_ant_sql import PortfolioSQL, open_text_index
+from backend.BlueAntData_Archive import latest_snapshot
+from backend.BlueAntData_CustomFields import EMPTY
+from backend.BlueAntData_Enrichment import load_resolved
+from backend.BlueAntData_RecordFile import RecordFile, open_records
+from backend.BlueAntData_SimilarityIndex import SimilarityIndex
+from backend.BlueAntData_TextIndex import strip_html
 
 # =========================
 # Konfiguration
@@ -59,43 +80,177 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_URL = os.environ.get("BLUEANT_OLLAMA_URL", "http://localhost:11434/api/generate")
 MODEL = "llama3"
+# Gleichzeitige Anfragen an Ollama (passend zu OLLAMA_NUM_PARALLEL des Servers)
+LLM_PARALLEL = int(os.environ.get("BLUEANT_LLM_PARALLEL", "2"))
+# Token-Budget je Memo-Feld im Prompt; lange Memos optional vorab vom Modell zusammenfassen
+PROMPT_FIELD_TOKENS = int(os.environ.get("BLUEANT_PROMPT_FIELD_TOKENS", "600"))
+PROMPT_SUMMARIZE = os.environ.get("BLUEANT_PROMPT_SUMMARIZE", "0") == "1"
+# Zeitlimit der Portfolio-Analyse über alle Projekte (Sekunden)
+MAPREDUCE_TIME_BUDGET = float(os.environ.get("BLUEANT_MAPREDUCE_SECONDS", "600"))
+# Kritikalitäts-Regelwerk (YAML/JSON, siehe blue_ant_rules.py); leer = Standard-Regelwerk
+CRITICALITY_RULES_FILE = os.environ.get("BLUEANT_CRITICALITY_RULES", "")
+# Hintergrund-Jobs (KI-Analysen, Excel-Export): Threads und Abfrageintervall der Fortschrittsanzeige
+JOB_WORKERS = int(os.environ.get("BLUEANT_JOB_WORKERS", "4"))
+JOB_POLL_SECONDS = float(os.environ.get("BLUEANT_JOB_POLL_SECONDS", "1"))
 
 # =========================
 # Daten laden
 # =========================
-@st.cache_data
-def load_data():
-    with open("backend/blueant_combined_20260118_184540.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+# Neuester Snapshot laut Manifest des Exportarchivs (BLUEANT_ARCHIVE_DIR, Default backend/archive);
+# ohne Archiv die bisherige Exportdatei
+DATA_FILE = latest_snapshot() or "backend/blueant_combined_20260118_184540.json"
+
+@st.cache_resource(max_entries=2, show_spinner="Lade Regelwerk...")
+def load_criticality_rules(path: str, version: str) -> CriticalityRules:
+    # Einmal kompiliert, neu nur bei geänderter Datei
+    return load_rules(path or None)
+
+def get_criticality_rules() -> CriticalityRules:
+    if not CRITICALITY_RULES_FILE:
+        return load_criticality_rules("", "")
+    try:
+        return load_criticality_rules(CRITICALITY_RULES_FILE, data_version(CRITICALITY_RULES_FILE))
+    except (OSError, ValueError, ImportError) as e:
+        st.warning(f"Regelwerk {CRITICALITY_RULES_FILE} nicht verwendbar, nutze Standard: {e}")
+        return load_criticality_rules("", "")
+
+@st.cache_resource(max_entries=2, show_spinner="Lade Portfolio...")
+def load_portfolio(version: str, day: str) -> Portfolio:
+    # Ein gemeinsames, schreibgeschütztes Modell für alle Sessions:
+    # cache_resource liefert jeder Session dieselbe Instanz (keine Kopie),
+    # die Rohdaten werden nach dem Aufbau verworfen
+    raw_data = load_combined(DATA_FILE)
+    return Portfolio.from_combined(
+        raw_data, version,
+        text_index=open_text_index(DATA_FILE, raw_data),
+        similarity_index=SimilarityIndex.for_data_file(DATA_FILE, raw_data),
+        rules=criticality_rules,
+        # Status, Phase und Custom Fields aus der Masterdata (.resolved neben DATA_FILE)
+        resolved=load_resolved(DATA_FILE, raw_data)
+    )
 
-raw_data = load_data()
+@st.cache_resource(max_entries=2, show_spinner="Lade SQL-Store...")
+def load_portfolio_sql(version: str, day: str) -> PortfolioSQL:
+    # SQL-Store des Exporters (.sqlite neben DATA_FILE) plus Dashboard-Kennzahlen
+    return PortfolioSQL.for_data_file(load_portfolio(version, day), DATA_FILE)
+
+@st.cache_resource(max_entries=2)
+def load_record_file(version: str) -> Optional[RecordFile]:
+    # Direktzugriff auf einzelne Rohdatensätze (.records neben DATA_FILE), falls vorhanden
+    return open_records(DATA_FILE)
+
+@st.cache_resource(max_entries=2, show_spinner="Vergleiche mit vorigem Export...")
+def load_changes(old_path: str, old_version: str, new_version: str) -> ChangeSet:
+    # Änderungsfeed gegenüber dem vorigen Export (neu nur bei neuer Datei)
+    return diff_files(old_path, DATA_FILE)
+
+# Pro Session bleibt nur der Filterzustand, alles andere wird referenziert
+# (die Version enthält das Regelwerk, damit gecachte Ansichten mitwechseln)
+criticality_rules = get_criticality_rules()
+portfolio = load_portfolio(f"{data_version(DATA_FILE)}-{criticality_rules.version}",
+                           datetime.now().strftime("%Y-%m-%d"))
+projects = portfolio.projects
+status_counter = portfolio.status_counter
+kpi_store = portfolio.kpi_store
 
 # =========================
 # Hilfsfunktionen
 # =========================
-def call_llama(prompt: str) -> str:
+@st.cache_resource
+def get_llm_scheduler() -> LLMScheduler:
+    # Eine Warteschlange für alle Sessions: gleiche Prompts werden zusammengefasst
+    return LLMScheduler(lambda prompt: ollama_generate(prompt, MODEL, OLLAMA_URL),
+                        max_parallel=LLM_PARALLEL)
+
+
+@st.cache_resource
+def get_prompt_builder() -> PromptContextBuilder:
+    # Kompakte Memos je Inhalt gecacht, für alle Sessions gemeinsam
+    summarize = None
+    if PROMPT_SUMMARIZE:
+        summarize = lambda prompt: get_llm_scheduler().submit(prompt).result()
+    return PromptContextBuilder(PROMPT_FIELD_TOKENS, summarize)
+
+
+@st.cache_resource
+def get_portfolio_mapreduce() -> PortfolioMapReduce:
+    # Zwischenergebnisse (Batch-Zusammenfassungen) für alle Sessions gemeinsam
+    return PortfolioMapReduce(get_llm_scheduler())
+
+
+def call_llama(prompt: str, priority: int = INTERACTIVE) -> str:
     try:
-        r = requests.post(
-            OLLAMA_URL,
-            json={"model": MODEL, "prompt": prompt, "stream": False},
-            timeout=90
-        )
-        r.raise_for_status()
-        return r.json()["response"]
+        return get_llm_scheduler().submit(prompt, priority).result()
     except Exception as e:
         return f"⚠️ KI-Fehler: {e}"
 
-# =========================
-# ❗❗❗ PROJEKTE AUFBEREITEN – HIER WAR DER FEHLER ❗❗❗
-# =========================
-projects = []
-status_counter = Counter()
+
+def call_llama_many(prompts: dict, priority: int = INTERACTIVE,
+                    on_progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """Mehrere unabhängige Prompts parallel; Ergebnis je Name"""
+    futures = get_llm_scheduler().submit_many(prompts, priority)
+    names = {future: name for name, future in futures.items()}
+    results = {}
+    for done, future in enumerate(as_completed(names), 1):
+        try:
+            results[names[future]] = future.result()
+        except Exception as e:
+            results[names[future]] = f"⚠️ KI-Fehler: {e}"
+        if on_progress:
+            on_progress(done, len(names))
+    return {name: results[name] for name in prompts}
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    # Ein Pool für alle Sessions; Ergebnisse überleben Reruns und Seitenwechsel
+    return JobManager(max_workers=JOB_WORKERS)
+
+
+def projects_fingerprint(items) -> str:
+    """Kurzer Schlüssel für eine Projektauswahl (Filterzustand)"""
+    return hashlib.sha1("\n".join(p["key"] for p in items).encode("utf-8")).hexdigest()[:12]
+
+
+def start_job(key: str, fn: Callable[..., object], *args, label: str) -> Job:
+    """Startet `fn(job, *args)` im Hintergrund und merkt den Job für diese Session"""
+    st.session_state.setdefault("job_keys", set()).add(key)
+    return get_job_manager().submit(key, fn, *args, label=label, restart=True)
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(key: str):
+    # Pollt nur diesen Ausschnitt; ist der Job fertig, wird die Seite mit Ergebnis neu aufgebaut
+    job = get_job_manager().get(key)
+    if job is None or job.done:
+        st.rerun()
+    st.progress(job.progress, text=f"{job.label}: {job.message or STATE_LABELS[job.state]} "
+                                   f"({job.elapsed:.0f}s)")
+
+
+def show_job(key: str, render: Callable[[object], None]):
+    """Fortschritt bzw. Ergebnis eines in dieser Session gestarteten Jobs anzeigen"""
+    if key not in st.session_state.get("job_keys", ()):
+        return
+    job = get_job_manager().get(key)
+    if job is None:
+        st.session_state["job_keys"].discard(key)
+    elif not job.done:
+        job_progress(key)
+    elif job.state == DONE:
+        render(job.result)
+        st.caption(f"{job.label} · {job.elapsed:.0f}s · {datetime.fromtimestamp(job.finished):%H:%M:%S}")
+    else:
+        st.error(f"⚠️ {job.label} fehlgeschlagen: {job.error}")
 
 
 def get_status_color(status_name: str) -> str:
-    """Gibt eine Farbe für den Projektstatus zurück"""
+    """Gibt eine Farbe für den Projektstatus zurück (Farbe aus dem Blue Ant Statusmodell, falls bekannt)"""
+    status = portfolio.statuses.get(status_name)
+    if status and status.get("color"):
+        return status["color"]
     colors = {
         "Abgeschlossen": "#00C851",
         "In Bearbeitung": "#33b5e5",
@@ -122,96 +277,6 @@ def get_ampel_color(ampel: str) -> str:
 
     return colors.get(ampel, "#78909c")
 
-
-for entry in raw_data:
-    # ✅ ZUERST Daten aus JSON holen
-    project_data = entry.get("project_data", {}).get("project", {})
-    kpis_data = entry.get("kpis", {})
-    planningentries = entry.get("planningentries", {})
-    status_info = entry.get("status_info", {})
-
-    # =========================
-    # Meilensteine bestimmen
-    # (Planning Entries ohne Type)
-    # =========================
-    milestones = []
-
-    for pe in planningentries.get("planningEntries", []):
-        pe_type = pe.get("type")
-
-        if pe_type is None or pe_type == "":
-            planned = pe.get("plannedWork", 0)
-            actual = pe.get("actualWork", 0)
-
-            progress_ms = (actual / planned * 100) if planned > 0 else 0
-
-            milestones.append({
-                "name": pe.get("description", "Meilenstein"),
-                "start": pe.get("start"),
-                "end": pe.get("end"),
-                "plannedWork": planned,
-                "actualWork": actual,
-                "progress": round(progress_ms, 1)
-            })
-
-    # =========================
-    # Projektdaten
-    # =========================
-    name = project_data.get("name", "Unbekannt")
-    number = project_data.get("number", "-")
-
-    # Status
-    status_name = status_info.get("name", "Unbekannt")
-    status_counter[status_name] += 1
-
-    # =========================
-    # KPIs
-    # =========================
-    work_plan = 0.0
-    work_actual = 0.0
-
-    for kpi in kpis_data.get("kpis", []):
-        if kpi.get("period") == "TOTAL":
-            if kpi.get("id") == "WorkTotalPlan":
-                work_plan = kpi.get("value", 0.0)
-            elif kpi.get("id") == "WorkTotalActual":
-                work_actual = kpi.get("value", 0.0)
-
-    # Fortschritt
-    progress = (work_actual / work_plan * 100) if work_plan > 0 else 0.0
-
-    # =========================
-    # Statusampel aus Fortschritt
-    # =========================
-    if progress >= 90:
-        ampel = "GRUEN"
-    elif progress >= 50:
-        ampel = "GELB"
-    elif progress > 0:
-        ampel = "ROT"
-    else:
-        ampel = "GRAU"
-
-    # =========================
-    # Projekt sammeln
-    # =========================
-    projects.append({
-        "key": f"{name} ({number})",
-        "name": name,
-        "number": number,
-        "plan": work_plan,
-        "actual": work_actual,
-        "variance": work_actual - work_plan,
-        "progress": progress,
-        "status": status_name,
-        "ampel": ampel,
-        "milestones": milestones,
-        "status_text": project_data.get("statusMemo", ""),
-        "subject_text": project_data.get("subjectMemo", ""),
-        "start_date": project_data.get("start"),
-        "end_date": project_data.get("end"),
-        "project_id": project_data.get("id")
-    })
 # =========================
 # Sidebar - Filter
 # =========================
@@ -222,9 +287,15 @@ with st.sidebar:
 
     all_project_keys = [p["key"] for p in projects]
 
+    # Deep-Link: ?project=<Projekt-ID> öffnet direkt die Detailanalyse
+    linked_project_id = st.query_params.get("project")
+    linked_index = next((i + 1 for i, p in enumerate(projects)
+                         if linked_project_id and str(p["project_id"]) == linked_project_id), 0)
+
     selected_project_sidebar = st.selectbox(
         "Springe zu Projekt",
         options=["-- Alle Projekte --"] + all_project_keys,
+        index=linked_index,
         help="Wähle ein spezifisches Projekt für die Detailanalyse"
     )
 
@@ -238,21 +309,83 @@ with st.sidebar:
 
     ampel_filter = st.multiselect(
         "Statusampel filtern",
-        options=["GRUEN", "GELB", "ROT", "GRAU"],
-        default=["GRUEN", "GELB", "ROT", "GRAU"]
+        options=AMPEL_VALUES,
+        default=AMPEL_VALUES
+    )
+
+    phase_values = portfolio.cube.values["phase"]
+    phase_filter = st.multiselect(
+        "Phase filtern",
+        options=phase_values,
+        default=phase_values,
+        format_func=lambda phase: f"Phase {phase}" if phase.isdigit() else phase,
+        help="Phase des Projektstatus im Blue Ant Statusmodell"
     )
 
+    # Custom Fields: Werte je Feld (kategorial) bzw. Bereich (Zahl/Datum);
+    # gefiltert wird erst, wenn die Auswahl vom vollen Umfang abweicht
+    custom_filter = {}
+    custom_fields = portfolio.custom_fields
+    if custom_fields:
+        with st.expander("Zusatzfelder filtern"):
+            for name in st.multiselect("Felder", options=custom_fields.names()):
+                column = custom_fields[name]
+                if column.kind == "category":
+                    options = column.categories + [EMPTY]
+                    selection = st.multiselect(
+                        name, options=options, default=options, key=f"custom_{name}",
+                        format_func=lambda value: "(leer)" if value is EMPTY else str(value)
+                    )
+                    if len(selection) < len(options):
+                        custom_filter[name] = selection
+                elif column.kind == "number":
+                    finite = column.values[~pd.isna(column.values)]
+                    low, high = float(finite.min()), float(finite.max())
+                    if low < high:
+                        selection = st.slider(name, low, high, (low, high), key=f"custom_{name}")
+                        if selection != (low, high):
+                            custom_filter[name] = selection
+                else:
+                    dates = column.values[~pd.isna(column.values)]
+                    full_range = (dates.min().item(), dates.max().item())
+                    selection = st.date_input(name, value=full_range, key=f"custom_{name}")
+                    if len(selection) == 2 and tuple(selection) != full_range:
+                        custom_filter[name] = tuple(selection)
+
     st.divider()
     show_critical_only = st.checkbox("Nur kritische Projekte anzeigen", value=False)
 
     st.divider()
     st.info("**Tipp:** Nutze die Filter, um spezifische Projektgruppen zu analysieren.")
 
-filtered_projects = [
-    p for p in projects
-    if p["status"] in status_filter
-       and p["ampel"] in ampel_filter
-]
+    with st.expander("KI-Warteschlange"):
+        llm_metrics = get_llm_scheduler().metrics()
+        st.caption(
+            f"Wartend: {llm_metrics['queue_depth']} · Laufend: {llm_metrics['in_flight']} "
+            f"(max. {LLM_PARALLEL})"
+        )
+        st.caption(
+            f"Anfragen: {llm_metrics['submitted']} · Zusammengefasst: {llm_metrics['coalesced']} · "
+            f"Fehler: {llm_metrics['failed']}"
+        )
+        st.caption(
+            f"Latenz Ø {llm_metrics['latency_avg']:.1f}s · p95 {llm_metrics['latency_p95']:.1f}s · "
+            f"Wartezeit Ø {llm_metrics['wait_avg']:.1f}s"
+        )
+        st.caption(
+            f"Prompt Ø {llm_metrics['prompt_tokens_avg']:.0f} Tokens · "
+            f"max. {llm_metrics['prompt_tokens_max']} Tokens"
+        )
+        context_stats = get_prompt_builder().stats()
+        st.caption(
+            f"Memos: {context_stats['raw_tokens']} → {context_stats['compact_tokens']} Tokens "
+            f"(Budget {context_stats['field_tokens']}/Feld) · gekürzt {context_stats['trimmed']} · "
+            f"zusammengefasst {context_stats['summarized']} · Cache-Treffer {context_stats['hits']}"
+        )
+
+view = ANALYTICS_CACHE.view(portfolio, status_filter, ampel_filter, phase_filter, custom_filter)
+filtered_projects = view["projects"]
+critical_projects = view["critical_projects"]
 
 if selected_project_sidebar != "-- Alle Projekte --":
     show_overview = False
@@ -268,10 +401,11 @@ st.header("  Portfolio-Übersicht")
 
 col1, col2, col3, col4 = st.columns(4)
 
-total_projects = len(filtered_projects)
-total_plan = sum(p["plan"] for p in filtered_projects)
-total_actual = sum(p["actual"] for p in filtered_projects)
-avg_progress = sum(p["progress"] for p in filtered_projects) / total_projects if total_projects > 0 else 0
+totals = view["totals"]
+total_projects = totals["count"]
+total_plan = totals["plan"]
+total_actual = totals["actual"]
+avg_progress = totals["avg_progress"]
 
 col1.metric("Projekte gesamt", total_projects, help="Anzahl gefilterter Projekte")
 col2.metric("Plan-Aufwand gesamt", f"{total_plan:,.0f} h", help="Gesamter geplanter Aufwand")
@@ -289,8 +423,7 @@ col_left, col_right = st.columns(2)
 with col_left:
     st.subheader("  Projektstatus-Verteilung")
 
-    status_df = pd.DataFrame(list(status_counter.items()), columns=["Status", "Anzahl"])
-    status_df = status_df[status_df["Status"].isin(status_filter)]
+    status_df = pd.DataFrame(list(view["status_counts"].items()), columns=["Status", "Anzahl"])
 
     if not status_df.empty:
         fig_status = px.pie(
@@ -310,8 +443,7 @@ with col_left:
 with col_right:
     st.subheader("  Statusampel-Verteilung")
 
-    ampel_counter = Counter(p["ampel"] for p in filtered_projects)
-    ampel_df = pd.DataFrame(list(ampel_counter.items()), columns=["Ampel", "Anzahl"])
+    ampel_df = pd.DataFrame(list(view["ampel_counts"].items()), columns=["Ampel", "Anzahl"])
 
     if not ampel_df.empty:
         fig_ampel = go.Figure(data=[
@@ -333,6 +465,20 @@ with col_right:
     else:
         st.info("Keine Daten für Ampel-Verteilung verfügbar")
 
+if custom_fields and custom_fields.names("category"):
+    st.subheader("  Verteilung nach Zusatzfeld")
+    group_field = st.selectbox("Zusatzfeld", options=custom_fields.names("category"))
+    group_df = pd.DataFrame(portfolio.custom_breakdown(group_field, filtered_projects))
+    if not group_df.empty:
+        group_df["value"] = ["(leer)" if v is EMPTY else str(v) for v in group_df["value"]]
+        fig_group = px.bar(
+            group_df, x="value", y="count", hover_data=["plan", "actual"],
+            labels={"value": group_field, "count": "Anzahl Projekte",
+                    "plan": "Plan-Aufwand (h)", "actual": "Ist-Aufwand (h)"}
+        )
+        fig_group.update_layout(height=350)
+        st.plotly_chart(fig_group, use_container_width=True)
+
 # =========================
 # Portfolio-Analyse
 # =========================
@@ -340,7 +486,7 @@ st.header("  Portfolio-Analyse")
 
 if filtered_projects:
     fig_scatter = px.scatter(
-        filtered_projects,
+        projects_frame(filtered_projects),
         x="progress",
         y="variance",
         size="plan",
@@ -371,65 +517,6 @@ else:
 # =========================
 st.header("  Kritikalitäts-Analyse")
 
-
-def assess_criticality(project):
-    """Bewertet Projektkritikalität"""
-    critical_reasons = []
-    score = 0
-
-    if project["ampel"] == "ROT":
-        critical_reasons.append("  Statusampel Rot")
-        score += 3
-    elif project["ampel"] == "GELB":
-        critical_reasons.append("  Statusampel Gelb")
-        score += 1
-
-    if project["progress"] < 80 and project["actual"] > project["plan"] * 0.8:
-        critical_reasons.append("  Hoher Aufwand bei geringem Fortschritt")
-        score += 2
-
-    if project["plan"] > 0 and project["variance"] > project["plan"] * 0.1:
-        critical_reasons.append(f"  Aufwandsüberschreitung: +{project['variance']:.0f}h")
-        score += 2
-
-    if project["status_text"]:
-        critical_keywords = ["verzˆger", "risiko", "problem", "kritisch", "gefahr", "schwierig"]
-        if any(word in project["status_text"].lower() for word in critical_keywords):
-            critical_reasons.append("  Kritische Hinweise im Statustext")
-            score += 1
-
-    overdue_milestones = 0
-    today = datetime.now()
-    for ms in project["milestones"]:
-        if ms["end"] and ms["progress"] < 100:
-            try:
-                end_str = ms["end"].replace("Z", "").replace("+00:00", "")
-                if "T" in end_str:
-                    end_date = datetime.fromisoformat(end_str)
-                else:
-                    end_date = datetime.strptime(end_str, "%Y-%m-%d")
-
-                if end_date < today:
-                    overdue_milestones += 1
-            except Exception as e:
-                pass
-
-    if overdue_milestones > 0:
-        critical_reasons.append(f"  {overdue_milestones}überfällige Meilensteine")
-        score += overdue_milestones
-
-    return {
-        "score": score,
-        "reasons": critical_reasons,
-        "is_critical": score >= 3
-    }
-
-
-for project in filtered_projects:
-    project["criticality"] = assess_criticality(project)
-
-critical_projects = [p for p in filtered_projects if p["criticality"]["is_critical"]]
-
 if show_critical_only:
     display_projects = critical_projects
 else:
@@ -438,7 +525,7 @@ else:
 if critical_projects:
     st.warning(f"  **{len(critical_projects)} von {len(filtered_projects)} Projekten als kritisch eingestuft**")
 
-    top_critical = sorted(critical_projects, key=lambda x: x["criticality"]["score"], reverse=True)[:5]
+    top_critical = critical_projects[:5]
 
     for i, proj in enumerate(top_critical, 1):
         with st.expander(f"#{i} {proj['name']} (Kritikalität: {proj['criticality']['score']})"):
@@ -453,6 +540,18 @@ if critical_projects:
 else:
     st.success("Keine kritischen Projekte identifiziert")
 
+with st.expander("Regelwerk der Kritikalität"):
+    rules = portfolio.rules
+    st.caption(f"Quelle: {rules.source} · kritisch ab Score {rules.threshold} · "
+               f"{rules.evaluations} Auswertungen, {rules.total_seconds * 1000:.2f} ms gesamt")
+    st.dataframe(pd.DataFrame([{
+        "Regel": stat["rule"],
+        "Bedingung": stat["when"],
+        "Punkte": str(stat["points"]),
+        "Treffer": stat["hits"],
+        "Laufzeit (ms)": stat["ms"],
+    } for stat in rules.stats()]), use_container_width=True, hide_index=True)
+
 st.divider()
 
 # =========================
@@ -464,12 +563,9 @@ if not display_projects:
     st.warning("Keine Projekte mit den aktuellen Filtereinstellungen gefunden.")
 else:
     if selected_project_key:
-        project = next((p for p in projects if p["key"] == selected_project_key), None)
+        project = portfolio.project(selected_project_key)
 
         if project:
-            if "criticality" not in project:
-                project["criticality"] = assess_criticality(project)
-
             st.info(f"  Ausgewähltes Projekt aus Sidebar: **{project['name']}**")
         else:
             st.error("Projekt nicht gefunden!")
@@ -561,6 +657,24 @@ else:
                 if project["end_date"]:
                     time_col2.write(f"**Ende:** {project['end_date'][:10]}")
 
+            similar_projects = portfolio.similar(project, k=5)
+            if similar_projects:
+                st.subheader("  Ähnliche Projekte")
+                st.dataframe(pd.DataFrame([{
+                    "Projekt": p["name"],
+                    "Status": p["status"],
+                    "Ampel": p["ampel"],
+                    "Fortschritt (%)": round(p["progress"], 1),
+                    "Abweichung (h)": round(p["variance"]),
+                    "Kritikalität": p["criticality"]["score"],
+                    "Ähnlichkeit": round(score, 2),
+                } for p, score in similar_projects]), use_container_width=True, hide_index=True)
+
+            record_file = load_record_file(portfolio.version)
+            if record_file is not None:
+                with st.expander("Rohdaten aus dem Export"):
+                    st.json(record_file.get(project["project_id"]) or {}, expanded=False)
+
         with tab2:
             st.subheader("  KI-Zusammenfassungen")
 
@@ -569,34 +683,44 @@ else:
             with col_sum1:
                 with st.container(border=True):
                     st.markdown("####   Projektstatus")
+                    status_key = job_key("sum_status", portfolio.version, project["project_id"])
                     if st.button("Status zusammenfassen", key="sum_status"):
-                        with st.spinner("KI analysiert Statustext..."):
-                            if project["status_text"]:
+                        if project["status_text"]:
+                            def summarize_status(job, status_text):
+                                job.report(0, text="KI analysiert Statustext...")
                                 prompt = f"""Fasse folgenden Projektstatus in maximal 3 prägnanten Stichpunkten zusammen:
 
-{project['status_text']}
+{get_prompt_builder().compact(status_text)}
 
 Fokussiere auf: Aktueller Stand, Probleme, nächste Schritte."""
-                                summary = call_llama(prompt)
-                                st.write(summary)
-                            else:
-                                st.info("Kein Statustext vorhanden")
+                                return call_llama(prompt)
+
+                            start_job(status_key, summarize_status, project["status_text"],
+                                      label="Status-Zusammenfassung")
+                        else:
+                            st.info("Kein Statustext vorhanden")
+                    show_job(status_key, st.write)
 
             with col_sum2:
                 with st.container(border=True):
                     st.markdown("####   Projektgegenstand")
+                    subject_key = job_key("sum_subject", portfolio.version, project["project_id"])
                     if st.button("Gegenstand zusammenfassen", key="sum_subject"):
-                        with st.spinner("KI analysiert Projektbeschreibung..."):
-                            if project["subject_text"]:
+                        if project["subject_text"]:
+                            def summarize_subject(job, subject_text):
+                                job.report(0, text="KI analysiert Projektbeschreibung...")
                                 prompt = f"""Fasse folgenden Projektgegenstand in maximal 3 prägnanten Stichpunkten zusammen:
 
-{project['subject_text']}
+{get_prompt_builder().compact(subject_text)}
 
 Fokussiere auf: Hauptziel, Umfang, Besonderheiten."""
-                                summary = call_llama(prompt)
-                                st.write(summary)
-                            else:
-                                st.info("Keine Projektbeschreibung vorhanden")
+                                return call_llama(prompt)
+
+                            start_job(subject_key, summarize_subject, project["subject_text"],
+                                      label="Gegenstand-Zusammenfassung")
+                        else:
+                            st.info("Keine Projektbeschreibung vorhanden")
+                    show_job(subject_key, st.write)
 
             with st.expander("  Originaltext Status anzeigen"):
                 st.text(project["status_text"] if project["status_text"] else "Nicht vorhanden")
@@ -614,18 +738,8 @@ Fokussiere auf: Hauptziel, Umfang, Besonderheiten."""
                 for ms in project["milestones"]:
                     status = "Abgeschlossen" if ms["progress"] >= 100 else "  In Arbeit"
 
-                    if ms["end"]:
-                        try:
-                            end_str = ms["end"].replace("Z", "").replace("+00:00", "")
-                            if "T" in end_str:
-                                end_date = datetime.fromisoformat(end_str)
-                            else:
-                                end_date = datetime.strptime(end_str, "%Y-%m-%d")
-
-                            if end_date < today and ms["progress"] < 100:
-                                status = "  Überfällig"
-                        except:
-                            pass
+                    if is_overdue(ms, today):
+                        status = "  Überfällig"
 
                     ms_data.append({
                         "Meilenstein": ms["name"],
@@ -663,9 +777,12 @@ Fokussiere auf: Hauptziel, Umfang, Besonderheiten."""
         with tab4:
             st.subheader("  KI-Gesamtbewertung")
 
+            analysis_key = job_key("analysis", portfolio.version, project["project_id"])
             if st.button("  Umfassende KI-Analyse starten", type="primary", use_container_width=True):
-                with st.spinner("Llama 3 analysiert das Projekt umfassend..."):
-                    # Baue umfassenden Kontext für KI
+                def analyze_project(job, project):
+                    job.report(0, text="Baue Projektkontext...")
+                    # Baue umfassenden Kontext für KI (Memos bereinigt und auf Budget gekürzt)
+                    memos = get_prompt_builder().project_fields(project)
                     context = f"""Projektname: {project['name']}
 Projektnummer: {project['number']}
 Status: {project['status']}
@@ -685,10 +802,13 @@ MEILENSTEINE:
 {len(project['milestones'])} Meilensteine definiert
 
 STATUSTEXT:
-{project['status_text'] if project['status_text'] else 'Nicht vorhanden'}
+{memos['status_text'] or 'Nicht vorhanden'}
 
 PROJEKTGEGENSTAND:
-{project['subject_text'] if project['subject_text'] else 'Nicht vorhanden'}"""
+{memos['subject_text'] or 'Nicht vorhanden'}
+
+VERGLEICHBARE PROJEKTE (Ähnlichkeitsindex):
+{chr(10).join(f"- {p['name']} ({p['status']}, Ampel {p['ampel']}): Fortschritt {p['progress']:.1f}%, Abweichung {p['variance']:+.0f}h, Kritikalität {p['criticality']['score']}" for p, _ in portfolio.similar(project, k=3)) or 'Keine'}"""
 
                     prompt = f"""Du bist ein erfahrener Projektcontroller. Analysiere folgendes Projekt und erstelle eine umfassende Bewertung:
 
@@ -704,20 +824,7 @@ Erstelle eine strukturierte Analyse mit folgenden Punkten:
 
 Sei präzise, objektiv und handlungsorientiert."""
 
-                    analysis = call_llama(prompt)
-                    st.markdown(analysis)
-
-                    st.divider()
-
-                    # Zusätzliche Analyse-Optionen
-                    st.subheader("  Weitere Analysen")
-
-                    col_ana1, col_ana2 = st.columns(2)
-
-                    with col_ana1:
-                        if st.button("  Risiko-Analyse", use_container_width=True):
-                            with st.spinner("Analysiere Projektrisiken..."):
-                                risk_prompt = f"""Analysiere die Risiken für folgendes Projekt:
+                    risk_prompt = f"""Analysiere die Risiken für folgendes Projekt:
 
 {context}
 
@@ -727,13 +834,8 @@ Identifiziere:
 3. GEGENSTEUERUNGSMASSNAHMEN
 
 Sei konkret und praxisorientiert."""
-                                risk_analysis = call_llama(risk_prompt)
-                                st.markdown(risk_analysis)
 
-                    with col_ana2:
-                        if st.button("  Optimierungspotenziale", use_container_width=True):
-                            with st.spinner("Suche Optimierungspotenziale..."):
-                                opt_prompt = f"""Identifiziere Optimierungspotenziale für folgendes Projekt:
+                    opt_prompt = f"""Identifiziere Optimierungspotenziale für folgendes Projekt:
 
 {context}
 
@@ -743,8 +845,36 @@ Finde:
 3. QUICK WINS (schnell umsetzbar)
 
 Priorisiere nach Impact und Umsetzbarkeit."""
-                                opt_analysis = call_llama(opt_prompt)
-                                st.markdown(opt_analysis)
+
+                    # Gesamt-, Risiko- und Optimierungsanalyse laufen parallel
+                    job.report(0, 3, "Llama 3 analysiert das Projekt umfassend...")
+                    return call_llama_many({
+                        "analysis": prompt,
+                        "risk": risk_prompt,
+                        "optimization": opt_prompt
+                    }, on_progress=lambda done, total: job.report(done, total, f"{done}/{total} Analysen fertig"))
+
+                start_job(analysis_key, analyze_project, project, label="KI-Gesamtbewertung")
+
+            def render_analysis(results: dict):
+                st.markdown(results["analysis"])
+
+                st.divider()
+
+                # Zusätzliche Analysen
+                st.subheader("  Weitere Analysen")
+
+                col_ana1, col_ana2 = st.columns(2)
+
+                with col_ana1:
+                    st.markdown("**  Risiko-Analyse**")
+                    st.markdown(results["risk"])
+
+                with col_ana2:
+                    st.markdown("**  Optimierungspotenziale**")
+                    st.markdown(results["optimization"])
+
+            show_job(analysis_key, render_analysis)
 
 # =========================
 # Portfolio-Gesamtanalyse
@@ -755,9 +885,15 @@ st.header("  Portfolio-Gesamtanalyse mit KI")
 col_portfolio1, col_portfolio2 = st.columns(2)
 
 with col_portfolio1:
+    use_mapreduce = st.toggle(
+        "Alle Projekte einzeln einbeziehen (Map-Reduce)", key="portfolio_mapreduce",
+        help="Fasst die Projekte in parallelen Batches zusammen und führt die Ergebnisse "
+             "stufenweise zusammen; Zwischenergebnisse werden je Projektstand gecacht."
+    )
+    health_key = job_key("portfolio_health", portfolio.version, projects_fingerprint(filtered_projects),
+                         "mapreduce" if use_mapreduce else "summary")
     if st.button("  Portfolio-Gesundheitscheck", type="primary", use_container_width=True):
-        with st.spinner("KI analysiert gesamtes Portfolio..."):
-            portfolio_context = f"""PORTFOLIO-‹BERSICHT:
+        portfolio_context = f"""PORTFOLIO-‹BERSICHT:
 Anzahl Projekte: {len(filtered_projects)}
 Gesamter Plan-Aufwand: {total_plan:.0f} Stunden
 Gesamter Ist-Aufwand: {total_actual:.0f} Stunden
@@ -770,11 +906,12 @@ KRITISCHE PROJEKTE:
 {len(critical_projects)} von {len(filtered_projects)} als kritisch eingestuft
 
 TOP 3 KRITISCHSTE PROJEKTE:
-{chr(10).join([f"- {p['name']}: Score {p['criticality']['score']}" for p in sorted(critical_projects, key=lambda x: x['criticality']['score'], reverse=True)[:3]]) if critical_projects else 'Keine kritischen Projekte'}"""
+{chr(10).join([f"- {p['name']}: Score {p['criticality']['score']}" for p in critical_projects[:3]]) if critical_projects else 'Keine kritischen Projekte'}"""
 
-            portfolio_prompt = f"""Du bist ein Senior Portfolio-Manager. Analysiere die Portfolio-Gesundheit:
+        def portfolio_prompt(context: str) -> str:
+            return f"""Du bist ein Senior Portfolio-Manager. Analysiere die Portfolio-Gesundheit:
 
-{portfolio_context}
+{context}
 
 Erstelle einen Executive Summary mit:
 1. GESAMTBEWERTUNG (Ampel + 2-3 Sätze)
@@ -785,25 +922,58 @@ Erstelle einen Executive Summary mit:
 
 Sei strategisch und C-Level-orientiert."""
 
-            portfolio_analysis = call_llama(portfolio_prompt)
-            st.markdown(portfolio_analysis)
+        def check_portfolio(job, selected_projects):
+            if not use_mapreduce:
+                job.report(0, text="KI analysiert gesamtes Portfolio...")
+                return {"report": call_llama(portfolio_prompt(portfolio_context))}
+            job.report(0, text="Analysiere Projekt-Batches...")
+            return get_portfolio_mapreduce().run(
+                selected_projects,
+                lambda summary: portfolio_prompt(f"""{portfolio_context}
+
+ERKENNTNISSE AUS ALLEN {len(selected_projects)} PROJEKTEN:
+{summary}"""),
+                time_budget=MAPREDUCE_TIME_BUDGET,
+                on_progress=lambda done, total: job.report(done, total, f"Analyseschritt {done}/{total}")
+            )
+
+        start_job(health_key, check_portfolio, list(filtered_projects), label="Portfolio-Gesundheitscheck")
+
+    def render_health(result: dict):
+        if "stats" not in result:
+            st.markdown(result["report"])
+            return
+        mapreduce_stats = result["stats"]
+        if result["report"]:
+            st.markdown(result["report"])
+        else:
+            st.warning("Kein Abschlussbericht (Zeitlimit oder KI-Fehler) – Zwischenergebnis:")
+            st.markdown(result["summary"])
+        st.caption(
+            f"{mapreduce_stats['projects']} Projekte in {mapreduce_stats['batches']} Batches, "
+            f"{mapreduce_stats['levels']} Reduce-Ebenen · {mapreduce_stats['llm_calls']} KI-Aufrufe, "
+            f"{mapreduce_stats['cache_hits']} aus Cache, {mapreduce_stats['fallbacks']} ohne KI-Antwort · "
+            f"{mapreduce_stats['seconds']:.0f}s"
+        )
+
+    show_job(health_key, render_health)
 
 with col_portfolio2:
+    trend_key = job_key("trend", portfolio.version, projects_fingerprint(filtered_projects))
     if st.button("  Trend-Prognose", type="secondary", use_container_width=True):
-        with st.spinner("KI erstellt Trend-Prognose..."):
-            # Berechne zusätzliche Metriken für Prognose
-            projects_over_budget = len([p for p in filtered_projects if p["variance"] > 0])
-            avg_variance_pct = (total_actual - total_plan) / total_plan * 100 if total_plan > 0 else 0
+        # Berechne zusätzliche Metriken für Prognose
+        projects_over_budget = len([p for p in filtered_projects if p["variance"] > 0])
+        avg_variance_pct = (total_actual - total_plan) / total_plan * 100 if total_plan > 0 else 0
 
-            trend_context = f"""AKTUELLE TRENDS:
+        trend_context = f"""AKTUELLE TRENDS:
 Durchschnittliche Abweichung: {avg_variance_pct:.1f}%
 Projekte mit Budgetüberschreitung: {projects_over_budget} von {len(filtered_projects)}
 Durchschnittlicher Fortschritt: {avg_progress:.1f}%
 
 AMPEL-VERTEILUNG:
-{dict(Counter(p['ampel'] for p in filtered_projects))}"""
+{view['ampel_counts']}"""
 
-            trend_prompt = f"""Als Trend-Analyst, prognostiziere die Portfolio-Entwicklung:
+        trend_prompt = f"""Als Trend-Analyst, prognostiziere die Portfolio-Entwicklung:
 
 {trend_context}
 
@@ -815,8 +985,9 @@ Analysiere:
 
 Nutze Daten-Evidenz für Prognosen."""
 
-            trend_analysis = call_llama(trend_prompt)
-            st.markdown(trend_analysis)
+        start_job(trend_key, lambda job, prompt: call_llama(prompt), trend_prompt, label="Trend-Prognose")
+
+    show_job(trend_key, st.markdown)
 
 # =========================
 # Projekt-Vergleichsanalyse
@@ -834,7 +1005,12 @@ if len(filtered_projects) >= 2:
     with col_comp2:
         compare_proj2 = st.selectbox("Projekt 2", options=project_keys, key="comp2")
 
+    # Die Auswahl bleibt im Session State, damit die KI-Vergleichsanalyse darunter
+    # (eigener Button = eigener Rerun) die Vergleichstabelle nicht verliert
     if st.button("  Projekte vergleichen", use_container_width=True):
+        st.session_state["compare_pair"] = (compare_proj1, compare_proj2)
+
+    if st.session_state.get("compare_pair") == (compare_proj1, compare_proj2):
         proj1 = next(p for p in filtered_projects if p["key"] == compare_proj1)
         proj2 = next(p for p in filtered_projects if p["key"] == compare_proj2)
 
@@ -863,9 +1039,9 @@ if len(filtered_projects) >= 2:
         st.dataframe(comp_df, use_container_width=True, hide_index=True)
 
         # KI-Vergleichsanalyse
+        compare_key = job_key("compare", portfolio.version, proj1["project_id"], proj2["project_id"])
         if st.button("  KI-Vergleichsanalyse", type="primary"):
-            with st.spinner("KI vergleicht Projekte..."):
-                compare_context = f"""PROJEKT 1: {proj1['name']}
+            compare_context = f"""PROJEKT 1: {proj1['name']}
 - Aufwand Plan/Ist: {proj1['plan']:.0f}h / {proj1['actual']:.0f}h
 - Fortschritt: {proj1['progress']:.1f}%
 - Ampel: {proj1['ampel']}
@@ -877,7 +1053,7 @@ PROJEKT 2: {proj2['name']}
 - Ampel: {proj2['ampel']}
 - Kritikalität: {proj2['criticality']['score']}"""
 
-                compare_prompt = f"""Vergleiche diese beiden Projekte objektiv:
+            compare_prompt = f"""Vergleiche diese beiden Projekte objektiv:
 
 {compare_context}
 
@@ -889,11 +1065,116 @@ Analysiere:
 
 Sei fair und konstruktiv."""
 
-                compare_analysis = call_llama(compare_prompt)
-                st.markdown(compare_analysis)
+            start_job(compare_key, lambda job, prompt: call_llama(prompt), compare_prompt,
+                      label="KI-Vergleichsanalyse")
+
+        show_job(compare_key, st.markdown)
 else:
     st.info("Mindestens 2 Projekte erforderlich für Vergleichsanalyse")
 
+# =========================
+# Änderungen seit dem letzten Export
+# =========================
+st.divider()
+st.header("  Was hat sich geändert?")
+
+previous_file = previous_snapshot(DATA_FILE)
+if previous_file:
+    changes = load_changes(previous_file, data_version(previous_file), portfolio.version)
+    st.caption(f"{os.path.basename(previous_file)} → {os.path.basename(DATA_FILE)}: "
+               f"{len(changes.added)} neu, {len(changes.removed)} entfernt, "
+               f"{len(changes.changed)} geändert, {changes.unchanged} unverändert")
+
+    change_counts = changes.counts()
+    if change_counts:
+        count_cols = st.columns(min(len(change_counts), 5))
+        for i, (kind, count) in enumerate(change_counts.most_common(5)):
+            count_cols[i].metric(EVENT_LABELS.get(kind, kind), count)
+
+        selected_kinds = st.multiselect(
+            "Ereignistypen",
+            options=list(change_counts),
+            default=list(change_counts),
+            format_func=lambda kind: EVENT_LABELS.get(kind, kind),
+            key="change_kinds"
+        )
+        st.dataframe(pd.DataFrame([{
+            "Ereignis": EVENT_LABELS.get(event["type"], event["type"]),
+            "Projekt": event["project"],
+            "Details": ", ".join(f"{k}: {v}" for k, v in event.items()
+                                 if k not in ("type", "snapshot", "project_id", "project")),
+        } for event in changes.events if event["type"] in selected_kinds]),
+            use_container_width=True, hide_index=True)
+    else:
+        st.success("Keine Änderungen seit dem letzten Export")
+else:
+    st.info("Kein vorheriger Export zum Vergleich vorhanden")
+
+# =========================
+# Volltextsuche
+# =========================
+st.divider()
+st.header("  Volltextsuche")
+
+search_text = st.text_input(
+    "Statustexte, Projektgegenstand und Meilensteine durchsuchen",
+    placeholder="z. B. Verzögerung Lieferung",
+    key="fulltext_search"
+)
+
+if search_text:
+    hits = portfolio.search(search_text, limit=20)
+    if hits:
+        st.dataframe(pd.DataFrame([{
+            "Projekt": p.name,
+            "Nummer": p.number,
+            "Status": p.status,
+            "Ampel": p.ampel,
+            "Relevanz": round(-score, 2),
+            "Statustext": strip_html(p.status_text)[:200],
+        } for p, score in hits]), use_container_width=True, hide_index=True)
+    else:
+        st.info("Keine Treffer")
+
+# =========================
+# SQL-Analyse
+# =========================
+st.divider()
+st.header("  SQL-Analyse")
+
+portfolio_sql = load_portfolio_sql(portfolio.version, portfolio.day)
+
+st.subheader("Aufschlüsselung nach Status und Ampel")
+st.dataframe(portfolio_sql.breakdown(status_filter, ampel_filter, phase_filter),
+             use_container_width=True, hide_index=True)
+
+if filtered_projects:
+    drill_key = st.selectbox("Drill-down: Projekt", options=[p["key"] for p in filtered_projects],
+                             key="sql_drill")
+    drill_project = portfolio.project(drill_key)
+
+    kpi_df = portfolio_sql.kpi_series(drill_project["project_id"])
+    if not kpi_df.empty:
+        fig_kpi = px.line(kpi_df, x="period", y="value", color="kpi_id", markers=True,
+                          labels={"period": "Monat", "value": "Stunden", "kpi_id": "KPI"})
+        fig_kpi.update_layout(height=350)
+        st.plotly_chart(fig_kpi, use_container_width=True)
+    else:
+        st.info("Keine Monatswerte für dieses Projekt vorhanden")
+
+with st.expander("Eigene SQL-Abfrage (nur lesend)"):
+    st.caption("Tabellen: " + ", ".join(portfolio_sql.tables()))
+    sql = st.text_area(
+        "SQL",
+        value="SELECT status, ampel, COUNT(*) AS projekte\nFROM project_analytics\nGROUP BY status, ampel",
+        key="sql_query"
+    )
+    if st.button("Abfrage ausführen", key="sql_run"):
+        try:
+            st.dataframe(portfolio_sql.query(sql), use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.error(f"SQL-Fehler: {e}")
+
 # =========================
 # Export & Reporting
 # =========================
@@ -903,52 +1184,31 @@ st.header("  Export & Reporting")
 col_export1, col_export2, col_export3 = st.columns(3)
 
 with col_export1:
+    excel_key = job_key("excel", portfolio.version, projects_fingerprint(filtered_projects))
     if st.button("  Excel-Export", use_container_width=True):
-        export_data = []
-        for p in filtered_projects:
-            export_data.append({
-                "Projektname": p["name"],
-                "Nummer": p["number"],
-                "Status": p["status"],
-                "Ampel": p["ampel"],
-                "Plan (h)": p["plan"],
-                "Ist (h)": p["actual"],
-                "Abweichung (h)": p["variance"],
-                "Fortschritt (%)": round(p["progress"], 2),
-                "Kritikalität": p["criticality"]["score"],
-                "Kritisch": "Ja" if p["criticality"]["is_critical"] else "Nein"
-            })
-
-        export_df = pd.DataFrame(export_data)
-
-        # Konvertiere zu Excel im Speicher
-        from io import BytesIO
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            export_df.to_excel(writer, index=False, sheet_name='Projekte')
-
-        st.download_button(
-            label="  Excel herunterladen",
-            data=output.getvalue(),
-            file_name=f"blue_ant_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        def build_excel(job, selected_projects) -> bytes:
+            job.report(0, 2, "Bereite Exportzeilen vor...")
+            export_df = pd.DataFrame(export_rows(selected_projects, style="excel"))
+
+            # Konvertiere zu Excel im Speicher
+            job.report(1, 2, f"Schreibe {len(export_df)} Zeilen...")
+            output = BytesIO()
+            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                export_df.to_excel(writer, index=False, sheet_name='Projekte')
+            return output.getvalue()
+
+        start_job(excel_key, build_excel, list(filtered_projects), label="Excel-Export")
+
+    show_job(excel_key, lambda data: st.download_button(
+        label="  Excel herunterladen",
+        data=data,
+        file_name=f"blue_ant_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ))
 
 with col_export2:
     if st.button("  CSV-Export", use_container_width=True):
-        export_data = []
-        for p in filtered_projects:
-            export_data.append({
-                "Projektname": p["name"],
-                "Nummer": p["number"],
-                "Status": p["status"],
-                "Ampel": p["ampel"],
-                "Plan (h)": p["plan"],
-                "Ist (h)": p["actual"],
-                "Abweichung (h)": p["variance"],
-                "Fortschritt (%)": round(p["progress"], 2),
-                "Kritikalität": p["criticality"]["score"]
-            })
+        export_data = export_rows(filtered_projects, style="csv")
 
         export_df = pd.DataFrame(export_data)
         csv = export_df.to_csv(index=False)
@@ -962,19 +1222,7 @@ with col_export2:
 
 with col_export3:
     if st.button("  JSON-Export", use_container_width=True):
-        export_data = []
-        for p in filtered_projects:
-            export_data.append({
-                "name": p["name"],
-                "number": p["number"],
-                "status": p["status"],
-                "ampel": p["ampel"],
-                "plan": p["plan"],
-                "actual": p["actual"],
-                "variance": p["variance"],
-                "progress": p["progress"],
-                "criticality": p["criticality"]
-            })
+        export_data = export_rows(filtered_projects, style="json")
 
         json_str = json.dumps(export_data, indent=2, ensure_ascii=False)
 
@@ -0,0 +1,151 @@
+"""
+Prompt-Kontext für die KI-Analysen.
+
+Statustext und Projektgegenstand kommen aus Blue Ant als HTML-Memos und
+können sehr lang werden; sie landen unverändert im Prompt und treiben
+Inferenzzeit und Speicherbedarf des lokalen Modells. `PromptContextBuilder`
+bereinigt die Memos (Markup, Leerraum), schätzt die Tokenzahl und kürzt
+Felder über dem Budget – auf Wunsch per Vorab-Zusammenfassung durch das
+Modell. Ergebnisse werden je Memo-Inhalt (also je Projektversion)
+zwischengespeichert.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from backend.BlueAntData_TextIndex import strip_html
+
+from blue_ant_llm import CHARS_PER_TOKEN, estimate_tokens
+
+
+# Token-Budget je Memo-Feld im Prompt
+FIELD_TOKENS = 600
+
+# Platz für den Kürzungshinweis
+_MARKER_TOKENS = 12
+
+SUMMARY_PROMPT = """Fasse folgenden Text auf höchstens {words} Wörter zusammen. Behalte alle Fakten, Probleme, Termine, Zahlen und Entscheidungen, lass Floskeln weg:
+
+{text}"""
+
+_BLOCK_TAG_RE = re.compile(r"<\s*(?:br|/p|/div|/li|/h\d|/tr)\b[^>]*>", re.IGNORECASE)
+_SPACE_RE = re.compile(r"[ \t\u00a0]+")
+
+
+# =========================
+# Bereinigen & Kürzen
+# =========================
+def clean_memo(text: Optional[str]) -> str:
+    """HTML-Memo -> Klartext (Absätze bleiben als Zeilen erhalten, Leerraum zusammengefasst)"""
+    if not text:
+        return ""
+    text = strip_html(_BLOCK_TAG_RE.sub("\n", text))
+    lines = (_SPACE_RE.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Kürzt auf max_tokens, möglichst an einem Zeilen- oder Satzende"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max(int((max_tokens - _MARKER_TOKENS) * CHARS_PER_TOKEN), 0)
+    cut = text[:max_chars]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary > max_chars // 2:
+        cut = cut[:boundary + 1]
+
+    omitted = estimate_tokens(text[len(cut):])
+    return f"{cut.rstrip()}\n[… gekürzt, ca. {omitted} Tokens ausgelassen]"
+
+
+# =========================
+# Kontext-Builder
+# =========================
+class PromptContextBuilder:
+    """
+    Kompakte Memo-Felder für Prompts, von allen Sessions gemeinsam genutzt.
+
+    `summarize` (optional) erhält einen Prompt und liefert die Antwort des
+    Modells; schlägt sie fehl, wird stattdessen gekürzt.
+    """
+
+    def __init__(self, field_tokens: int = FIELD_TOKENS,
+                 summarize: Optional[Callable[[str], str]] = None, maxsize: int = 2048):
+        self.field_tokens = field_tokens
+        self.summarize = summarize
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.trimmed = 0
+        self.summarized = 0
+        self.raw_tokens = 0
+        self.compact_tokens = 0
+
+    def compact(self, text: Optional[str]) -> str:
+        """Bereinigtes, auf das Budget gekürztes Memo (gecacht je Inhalt)"""
+        if not text:
+            return ""
+        key = (hashlib.sha1(text.encode("utf-8")).hexdigest(), self.field_tokens)
+
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+
+        result, how = self._compact(text)
+
+        with self._lock:
+            self.misses += 1
+            self.raw_tokens += estimate_tokens(text)
+            self.compact_tokens += estimate_tokens(result)
+            if how == "trimmed":
+                self.trimmed += 1
+            elif how == "summarized":
+                self.summarized += 1
+            self._data[key] = result
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return result
+
+    def _compact(self, text: str) -> Tuple[str, str]:
+        cleaned = clean_memo(text)
+        if estimate_tokens(cleaned) <= self.field_tokens:
+            return cleaned, "cleaned"
+
+        if self.summarize is not None:
+            words = int(self.field_tokens * CHARS_PER_TOKEN / 7)
+            try:
+                summary = clean_memo(self.summarize(SUMMARY_PROMPT.format(words=words, text=cleaned)))
+                if summary:
+                    return trim_to_tokens(summary, self.field_tokens), "summarized"
+            except Exception:
+                pass
+
+        return trim_to_tokens(cleaned, self.field_tokens), "trimmed"
+
+    def project_fields(self, project) -> Dict[str, str]:
+        """Statustext und Projektgegenstand eines ProjectRecord, kompakt"""
+        return {
+            "status_text": self.compact(project["status_text"]),
+            "subject_text": self.compact(project["subject_text"]),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "field_tokens": self.field_tokens,
+                "cached": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "trimmed": self.trimmed,
+                "summarized": self.summarized,
+                "raw_tokens": self.raw_tokens,
+                "compact_tokens": self.compact_tokens,
+            }
@@ -0,0 +1,203 @@
+"""
+Portfolio-Reports ohne Dashboard (für Cronjobs).
+
+Lädt eine oder mehrere kombinierte Exportdateien, berechnet Kennzahlen,
+Ampelverteilung und Kritikalitäts-Ranking wie das Dashboard und schreibt
+die Excel-, CSV- und JSON-Exporte sowie einen Report je Snapshot. Mehrere
+Dateien werden parallel auf mehreren CPU-Kernen verarbeitet.
+
+Beispiele:
+    python blue_ant_report.py
+    python blue_ant_report.py backend/blueant_combined_[0-9]*.json --out reports --workers 4
+    python blue_ant_report.py export.json --formats excel --critical-only --top 10
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+import pandas as pd
+
+from backend.BlueAntData_Archive import latest_snapshot as latest_archived
+from backend.BlueAntData_Enrichment import load_resolved
+from backend.BlueAntData_JSON import data_stem
+
+from blue_ant_analytics import (
+    AMPEL_VALUES, Portfolio, data_version, export_rows, load_combined, rank_critical
+)
+from blue_ant_rules import load_rules
+
+
+FORMATS = ("excel", "csv", "json")
+DEFAULT_PATTERN = "backend/blueant_combined_[0-9]*.json"
+
+
+def latest_snapshot(pattern: str = DEFAULT_PATTERN) -> Optional[str]:
+    """Neueste Exportdatei: laut Manifest des Exportarchivs, sonst per Zeitstempel im Dateinamen"""
+    latest = latest_archived()
+    if latest:
+        return latest
+    files = sorted(glob.glob(pattern))
+    return files[-1] if files else None
+
+
+def snapshot_name(path: str) -> str:
+    """backend/blueant_combined_20260118_184540.json (auch .json.gz) -> 20260118_184540"""
+    return os.path.basename(data_stem(path)).removeprefix("blueant_combined_")
+
+
+# =========================
+# Report je Snapshot
+# =========================
+def build_report(path: str, out_dir: str, formats: List[str] = FORMATS,
+                 status_filter: Optional[List[str]] = None, ampel_filter: Optional[List[str]] = None,
+                 critical_only: bool = False, top: int = 20,
+                 today: Optional[datetime] = None, rules_path: Optional[str] = None,
+                 phase_filter: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Kennzahlen, Ranking und Exporte einer Exportdatei; liefert die Report-Daten"""
+    started = time.perf_counter()
+    rules = load_rules(rules_path)
+    raw_data = load_combined(path)
+    portfolio = Portfolio.from_combined(raw_data, data_version(path), today=today, rules=rules,
+                                        resolved=load_resolved(path, raw_data))
+    del raw_data
+
+    view = portfolio.view(
+        status_filter if status_filter else portfolio.status_counter.keys(),
+        ampel_filter if ampel_filter else AMPEL_VALUES,
+        phase_filter or None,
+    )
+    projects = view["critical_projects"] if critical_only else view["projects"]
+    name = snapshot_name(path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    files = []
+    if "excel" in formats:
+        files.append(os.path.join(out_dir, f"blue_ant_export_{name}.xlsx"))
+        pd.DataFrame(export_rows(projects, style="excel")).to_excel(
+            files[-1], index=False, sheet_name="Projekte", engine="openpyxl"
+        )
+    if "csv" in formats:
+        files.append(os.path.join(out_dir, f"blue_ant_export_{name}.csv"))
+        pd.DataFrame(export_rows(projects, style="csv")).to_csv(files[-1], index=False)
+    if "json" in formats:
+        files.append(os.path.join(out_dir, f"blue_ant_export_{name}.json"))
+        with open(files[-1], "w", encoding="utf-8") as f:
+            json.dump(export_rows(projects, style="json"), f, indent=2, ensure_ascii=False)
+
+    report = {
+        "snapshot": path,
+        "day": portfolio.day,
+        "totals": view["totals"],
+        "status_counts": view["status_counts"],
+        "ampel_counts": {str(k): v for k, v in view["ampel_counts"].items()},
+        "phase_counts": dict(Counter(p.phase for p in view["projects"])),
+        "critical_count": len(view["critical_projects"]),
+        "critical_ranking": [{
+            "name": p.name,
+            "number": p.number,
+            "status": p.status,
+            "ampel": p.ampel,
+            "score": p.criticality.score,
+            "reasons": [reason.strip() for reason in p.criticality.reasons],
+        } for p in rank_critical(view["projects"], top)],
+        "rules": {"source": rules.source, "threshold": rules.threshold, "stats": rules.stats()},
+        "files": files,
+    }
+    files.append(os.path.join(out_dir, f"blue_ant_report_{name}.json"))
+    with open(files[-1], "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    totals = report["totals"]
+    print(f"\n📊 {report['snapshot']} ({report['seconds']:.2f}s)")
+    print(f"   Projekte: {totals['count']} | Plan: {totals['plan']:,.0f} h | "
+          f"Ist: {totals['actual']:,.0f} h | Ø Fortschritt: {totals['avg_progress']:.1f}%")
+    print("   Ampel: " + ", ".join(f"{k} {v}" for k, v in sorted(report["ampel_counts"].items())))
+    print(f"   Kritisch: {report['critical_count']}")
+    for i, p in enumerate(report["critical_ranking"][:5], 1):
+        print(f"   {i}. {p['name']} (Score {p['score']})")
+    for path in report["files"]:
+        print(f"   💾 {path}")
+
+
+# =========================
+# CLI
+# =========================
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Blue Ant Portfolio-Reports (ohne Dashboard)")
+    parser.add_argument("files", nargs="*",
+                        help=f"Kombinierte Exportdateien (Default: neuester Archiv-Snapshot bzw. {DEFAULT_PATTERN})")
+    parser.add_argument("--out", default="reports", help="Zielverzeichnis")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--status", nargs="+", default=None, help="Nur diese Projektstatus")
+    parser.add_argument("--ampel", nargs="+", default=None, help="Nur diese Ampelwerte (GRUEN, GELB, ROT, GRAU)")
+    parser.add_argument("--phase", nargs="+", default=None, help="Nur diese Phasen des Statusmodells (z. B. 1 2)")
+    parser.add_argument("--critical-only", action="store_true", help="Nur kritische Projekte exportieren")
+    parser.add_argument("--top", type=int, default=20, help="Länge des Kritikalitäts-Rankings")
+    parser.add_argument("--today", default=None,
+                        help="Stichtag YYYY-MM-DD für überfällige Meilensteine (Default: heute)")
+    parser.add_argument("--rules", default=None,
+                        help="Kritikalitäts-Regelwerk (YAML/JSON, Default: Standard-Regelwerk)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Parallele Prozesse bei mehreren Dateien")
+    args = parser.parse_args()
+
+    files = args.files or [f for f in [latest_snapshot()] if f]
+    if not files:
+        print(f"❌ Keine Exportdatei gefunden ({DEFAULT_PATTERN})")
+        return 1
+
+    try:
+        load_rules(args.rules)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"❌ Regelwerk: {e}")
+        return 1
+
+    options = {
+        "out_dir": args.out,
+        "formats": args.formats,
+        "status_filter": args.status,
+        "ampel_filter": args.ampel,
+        "phase_filter": args.phase,
+        "critical_only": args.critical_only,
+        "top": args.top,
+        "today": datetime.strptime(args.today, "%Y-%m-%d") if args.today else None,
+        "rules_path": args.rules,
+    }
+
+    failed = 0
+    workers = max(1, min(args.workers, len(files)))
+    if workers == 1:
+        for path in files:
+            try:
+                print_report(build_report(path, **options))
+            except Exception as e:
+                failed += 1
+                print(f"❌ {path}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(build_report, path, **options): path for path in files}
+            for future in as_completed(futures):
+                try:
+                    print_report(future.result())
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ {futures[future]}: {e}")
+
+    print(f"\n{'✅' if not failed else '❌'} {len(files) - failed}/{len(files)} Reports erstellt")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
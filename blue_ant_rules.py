@@ -0,0 +1,395 @@
+"""
+Regelwerk für die Kritikalitätsbewertung.
+
+Die Regeln stehen deklarativ in einer YAML- oder JSON-Datei, eine
+Änderung der Bewertungslogik braucht keinen Code:
+
+    threshold: 3                          # ab diesem Score kritisch
+    keywords: [risiko, problem]           # Statustext-Schlüsselwörter (Spalte keyword_hit)
+    rules:
+      - name: ampel_rot
+        when: ampel == "ROT"
+        points: 3
+        reason: "Statusampel Rot"
+      - name: ueberfaellige_meilensteine
+        when: overdue_milestones > 0
+        points: overdue_milestones        # Zahl oder Ausdruck
+        reason: "{overdue_milestones} überfällige Meilensteine"
+
+Bedingungen sind Python-ähnliche Ausdrücke über die Spalten der
+Projekttabelle (COLUMNS): Vergleiche, and/or/not, + - * / und
+`in [...]`. Sie werden beim Laden einmal in numpy-Operationen übersetzt
+und dann für alle Projekte auf einmal ausgewertet; je Regel werden
+Treffer und Laufzeit gezählt.
+
+    python blue_ant_rules.py --dump > criticality_rules.yaml
+    python blue_ant_rules.py criticality_rules.yaml --data backend/blueant_combined_20260118_184540.json
+"""
+import argparse
+import ast
+import functools
+import hashlib
+import json
+import operator
+import string
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Callable, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+CRITICAL_KEYWORDS = ["verzˆger", "risiko", "problem", "kritisch", "gefahr", "schwierig"]
+
+# Spalten der Projekttabelle (siehe blue_ant_analytics.project_table)
+COLUMNS = {
+    "plan": "Plan-Aufwand (h)",
+    "actual": "Ist-Aufwand (h)",
+    "variance": "Abweichung Ist - Plan (h)",
+    "progress": "Fortschritt (%)",
+    "ampel": "Statusampel (GRUEN, GELB, ROT, GRAU)",
+    "status": "Projektstatus",
+    "milestones": "Anzahl Meilensteine",
+    "overdue_milestones": "Anzahl überfälliger Meilensteine",
+    "keyword_hit": "Schlüsselwort im Statustext",
+}
+
+# Bisherige Bewertung (Gründe mit zwei führenden Leerzeichen wie im Dashboard)
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "threshold": 3,
+    "keywords": CRITICAL_KEYWORDS,
+    "rules": [
+        {"name": "ampel_rot", "when": 'ampel == "ROT"', "points": 3,
+         "reason": "  Statusampel Rot"},
+        {"name": "ampel_gelb", "when": 'ampel == "GELB"', "points": 1,
+         "reason": "  Statusampel Gelb"},
+        {"name": "hoher_aufwand", "when": "progress < 80 and actual > plan * 0.8", "points": 2,
+         "reason": "  Hoher Aufwand bei geringem Fortschritt"},
+        {"name": "ueberschreitung", "when": "plan > 0 and variance > plan * 0.1", "points": 2,
+         "reason": "  Aufwandsüberschreitung: +{variance:.0f}h"},
+        {"name": "schluesselwoerter", "when": "keyword_hit", "points": 1,
+         "reason": "  Kritische Hinweise im Statustext"},
+        {"name": "ueberfaellige_meilensteine", "when": "overdue_milestones > 0",
+         "points": "overdue_milestones", "reason": "  {overdue_milestones}überfällige Meilensteine"},
+    ],
+}
+
+Table = Dict[str, np.ndarray]
+
+
+# =========================
+# Ausdrücke übersetzen
+# =========================
+_COMPARE = {
+    ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt,
+    ast.GtE: operator.ge, ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+_ARITH = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+def compile_expression(expression: Union[str, int, float], columns: Sequence[str] = tuple(COLUMNS)
+                       ) -> Callable[[Table], Any]:
+    """Übersetzt einen Regel-Ausdruck einmalig in eine Funktion über die Projekttabelle"""
+    if isinstance(expression, (int, float)) and not isinstance(expression, bool):
+        return lambda table: expression
+    try:
+        tree = ast.parse(str(expression).strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Ungültiger Ausdruck '{expression}': {e.msg}") from None
+    return _compile(tree.body, str(expression), set(columns))
+
+
+def _compile(node: ast.AST, expression: str, columns: set) -> Callable[[Table], Any]:
+    if isinstance(node, ast.Name):
+        if node.id not in columns:
+            raise ValueError(f"Unbekannte Spalte '{node.id}' in '{expression}' "
+                             f"(erlaubt: {', '.join(sorted(columns))})")
+        name = node.id
+        return lambda table: table[name]
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str, bool)):
+        value = node.value
+        return lambda table: value
+
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(value, expression, columns) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        # Paarweise verknüpfen: Konstanten (Skalare) und Spalten (Arrays) werden gebroadcastet
+        return lambda table: functools.reduce(combine, (np.asarray(part(table), dtype=bool) for part in parts))
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        operand = _compile(node.operand, expression, columns)
+        if isinstance(node.op, ast.Not):
+            return lambda table: np.logical_not(operand(table))
+        return lambda table: -operand(table)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITH:
+        op = _ARITH[type(node.op)]
+        left, right = _compile(node.left, expression, columns), _compile(node.right, expression, columns)
+        return lambda table: op(left(table), right(table))
+
+    if isinstance(node, ast.Compare):
+        left = _compile(node.left, expression, columns)
+        steps = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)) or not all(
+                        isinstance(e, ast.Constant) for e in comparator.elts):
+                    raise ValueError(f"'in' erwartet eine Liste von Werten: '{expression}'")
+                values = [e.value for e in comparator.elts]
+                invert = isinstance(op, ast.NotIn)
+                steps.append((lambda a, b, values=values, invert=invert:
+                              np.isin(a, values, invert=invert), None))
+            elif type(op) in _COMPARE:
+                steps.append((_COMPARE[type(op)], _compile(comparator, expression, columns)))
+            else:
+                raise ValueError(f"Nicht unterstützter Vergleich in '{expression}'")
+
+        def compare(table):
+            # a < b < c wie in Python: (a < b) and (b < c)
+            result, current = True, left(table)
+            for op, right in steps:
+                value = right(table) if right is not None else None
+                result = np.logical_and(result, op(current, value))
+                current = value
+            return result
+        return compare
+
+    raise ValueError(f"Nicht unterstützter Ausdruck in '{expression}': {type(node).__name__}")
+
+
+def expression_columns(expression: Union[str, int, float]) -> set:
+    """Spalten, die ein Ausdruck liest"""
+    if not isinstance(expression, str):
+        return set()
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        return set()
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+
+
+def _template_fields(template: str) -> List[str]:
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field]
+
+
+# =========================
+# Regelwerk
+# =========================
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    when: str
+    points: Union[int, float, str] = 1
+    reason: str = ""
+
+
+class RuleResult:
+    """Ergebnis einer Auswertung: Scores, Kritisch-Flags und Treffermasken je Regel"""
+
+    def __init__(self, rules: Sequence["_CompiledRule"], table: Table,
+                 masks: List[np.ndarray], scores: np.ndarray, threshold: float):
+        self._rules = rules
+        self._table = table
+        self.masks = masks
+        self.scores = scores
+        self.is_critical = scores >= threshold
+
+    def reasons(self) -> List[Tuple[str, ...]]:
+        """Begründungen je Projekt (Reihenfolge der Regeln)"""
+        reasons: List[Tuple[str, ...]] = [()] * len(self.scores)
+        for rule, mask in zip(self._rules, self.masks):
+            hits = np.flatnonzero(mask).tolist()
+            if not rule.fields:
+                for i in hits:
+                    reasons[i] += (rule.reason,)
+                continue
+            # Nur die Treffer formatieren, mit Python-Werten statt numpy-Skalaren
+            values = [self._table[field][hits].tolist() for field in rule.fields]
+            for i, row in zip(hits, zip(*values)):
+                reasons[i] += (rule.reason.format(**dict(zip(rule.fields, row))),)
+        return reasons
+
+
+@dataclass(frozen=True)
+class _CompiledRule:
+    rule: Rule
+    predicate: Callable[[Table], Any]
+    points: Callable[[Table], Any]
+    reason: str
+    fields: tuple
+
+
+class CriticalityRules:
+    """
+    Kompiliertes Regelwerk, von allen Sessions gemeinsam genutzt.
+
+    Zählt je Regel Treffer und Laufzeit der letzten Auswertung sowie die
+    Gesamtlaufzeit aller Auswertungen.
+    """
+
+    def __init__(self, rules: Sequence[Rule], threshold: float = 3,
+                 keywords: Sequence[str] = CRITICAL_KEYWORDS, source: str = "Standard"):
+        if not rules:
+            raise ValueError("Regelwerk ohne Regeln")
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Doppelte Regelnamen: {names}")
+
+        self.rules = tuple(rules)
+        self.threshold = threshold
+        self.keywords = list(keywords)
+        self.source = source
+        self._compiled = tuple(self._compile(rule) for rule in self.rules)
+        # Nur diese Spalten muss die Projekttabelle enthalten
+        self.columns = frozenset().union(*(
+            expression_columns(c.rule.when) | expression_columns(c.rule.points) | set(c.fields)
+            for c in self._compiled
+        ))
+
+        self._lock = threading.Lock()
+        self.evaluations = 0
+        self.total_seconds = 0.0
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _compile(rule: Rule) -> _CompiledRule:
+        try:
+            fields = tuple(_template_fields(rule.reason))
+        except ValueError as e:
+            raise ValueError(f"Regel '{rule.name}': ungültiger Grundtext: {e}") from None
+        unknown = [field for field in fields if field not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Regel '{rule.name}': unbekannte Spalten im Grundtext: {unknown}")
+        try:
+            return _CompiledRule(rule, compile_expression(rule.when), compile_expression(rule.points),
+                                 rule.reason or rule.name, fields)
+        except ValueError as e:
+            raise ValueError(f"Regel '{rule.name}': {e}") from None
+
+    @classmethod
+    def from_config(cls, raw: Dict[str, Any], source: str = "Konfiguration") -> "CriticalityRules":
+        rules = []
+        for entry in raw.get("rules") or []:
+            if not entry.get("name") or "when" not in entry:
+                raise ValueError(f"Regel unvollständig (name, when): {entry}")
+            rules.append(Rule(name=str(entry["name"]), when=entry["when"],
+                              points=entry.get("points", 1), reason=entry.get("reason", "")))
+        return cls(rules, threshold=raw.get("threshold", 3),
+                   keywords=raw.get("keywords", CRITICAL_KEYWORDS), source=source)
+
+    @classmethod
+    def from_file(cls, path: str) -> "CriticalityRules":
+        """Regelwerk aus einer YAML- oder JSON-Datei"""
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith((".yaml", ".yml")):
+                if yaml is None:
+                    raise ImportError("PyYAML ist nicht installiert (pip install pyyaml)")
+                raw = yaml.safe_load(f)
+            else:
+                raw = json.load(f)
+        return cls.from_config(raw or {}, source=path)
+
+    @classmethod
+    def default(cls) -> "CriticalityRules":
+        return cls.from_config(DEFAULT_CONFIG, source="Standard")
+
+    def to_config(self) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "keywords": self.keywords,
+            "rules": [{"name": r.name, "when": r.when, "points": r.points, "reason": r.reason}
+                      for r in self.rules],
+        }
+
+    @property
+    def version(self) -> str:
+        """Kennung des Regelwerks (für Cache-Schlüssel)"""
+        raw = json.dumps(self.to_config(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+    def evaluate(self, table: Table) -> RuleResult:
+        """Wertet alle Regeln vektorisiert über die Projekttabelle aus"""
+        size = len(next(iter(table.values()), []))
+        masks, last = [], {}
+        scores = np.zeros(size)
+        started = time.perf_counter()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for compiled in self._compiled:
+                rule_start = time.perf_counter()
+                mask = np.broadcast_to(np.asarray(compiled.predicate(table), dtype=bool), (size,))
+                np.add(scores, np.asarray(compiled.points(table), dtype=float), out=scores, where=mask)
+                masks.append(mask)
+                last[compiled.rule.name] = {
+                    "hits": int(mask.sum()),
+                    "ms": (time.perf_counter() - rule_start) * 1000,
+                }
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.evaluations += 1
+            self.total_seconds += elapsed
+            self._last = last
+        return RuleResult(self._compiled, table, masks, scores, self.threshold)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Treffer und Laufzeit je Regel (letzte Auswertung)"""
+        with self._lock:
+            last = dict(self._last)
+        return [{
+            "rule": rule.name,
+            "when": rule.when,
+            "points": rule.points,
+            "hits": last.get(rule.name, {}).get("hits", 0),
+            "ms": round(last.get(rule.name, {}).get("ms", 0.0), 3),
+        } for rule in self.rules]
+
+
+def load_rules(path: Optional[str] = None) -> CriticalityRules:
+    """Regelwerk aus Datei oder das Standard-Regelwerk"""
+    return CriticalityRules.from_file(path) if path else CriticalityRules.default()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Kritikalitäts-Regelwerk prüfen und auswerten")
+    parser.add_argument("rules", nargs="?", help="Regelwerk (YAML oder JSON, Default: Standard-Regelwerk)")
+    parser.add_argument("--dump", action="store_true", help="Regelwerk als YAML/JSON ausgeben")
+    parser.add_argument("--data", default=None, help="Kombinierte Exportdatei zum Auswerten")
+    args = parser.parse_args()
+
+    try:
+        rules = load_rules(args.rules)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.dump:
+        config = rules.to_config()
+        if yaml is not None:
+            print(yaml.safe_dump(config, allow_unicode=True, sort_keys=False), end="")
+        else:
+            print(json.dumps(config, indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"✅ {len(rules.rules)} Regeln ({rules.source}), kritisch ab Score {rules.threshold}")
+    if args.data:
+        from blue_ant_analytics import Portfolio, load_combined
+        portfolio = Portfolio.from_combined(load_combined(args.data), rules=rules)
+        critical = sum(1 for p in portfolio.projects if p.criticality.is_critical)
+        print(f"📊 {len(portfolio.projects)} Projekte, {critical} kritisch "
+              f"({rules.total_seconds * 1000:.2f} ms)")
+        for stat in rules.stats():
+            print(f"   {stat['rule']:<28} {stat['hits']:>6} Treffer  {stat['ms']:8.3f} ms   {stat['when']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
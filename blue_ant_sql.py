@@ -0,0 +1,218 @@
+"""
+SQL-Sicht auf ein Portfolio.
+
+Kopiert den SQL-Store des Exporters (oder baut ihn aus den Rohdaten) in eine
+In-Memory-Datenbank und ergänzt die Tabelle `project_analytics` mit den im
+Dashboard berechneten Feldern (Ampel, Fortschritt, Kritikalität). Filter,
+Aggregate und Drill-downs laufen als parametrisierte Abfragen; freie
+Abfragen sind nur lesend möglich (Authorizer erlaubt nur SELECT/Lesen, kein
+PRAGMA, ATTACH oder Schreiben) und nach QUERY_TIMEOUT Sekunden abgebrochen.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, List, Iterable, Sequence
+
+import pandas as pd
+
+from backend.BlueAntData_SQLStore import connect, create_schema, insert_combined, store_path_for
+from backend.BlueAntData_TextIndex import TextIndex
+
+from blue_ant_analytics import Portfolio, load_combined
+
+
+ANALYTICS_SCHEMA = """
+CREATE TABLE project_analytics (
+    key           TEXT NOT NULL,
+    pos           INTEGER PRIMARY KEY,
+    project_id    INTEGER,
+    name          TEXT,
+    number        TEXT,
+    status        TEXT,
+    phase         TEXT,
+    ampel         TEXT,
+    plan          REAL,
+    actual        REAL,
+    variance      REAL,
+    progress      REAL,
+    score         INTEGER,
+    is_critical   INTEGER
+);
+CREATE INDEX idx_analytics_key ON project_analytics (key);
+CREATE INDEX idx_analytics_filter ON project_analytics (status, ampel);
+CREATE INDEX idx_analytics_project ON project_analytics (project_id);
+"""
+
+
+# Abbruch einer Abfrage nach dieser Laufzeit (Sekunden), damit sie das Lock nicht blockiert
+QUERY_TIMEOUT = float(os.environ.get("BLUEANT_SQL_TIMEOUT", "5"))
+# Prüfintervall des Abbruchs in SQLite-VM-Instruktionen
+PROGRESS_INTERVAL = 10000
+
+# Nach dem Aufbau erlaubte Operationen (alles andere wird beim Vorbereiten abgelehnt)
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+                 sqlite3.SQLITE_RECURSIVE}
+
+
+def _read_only_authorizer(action: int, *args) -> int:
+    return sqlite3.SQLITE_OK if action in _READ_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def _placeholders(values: Sequence) -> str:
+    return ", ".join("?" for _ in values)
+
+
+def fresh_store_path(data_file: str) -> Optional[str]:
+    """SQL-Store neben der JSON-Exportdatei, sofern vorhanden und nicht älter"""
+    store_path = store_path_for(data_file)
+    if os.path.exists(store_path) and os.path.getmtime(store_path) >= os.path.getmtime(data_file):
+        return store_path
+    return None
+
+
+def open_text_index(data_file: str, raw_data: Optional[List[Dict[str, Any]]] = None) -> TextIndex:
+    """Volltextindex aus dem SQL-Store des Exporters, sonst im Speicher aufgebaut"""
+    store_path = fresh_store_path(data_file)
+    text_index = TextIndex.open(store_path) if store_path else None
+    if text_index is None:
+        text_index = TextIndex.from_combined(raw_data if raw_data is not None else load_combined(data_file))
+    return text_index
+
+
+class PortfolioSQL:
+    """
+    In-Memory-SQLite eines Portfolios, von allen Sessions gemeinsam genutzt.
+
+    Nach dem Aufbau lässt ein Authorizer nur noch lesende Abfragen zu (auch
+    `PRAGMA query_only = OFF` wird abgelehnt); Abfragen werden über ein Lock
+    serialisiert und nach `timeout` Sekunden abgebrochen.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, timeout: float = QUERY_TIMEOUT):
+        self.conn = conn
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._deadline = float("inf")
+        conn.set_authorizer(_read_only_authorizer)
+        conn.set_progress_handler(self._check_deadline, PROGRESS_INTERVAL)
+
+    def _check_deadline(self) -> int:
+        # Rückgabe ungleich 0 bricht die laufende Abfrage ab (sqlite3.OperationalError: interrupted)
+        return int(time.monotonic() > self._deadline)
+
+    @classmethod
+    def build(cls, portfolio: Portfolio, store_path: Optional[str] = None,
+              raw_data: Optional[List[Dict[str, Any]]] = None) -> "PortfolioSQL":
+        """Aus der Store-Datei des Exporters, sonst aus den kombinierten Rohdaten"""
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+
+        if store_path and os.path.exists(store_path):
+            source = connect(store_path)
+            try:
+                source.backup(conn)
+            finally:
+                source.close()
+        else:
+            create_schema(conn)
+            insert_combined(conn, raw_data or [])
+
+        conn.executescript(ANALYTICS_SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT INTO project_analytics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(
+                    p.key, pos, p.project_id, p.name, p.number, p.status, p.phase, str(p.ampel),
+                    p.plan, p.actual, p.variance, p.progress,
+                    p.criticality.score if p.criticality else 0,
+                    int(bool(p.criticality and p.criticality.is_critical)),
+                ) for pos, p in enumerate(portfolio.projects)]
+            )
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA query_only = ON")
+        return cls(conn)
+
+    @classmethod
+    def for_data_file(cls, portfolio: Portfolio, data_file: str) -> "PortfolioSQL":
+        """Nutzt die .sqlite-Datei neben der JSON-Exportdatei, falls sie aktuell ist"""
+        store_path = fresh_store_path(data_file)
+        if store_path:
+            return cls.build(portfolio, store_path=store_path)
+        return cls.build(portfolio, raw_data=load_combined(data_file))
+
+    # =========================
+    # Abfragen
+    # =========================
+    def query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        """Beliebige lesende Abfrage (parametrisiert) als DataFrame"""
+        with self._lock:
+            self._deadline = time.monotonic() + self.timeout
+            try:
+                return pd.read_sql_query(sql, self.conn, params=list(params))
+            finally:
+                self._deadline = float("inf")
+
+    def _where(self, status_filter: Iterable[str], ampel_filter: Iterable[str],
+               phase_filter: Optional[Iterable[str]] = None):
+        status_filter = list(status_filter)
+        ampel_filter = [str(a) for a in ampel_filter]
+        clause = (f"status IN ({_placeholders(status_filter)}) "
+                  f"AND ampel IN ({_placeholders(ampel_filter)})")
+        params = status_filter + ampel_filter
+        if phase_filter is not None:
+            phase_filter = list(phase_filter)
+            clause += f" AND phase IN ({_placeholders(phase_filter)})"
+            params += phase_filter
+        return clause, params
+
+    def filter_keys(self, status_filter: Iterable[str], ampel_filter: Iterable[str],
+                    critical_only: bool = False, phase_filter: Optional[Iterable[str]] = None) -> List[str]:
+        """Projekt-Keys einer Filterkombination in Portfolio-Reihenfolge"""
+        where, params = self._where(status_filter, ampel_filter, phase_filter)
+        if critical_only:
+            where += " AND is_critical = 1"
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT key FROM project_analytics WHERE {where} ORDER BY pos", params
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def breakdown(self, status_filter: Iterable[str], ampel_filter: Iterable[str],
+                  phase_filter: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Aggregate je Status und Ampel"""
+        where, params = self._where(status_filter, ampel_filter, phase_filter)
+        return self.query(f"""
+            SELECT status AS Status, ampel AS Ampel, COUNT(*) AS Projekte,
+                   SUM(plan) AS "Plan (h)", SUM(actual) AS "Ist (h)",
+                   SUM(variance) AS "Abweichung (h)", AVG(progress) AS "Fortschritt (%)",
+                   SUM(is_critical) AS Kritisch
+            FROM project_analytics
+            WHERE {where}
+            GROUP BY status, ampel
+            ORDER BY Projekte DESC
+        """, params)
+
+    def kpi_series(self, project_id: int, kpi_ids: Sequence[str] = ("WorkTotalPlan", "WorkTotalActual")
+                   ) -> pd.DataFrame:
+        """Monatswerte der KPIs eines Projekts (ohne TOTAL und KPIs ohne Periode)"""
+        return self.query(f"""
+            SELECT period, kpi_id, value
+            FROM kpis
+            WHERE project_id = ? AND period NOT IN ('TOTAL', '') AND kpi_id IN ({_placeholders(kpi_ids)})
+            ORDER BY period
+        """, [project_id, *kpi_ids])
+
+    def milestones(self, project_id: int) -> pd.DataFrame:
+        return self.query("""
+            SELECT description, start_date, end_date, planned_work, actual_work
+            FROM planning_entries
+            WHERE project_id = ? AND is_milestone = 1
+            ORDER BY seq
+        """, [project_id])
+
+    def tables(self) -> List[str]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') ORDER BY name"
+            ).fetchall()
+        return [row[0] for row in rows]
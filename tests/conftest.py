@@ -0,0 +1,36 @@
+"""
+Gemeinsame Fixtures für die Tests.
+
+Die Daten kommen aus dem synthetischen Mandanten (Vorlage: die eingecheckte
+Masterdata-Datei), damit die Tests ohne echten Export laufen.
+"""
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.BlueAntAPI_DataExport import BlueAntAPI  # noqa: E402
+from backend.BlueAntData_TenantGenerator import SyntheticTenant  # noqa: E402
+
+
+def combine(tenant: SyntheticTenant) -> list:
+    """Kombinierte Exportdaten eines Mandanten (Ausgaben des Exporters unterdrückt)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return BlueAntAPI("test").combine_data(tenant.export_projects(), tenant.export_masterdata())
+
+
+@pytest.fixture(scope="session")
+def tenant() -> SyntheticTenant:
+    return SyntheticTenant(n_projects=60, seed=7)
+
+
+@pytest.fixture(scope="session")
+def combined(tenant) -> list:
+    return combine(tenant)
@@ -0,0 +1,68 @@
+import copy
+import os
+
+import pytest
+
+from backend.BlueAntData_Archive import FULL, HISTORY, ExportArchive, latest_snapshot
+from backend.BlueAntData_JSON import dumps, loads
+
+NAMES = ["20260101_000000", "20260102_000000", "20260103_000000", "20260104_000000"]
+
+
+def _snapshot(combined, day):
+    # Je Export ändert sich ein Projekt, der Rest bleibt gleich (Deduplizierung im History-Store)
+    data = copy.deepcopy(combined[:20])
+    data[day]["project_data"]["project"]["statusMemo"] = f"Stand Tag {day}"
+    return data
+
+
+@pytest.fixture()
+def snapshots(combined):
+    return {name: _snapshot(combined, day) for day, name in enumerate(NAMES)}
+
+
+def test_add_compact_repack_load_round_trip(tmp_path, tenant, snapshots, capsys):
+    masterdata = tenant.export_masterdata()
+    archive = ExportArchive(str(tmp_path), codec="gzip", keep=2, keep_history=1)
+    for name in NAMES[:3]:
+        archive.add(name, snapshots[name], masterdata=masterdata)
+
+    # Drei Exporte, keep=2: der älteste liegt im History-Store
+    assert archive.names(FULL) == NAMES[1:3]
+    assert archive.names(HISTORY) == NAMES[:1]
+    assert not os.path.exists(archive.snapshot_dir(NAMES[0]))
+    assert archive.load(NAMES[0]) == loads(dumps(snapshots[NAMES[0]]))
+    assert archive.load(NAMES[0], "masterdata") == loads(dumps(masterdata))
+
+    # Vierter Export: zweiter Snapshot verdichtet, der erste fällt über keep_history heraus (Repack)
+    archive.add(NAMES[3], snapshots[NAMES[3]], masterdata=masterdata)
+    assert archive.names() == NAMES[1:]
+    assert archive.names(HISTORY) == NAMES[1:2]
+
+    # Neu geöffnet: alles aus Manifest und Pack lesbar
+    reopened = ExportArchive(str(tmp_path), codec="gzip", keep=2, keep_history=1)
+    for name in NAMES[1:]:
+        assert reopened.load(name) == loads(dumps(snapshots[name]))
+    assert reopened.latest() == NAMES[3]
+    assert latest_snapshot(str(tmp_path)) == reopened.path(NAMES[3])
+
+    # Nur noch referenzierte Datensätze: 20 Projekte plus Masterdata
+    history = reopened._load_history()
+    assert set(history["snapshots"]) == {NAMES[1]}
+    assert len(history["objects"]) == 21
+
+
+def test_keep_never_drops_the_previous_full_snapshot(tmp_path, snapshots, capsys):
+    archive = ExportArchive(str(tmp_path), codec="gzip", keep=1)
+    assert archive.keep == 2
+    for name in NAMES:
+        archive.add(name, snapshots[name])
+    assert archive.path(archive.previous(NAMES[3])) is not None
+
+
+def test_commit_requires_combined_file(tmp_path, tenant):
+    archive = ExportArchive(str(tmp_path), codec="gzip")
+    archive.write(NAMES[0], "masterdata", tenant.export_masterdata())
+    with pytest.raises(ValueError, match="keine kombinierte Datei"):
+        archive.commit(NAMES[0])
+    assert archive.latest() is None
@@ -0,0 +1,125 @@
+import copy
+
+import pytest
+
+from backend.BlueAntData_Enrichment import MasterdataLookup
+from blue_ant_changes import diff_combined
+
+
+def _total(entry, kpi_id):
+    return next(kpi for kpi in entry["kpis"]["kpis"] if kpi["id"] == kpi_id and kpi.get("period") == "TOTAL")
+
+
+def _milestones(entry):
+    return [pe for pe in entry["planningentries"]["planningEntries"] if not pe.get("type")]
+
+
+def _other_status(combined, entry):
+    current = entry["status_info"]["name"]
+    return next(e["status_info"] for e in combined if e["status_info"]["name"] != current)
+
+
+def _by_type(changes, kind):
+    return [event for event in changes.events if event["type"] == kind]
+
+
+@pytest.fixture
+def snapshots(combined):
+    old = copy.deepcopy(combined[:10])
+    return old, copy.deepcopy(old)
+
+
+def test_unchanged_export_has_no_events(snapshots):
+    old, new = snapshots
+    changes = diff_combined(old, new, "v1", "v2")
+    assert changes.unchanged == len(old)
+    assert changes.events == [] and changes.changed == []
+
+
+def test_status_change(combined, snapshots):
+    old, new = snapshots
+    status = _other_status(combined, new[0])
+    new[0]["status_info"] = copy.deepcopy(status)
+    new[0]["project_data"]["project"]["statusId"] = status["id"]
+
+    [event] = _by_type(diff_combined(old, new, "v1", "v2"), "status_changed")
+    assert event["project_id"] == new[0]["project_id"]
+    assert event["old"] == old[0]["status_info"]["name"]
+    assert event["new"] == status["name"]
+    assert event["snapshot"] == "v2"
+
+
+def test_status_change_resolved_from_masterdata(tenant, combined, snapshots):
+    # Ohne status_info muss der Name über die statusId aus den Masterdaten kommen
+    old, new = snapshots
+    status = _other_status(combined, new[0])
+    for entry in (old[0], new[0]):
+        del entry["status_info"]
+    new[0]["project_data"]["project"]["statusId"] = status["id"]
+
+    lookup = MasterdataLookup.from_masterdata(tenant.export_masterdata())
+    [event] = _by_type(diff_combined(old, new, lookup=lookup), "status_changed")
+    assert event["new"] == status["name"]
+
+
+def test_work_change_and_overrun(snapshots):
+    old, new = snapshots
+    entry = next(e for e in new if _total(e, "WorkTotalActual")["value"] < _total(e, "WorkTotalPlan")["value"])
+    plan = _total(entry, "WorkTotalPlan")["value"]
+    actual = _total(entry, "WorkTotalActual")
+    previous = actual["value"]
+    actual["value"] = plan + 100.0
+
+    changes = diff_combined(old, new)
+    [work] = _by_type(changes, "work_changed")
+    assert work["project_id"] == entry["project_id"]
+    assert work["plan_delta"] == 0
+    assert work["actual_delta"] == round(plan + 100.0 - previous, 1)
+
+    [overrun] = _by_type(changes, "overrun_started")
+    assert overrun["project_id"] == entry["project_id"]
+    assert overrun["variance"] == pytest.approx(100.0, abs=0.1)
+
+
+def test_work_change_below_tolerance_is_ignored(snapshots):
+    old, new = snapshots
+    _total(new[0], "WorkTotalActual")["value"] += 0.2
+
+    changes = diff_combined(old, new)
+    assert changes.changed == [new[0]["project_id"]]
+    assert _by_type(changes, "work_changed") == []
+
+
+def test_milestone_events(snapshots):
+    old, new = snapshots
+    entry = next(e for e in new if len(_milestones(e)) >= 2)
+    moved, removed = _milestones(entry)[:2]
+    old_end = moved["end"]
+    moved["end"] = "2030-01-31"
+    entry["planningentries"]["planningEntries"].remove(removed)
+    entry["planningentries"]["planningEntries"].append(
+        {"id": 1, "description": "Abnahme neu", "type": None, "start": "2030-02-01", "end": "2030-02-15",
+         "plannedWork": 0, "actualWork": 0})
+
+    changes = diff_combined(old, new)
+    counts = changes.counts()
+    assert counts["milestone_moved"] == counts["milestone_added"] == counts["milestone_removed"] == 1
+
+    [event] = _by_type(changes, "milestone_moved")
+    assert event["milestone"] == moved["description"]
+    assert (event["old"], event["new"]) == (old_end, "2030-01-31")
+    assert event["days"] > 0
+    assert _by_type(changes, "milestone_added")[0]["milestone"] == "Abnahme neu"
+    assert _by_type(changes, "milestone_removed")[0]["milestone"] == removed["description"]
+
+
+def test_added_and_removed_projects(combined, snapshots):
+    old, new = snapshots
+    gone = new.pop(0)
+    new.append(copy.deepcopy(combined[10]))
+
+    changes = diff_combined(old, new)
+    assert changes.added == [combined[10]["project_id"]]
+    assert changes.removed == [gone["project_id"]]
+    assert changes.counts()["project_added"] == changes.counts()["project_removed"] == 1
+    assert [e["project_id"] for e in changes.touched_entries] == [combined[10]["project_id"]]
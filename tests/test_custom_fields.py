@@ -0,0 +1,23 @@
+from backend.BlueAntData_CustomFields import CustomFieldIndex
+
+
+FIELDS = [
+    {"name": "Budget", "type": "Double"},
+    {"name": "Kosten", "type": "Double"},
+    {"name": "Go-Live", "type": "Date"},
+    {"name": "Abnahme", "type": "Date"},
+    {"name": "Bereich", "type": "ListBox", "options": ["IT", "HR"]},
+]
+
+
+def test_build_drops_columns_without_parsable_values():
+    custom_fields = [
+        {"Budget": "n/a", "Kosten": "1200.5", "Go-Live": "irgendwann", "Abnahme": "2026-03-01", "Bereich": "IT"},
+        {"Budget": "offen", "Kosten": "", "Go-Live": "", "Abnahme": "kein Datum", "Bereich": None},
+    ]
+    index = CustomFieldIndex.build(custom_fields, FIELDS)
+
+    assert index.names() == ["Kosten", "Abnahme", "Bereich"]
+    assert index["Kosten"].filled == 1
+    assert index["Abnahme"].filled == 1
+    assert index.mask({"Kosten": (1000.0, None)}).tolist() == [True, False]
@@ -0,0 +1,18 @@
+import os
+
+from backend.BlueAntData_Enrichment import load_resolved, masterdata_path_for, resolved_path_for
+from backend.BlueAntData_JSON import dump
+
+
+def test_load_resolved_does_not_write_next_to_export(tmp_path, tenant, combined):
+    json_path = str(tmp_path / "blueant_combined_20260101_000000.json")
+    for path, data in ((json_path, combined), (masterdata_path_for(json_path), tenant.export_masterdata())):
+        with open(path, "wb") as f:
+            dump(data, f)
+
+    view = load_resolved(json_path, combined)
+    assert view is not None and len(view) == len(combined)
+    assert not os.path.exists(resolved_path_for(json_path))
+
+    load_resolved(json_path, combined, save=True)
+    assert os.path.exists(resolved_path_for(json_path))
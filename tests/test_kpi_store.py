@@ -0,0 +1,29 @@
+import numpy as np
+
+from blue_ant_kpi_store import NO_PERIOD, KPIStore
+
+
+def _entry(project_id, kpis):
+    return {"project_id": project_id, "kpis": {"kpis": kpis}}
+
+
+def test_kpis_without_period_are_not_counted_as_total():
+    store = KPIStore.from_combined([
+        _entry(1, [{"id": "WorkTotalPlan", "period": "TOTAL", "value": 100},
+                   {"id": "WorkTotalPlan", "value": 40}]),
+        _entry(2, [{"id": "WorkTotalPlan", "value": 70}]),
+    ])
+
+    assert store.column("WorkTotalPlan").tolist() == [100.0, 0.0]
+    assert store.column("WorkTotalPlan", NO_PERIOD).tolist() == [40.0, 70.0]
+    assert list(store.periodic("WorkTotalPlan").columns) == []
+
+
+def test_periodic_keeps_monthly_values():
+    store = KPIStore.from_combined([
+        _entry(1, [{"id": "WorkTotalActual", "period": "2026-01", "value": 5},
+                   {"id": "WorkTotalActual", "period": "TOTAL", "value": 5}]),
+    ])
+    frame = store.periodic("WorkTotalActual")
+    assert list(frame.columns) == ["2026-01"]
+    assert np.isclose(frame.loc[1, "2026-01"], 5.0)
@@ -0,0 +1,32 @@
+import copy
+
+import pytest
+
+from backend.BlueAntData_Enrichment import MasterdataLookup, resolve
+from blue_ant_analytics import Portfolio
+
+
+@pytest.fixture(scope="module")
+def duplicated(combined):
+    # Zweiter Mandant mit denselben Projekten (gleicher Name, Nummer und ID)
+    return combined + [dict(copy.deepcopy(entry), tenant="sued") for entry in combined[:3]]
+
+
+def test_duplicate_keys_are_made_unique(duplicated):
+    with pytest.warns(UserWarning, match="doppelte Projekt-Keys"):
+        portfolio = Portfolio.from_combined(duplicated, "v")
+
+    keys = [p.key for p in portfolio.projects]
+    assert len(set(keys)) == len(duplicated)
+    for project in portfolio.projects:
+        assert portfolio.project(project.key) is project
+
+
+def test_custom_breakdown_counts_every_project(tenant, duplicated):
+    resolved = resolve(duplicated, MasterdataLookup.from_masterdata(tenant.export_masterdata()))
+    with pytest.warns(UserWarning):
+        portfolio = Portfolio.from_combined(duplicated, "v", resolved=resolved)
+
+    name = portfolio.custom_fields.names("category")[0]
+    breakdown = portfolio.custom_breakdown(name, portfolio.projects)
+    assert sum(row["count"] for row in breakdown) == len(duplicated)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from blue_ant_rules import CriticalityRules, compile_expression
+
+
+TABLE = {
+    "ampel": np.array(["ROT", "GELB", "GRUEN"]),
+    "plan": np.array([100.0, 0.0, 50.0]),
+    "actual": np.array([120.0, 10.0, 20.0]),
+    "keyword_hit": np.array([True, False, False]),
+}
+
+
+@pytest.mark.parametrize("expression, expected", [
+    # Konstante und Vergleich
+    ("ampel == 'ROT' and True", [True, False, False]),
+    ("False or ampel == 'GELB'", [False, True, False]),
+    # Konstante und Spalte
+    ("keyword_hit and True", [True, False, False]),
+    ("keyword_hit or False", [True, False, False]),
+    # Spalte und Vergleich
+    ("keyword_hit or actual > plan", [True, True, False]),
+    ("plan > 0 and actual < plan and not keyword_hit", [False, False, True]),
+])
+def test_bool_op_broadcasts_mixed_operands(expression, expected):
+    result = np.broadcast_to(compile_expression(expression)(TABLE), (3,))
+    assert result.tolist() == expected
+
+
+def test_bool_op_of_constants_stays_scalar():
+    assert bool(compile_expression("True and not False")(TABLE)) is True
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("plan * 0.1 + 5", [15.0, 5.0, 10.0]),
+    ("-plan", [-100.0, -0.0, -50.0]),
+    ("0 < plan <= 50", [False, False, True]),
+    ("ampel in ['ROT', 'GELB']", [True, True, False]),
+    ("ampel not in ('ROT',)", [False, True, True]),
+    (3, [3, 3, 3]),
+])
+def test_accepted_syntax(expression, expected):
+    result = np.broadcast_to(compile_expression(expression)(TABLE), (3,))
+    assert result.tolist() == expected
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("budget > 0", "Unbekannte Spalte 'budget'"),
+    ("plan >", "Ungültiger Ausdruck"),
+    ("len(ampel) > 2", "Nicht unterstützter Ausdruck"),
+    ("ampel.lower() == 'rot'", "Nicht unterstützter Ausdruck"),
+    ("__import__('os')", "Nicht unterstützter Ausdruck"),
+    ("plan ** 2", "Nicht unterstützter Ausdruck"),
+    ("ampel in plan", "'in' erwartet eine Liste"),
+    ("ampel is None", "Nicht unterstützter Vergleich"),
+    ("[plan for plan in actual]", "Nicht unterstützter Ausdruck"),
+])
+def test_rejected_syntax(expression, message):
+    with pytest.raises(ValueError, match=message):
+        compile_expression(expression)
+
+
+def test_config_errors_name_the_rule():
+    with pytest.raises(ValueError, match="Regel 'kaputt': Unbekannte Spalte"):
+        CriticalityRules.from_config({"rules": [{"name": "kaputt", "when": "budget > 0"}]})
+    with pytest.raises(ValueError, match="unbekannte Spalten im Grundtext"):
+        CriticalityRules.from_config({"rules": [{"name": "r", "when": "plan > 0", "reason": "{budget}"}]})
+    with pytest.raises(ValueError, match="Doppelte Regelnamen"):
+        CriticalityRules.from_config({"rules": [{"name": "r", "when": "True"}, {"name": "r", "when": "False"}]})
+    with pytest.raises(ValueError, match="unvollständig"):
+        CriticalityRules.from_config({"rules": [{"name": "r"}]})
+
+
+def test_evaluate_scores_reasons_and_threshold():
+    rules = CriticalityRules.from_config({"threshold": 3, "rules": [
+        {"name": "rot", "when": "ampel == 'ROT'", "points": 2, "reason": "rot"},
+        {"name": "ueber", "when": "actual > plan", "points": "actual - plan", "reason": "+{variance:.0f}h"},
+    ]})
+    table = dict(TABLE, variance=TABLE["actual"] - TABLE["plan"])
+    result = rules.evaluate(table)
+
+    assert result.scores.tolist() == [22.0, 10.0, 0.0]
+    assert result.is_critical.tolist() == [True, True, False]
+    assert result.reasons() == [("rot", "+20h"), ("+10h",), ()]
+    assert [stat["hits"] for stat in rules.stats()] == [1, 2]
@@ -0,0 +1,50 @@
+import pytest
+
+from blue_ant_analytics import AMPEL_VALUES, Portfolio
+from blue_ant_sql import PortfolioSQL
+
+
+@pytest.fixture(scope="module")
+def portfolio(combined):
+    return Portfolio.from_combined(combined, "v")
+
+
+@pytest.fixture()
+def portfolio_sql(portfolio, combined):
+    return PortfolioSQL.build(portfolio, raw_data=combined)
+
+
+@pytest.mark.parametrize("sql", [
+    "PRAGMA query_only = OFF",
+    "DELETE FROM project_analytics",
+    "ATTACH DATABASE ':memory:' AS other",
+    "CREATE TABLE t (a)",
+    "UPDATE projects SET name = 'x'",
+    "BEGIN",
+])
+def test_query_denies_everything_but_reading(portfolio_sql, portfolio, sql):
+    with pytest.raises(Exception, match="not authorized"):
+        portfolio_sql.query(sql)
+    count = portfolio_sql.query("SELECT COUNT(*) AS n FROM project_analytics")["n"][0]
+    assert count == len(portfolio.projects)
+
+
+def test_query_allows_select_and_recursive_cte(portfolio_sql):
+    frame = portfolio_sql.query(
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 5) SELECT SUM(x) AS s FROM c")
+    assert frame["s"][0] == 15
+
+
+def test_query_interrupts_long_running_queries(portfolio_sql):
+    portfolio_sql.timeout = 0.2
+    with pytest.raises(Exception, match="interrupted"):
+        portfolio_sql.query("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT COUNT(*) FROM c")
+    # Das Lock ist wieder frei, die nächste Abfrage läuft normal
+    assert portfolio_sql.query("SELECT 1 AS one")["one"][0] == 1
+
+
+def test_filter_keys_and_breakdown_cover_all_projects(portfolio_sql, portfolio):
+    statuses = list(portfolio.status_counter)
+    ampeln = AMPEL_VALUES
+    assert portfolio_sql.filter_keys(statuses, ampeln) == [p.key for p in portfolio.projects]
+    assert portfolio_sql.breakdown(statuses, ampeln)["Projekte"].sum() == len(portfolio.projects)
@@ -0,0 +1,33 @@
+import sqlite3
+
+from backend.BlueAntData_Enrichment import MasterdataLookup, project_status_id
+from backend.BlueAntData_SQLStore import create_schema, insert_combined
+
+
+def test_status_names_come_from_masterdata_text(tenant, combined):
+    masterdata = tenant.export_masterdata()
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    insert_combined(conn, combined, masterdata)
+
+    lookup = MasterdataLookup.from_masterdata(masterdata)
+    expected = {}
+    for entry in combined:
+        status = lookup.status(project_status_id(entry["project_data"]["project"]))
+        expected[status["name"]] = expected.get(status["name"], 0) + 1
+
+    rows = conn.execute("SELECT status_name, COUNT(*) FROM projects GROUP BY status_name").fetchall()
+    assert dict(rows) == expected
+    assert None not in expected
+    assert conn.execute("SELECT COUNT(*) FROM statuses WHERE name IS NULL").fetchone()[0] == 0
+
+
+def test_kpis_without_period_do_not_replace_total():
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    insert_combined(conn, [{
+        "project_id": 1, "project_data": {"project": {"id": 1}},
+        "kpis": {"kpis": [{"id": "WorkTotalPlan", "period": "TOTAL", "value": 100},
+                          {"id": "WorkTotalPlan", "value": 40}]},
+    }])
+    assert conn.execute("SELECT work_plan FROM project_work").fetchone()[0] == 100.0